@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from langchain_core.runnables import RunnableConfig
 from services.ats_service import ATSService
 
 def ats_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -13,3 +14,11 @@ def ats_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     result = ATSService.calculate_score(resume_text, google_api_key)
     
     return result
+
+
+async def aats_score_agent(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Async variant of ats_score_agent."""
+    resume_text = state.get("resume_text", "")
+    google_api_key = state.get("google_api_key")
+
+    return await ATSService.acalculate_score(resume_text, google_api_key, config=config)
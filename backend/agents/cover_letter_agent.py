@@ -1,58 +1,26 @@
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Dict, Any, Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 import os
 
-
-
-def cover_letter_agent(state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Cover Letter Agent (Gemini)
-    Generates a tailored, ATS-friendly, professional cover letter.
-    """
-
-    resume_text = state.get("resume_text", "")
-    improved_resume = state.get("improved_resume", resume_text)
-    jd_text = state.get("job_description", "")
-    extracted_skills = state.get("extracted_skills", [])
-    missing_skills = state.get("missing_skills", [])
-    fit_explanation = state.get("fit_explanation", "")
-
-    if not jd_text:
-        return {"cover_letter": ""}
-
-    # -----------------------------------------
-    # Gemini model
-    # -----------------------------------------
-    # -----------------------------------------
-    # Gemini model
-    # -----------------------------------------
-    google_api_key = state.get("google_api_key")
-    if not google_api_key:
-        raise ValueError("Google API Key not found in state")
-
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.25,
-        max_output_tokens=900,
-        response_mime_type="text/plain",
-        google_api_key=google_api_key
-    )
-
-    # -----------------------------------------
-    # Prompt Template
-    # -----------------------------------------
-    prompt = PromptTemplate(
-        input_variables=[
-            "resume_text",
-            "improved_resume",
-            "jd_text",
-            "extracted_skills",
-            "missing_skills",
-            "fit_explanation"
-        ],
-        template="""
+from services.llm_factory import get_llm_chain
+
+
+# -----------------------------------------
+# Prompt Template
+# -----------------------------------------
+COVER_LETTER_PROMPT_VERSION = "2"
+COVER_LETTER_PROMPT = PromptTemplate(
+    input_variables=[
+        "resume_text",
+        "improved_resume_section",
+        "jd_text",
+        "extracted_skills",
+        "missing_skills",
+        "fit_explanation"
+    ],
+    template="""
 You are an expert career writer. Write a polished, persuasive, and ATS-friendly cover letter.
 
 STRICT RULES:
@@ -73,10 +41,7 @@ DATA FOR WRITING:
 
 RESUME (RAW):
 {resume_text}
-
-IMPROVED RESUME:
-{improved_resume}
-
+{improved_resume_section}
 JOB DESCRIPTION:
 {jd_text}
 
@@ -91,19 +56,75 @@ FIT ANALYSIS:
 
 Write the final cover letter below:
 """
-    )
+)
 
-    chain = prompt | llm | StrOutputParser()
 
-    # Generate
-    letter = chain.invoke({
+def _prepare_cover_letter(state: Dict[str, Any]):
+    """
+    Returns (chain, inputs), or None when there is no JD to write against.
+    """
+    resume_text = state.get("resume_text", "")
+    # Absent in parallel mode, where the letter is written alongside the improver
+    improved_resume = state.get("improved_resume")
+    jd_text = state.get("job_description", "")
+    extracted_skills = state.get("extracted_skills", [])
+    missing_skills = state.get("missing_skills", [])
+    fit_explanation = state.get("fit_explanation", "")
+
+    if not jd_text:
+        return None
+
+    # -----------------------------------------
+    # Gemini model
+    # -----------------------------------------
+    google_api_key = state.get("google_api_key")
+    if not google_api_key:
+        raise ValueError("Google API Key not found in state")
+
+    chain = get_llm_chain(
+        "cover_letter", COVER_LETTER_PROMPT, StrOutputParser(), google_api_key,
+        prompt_version=COVER_LETTER_PROMPT_VERSION,
+        temperature=0.25,
+        max_output_tokens=900,
+        response_mime_type="text/plain"
+    )
+
+    inputs = {
         "resume_text": resume_text,
-        "improved_resume": improved_resume,
+        "improved_resume_section": f"\nIMPROVED RESUME:\n{improved_resume}\n" if improved_resume else "",
         "jd_text": jd_text,
         "extracted_skills": extracted_skills,
         "missing_skills": missing_skills,
         "fit_explanation": fit_explanation,
-    })
+    }
+
+    return chain, inputs
+
+
+def cover_letter_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Cover Letter Agent (Gemini)
+    Generates a tailored, ATS-friendly, professional cover letter.
+    """
+    prepared = _prepare_cover_letter(state)
+    if prepared is None:
+        return {"cover_letter": ""}
+
+    chain, inputs = prepared
+
+    # Generate
+    letter = chain.invoke(inputs)
 
     return {"cover_letter": letter.strip()}
 
+
+async def acover_letter_agent(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Async variant of cover_letter_agent (non-blocking Gemini call)."""
+    prepared = _prepare_cover_letter(state)
+    if prepared is None:
+        return {"cover_letter": ""}
+
+    chain, inputs = prepared
+    letter = await chain.ainvoke(inputs, config=config)
+
+    return {"cover_letter": letter.strip()}
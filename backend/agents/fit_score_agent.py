@@ -1,21 +1,70 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 
 import json
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
+from services.llm_factory import get_llm_chain
+
+
+# -----------------------------
+# Prompt
+# -----------------------------
+FIT_SCORE_PROMPT_VERSION = "1"
+FIT_SCORE_PROMPT = PromptTemplate(
+    input_variables=[
+        "resume_skills",
+        "job_skills",
+        "missing_skills",
+        "semantic_scores",
+        "avg_semantic_score",
+        "top_chunks",
+        "resume_text",
+        "jd_text"
+    ],
+    template="""
+You are an ATS scoring system. Evaluate the candidate against the job.
 
+RESUME SKILLS:
+{resume_skills}
 
-def fit_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+JOB SKILLS:
+{job_skills}
+
+MISSING SKILLS:
+{missing_skills}
+
+SEMANTIC MATCH SCORES:
+{semantic_scores}
+
+AVERAGE SEMANTIC MATCH:
+{avg_semantic_score}
+
+TOP RESUME CHUNKS MATCHING JD:
+{top_chunks}
+
+RESUME TEXT:
+{resume_text}
+
+JOB DESCRIPTION:
+{jd_text}
+
+Return STRICT JSON ONLY:
+{{
+  "fit_score": number (0-100 scale, where 0 is no match and 100 is perfect match),
+  "reasoning": "...",
+  "missing_skills": []
+}}
+"""
+)
+
+
+def _prepare_fit_score(state: Dict[str, Any]):
     """
-    Compute ATS fit score using Gemini LLM + heuristics.
-    Output added to state:
-        - overall_fit_score
-        - skill_match_score
-        - missing_skills
-        - fit_explanation
+    Builds the chain + prompt inputs shared by the sync and async agents.
+    Returns (chain, inputs, missing_skills, skill_match_score).
     """
 
     # -----------------------------
@@ -40,9 +89,6 @@ def fit_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         (1 - len(missing_skills) / max(len(job_skills), 1)), 4
     )
 
-    # -----------------------------
-    # Gemini LLM
-    # -----------------------------
     # -----------------------------
     # Gemini LLM
     # -----------------------------
@@ -50,66 +96,15 @@ def fit_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     if not google_api_key:
         raise ValueError("Google API Key not found in state")
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
+    chain = get_llm_chain(
+        "fit_score", FIT_SCORE_PROMPT, StrOutputParser(), google_api_key,
+        prompt_version=FIT_SCORE_PROMPT_VERSION,
         temperature=0.15,
-        response_mime_type="application/json",
-        google_api_key=google_api_key
-    )
-
-    # -----------------------------
-    # Prompt
-    # -----------------------------
-    prompt = PromptTemplate(
-        input_variables=[
-            "resume_skills",
-            "job_skills",
-            "missing_skills",
-            "semantic_scores",
-            "avg_semantic_score",
-            "top_chunks",
-            "resume_text",
-            "jd_text"
-        ],
-        template="""
-You are an ATS scoring system. Evaluate the candidate against the job.
-
-RESUME SKILLS:
-{resume_skills}
-
-JOB SKILLS:
-{job_skills}
-
-MISSING SKILLS:
-{missing_skills}
-
-SEMANTIC MATCH SCORES:
-{semantic_scores}
-
-AVERAGE SEMANTIC MATCH:
-{avg_semantic_score}
-
-TOP RESUME CHUNKS MATCHING JD:
-{top_chunks}
-
-RESUME TEXT:
-{resume_text}
-
-JOB DESCRIPTION:
-{jd_text}
-
-Return STRICT JSON ONLY:
-{{
-  "fit_score": number (0-100 scale, where 0 is no match and 100 is perfect match),
-  "reasoning": "...",
-  "missing_skills": []
-}}
-"""
+        cache=True,
+        response_mime_type="application/json"
     )
 
-    chain = prompt | llm | StrOutputParser()
-
-    raw = chain.invoke({
+    inputs = {
         "resume_skills": resume_skills,
         "job_skills": job_skills,
         "missing_skills": missing_skills,
@@ -118,8 +113,12 @@ Return STRICT JSON ONLY:
         "top_chunks": top_chunks,
         "resume_text": resume_text,
         "jd_text": jd_text
-    })
+    }
+
+    return chain, inputs, missing_skills, skill_match_score
+
 
+def _parse_fit_score(raw: str, missing_skills, skill_match_score) -> Dict[str, Any]:
     # -----------------------------
     # Safely parse JSON
     # -----------------------------
@@ -155,3 +154,23 @@ Return STRICT JSON ONLY:
         "fit_explanation": data.get("reasoning", "")
     }
 
+
+def fit_score_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute ATS fit score using Gemini LLM + heuristics.
+    Output added to state:
+        - overall_fit_score
+        - skill_match_score
+        - missing_skills
+        - fit_explanation
+    """
+    chain, inputs, missing_skills, skill_match_score = _prepare_fit_score(state)
+    raw = chain.invoke(inputs)
+    return _parse_fit_score(raw, missing_skills, skill_match_score)
+
+
+async def afit_score_agent(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Async variant of fit_score_agent (non-blocking Gemini call)."""
+    chain, inputs, missing_skills, skill_match_score = _prepare_fit_score(state)
+    raw = await chain.ainvoke(inputs, config=config)
+    return _parse_fit_score(raw, missing_skills, skill_match_score)
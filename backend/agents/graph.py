@@ -1,58 +1,72 @@
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from agents.resume_extractor_agent import resume_extractor_agent
-from agents.query_manager_agent import query_manager_agent
+from agents.query_manager_agent import query_manager_agent, aquery_manager_agent
 from agents.job_search_agent import job_search_agent
-from agents.serpapi_job_search_agent import serpapi_job_search_agent
-from agents.tavily_agent import tavily_job_search_agent
-from agents.jd_analyzer_agent import jd_analyzer_agent
-from agents.fit_score_agent import fit_score_agent
-from agents.resume_improver_agent import resume_improver_agent
-from agents.cover_letter_agent import cover_letter_agent
+from agents.serpapi_job_search_agent import serpapi_job_search_agent, aserpapi_job_search_agent
+from agents.tavily_agent import tavily_job_search_agent, atavily_job_search_agent
+from agents.jd_analyzer_agent import jd_loader_agent, jd_skills_agent, jd_matcher_agent
+from agents.fit_score_agent import fit_score_agent, afit_score_agent
+from agents.resume_improver_agent import resume_improver_agent, aresume_improver_agent
+from agents.cover_letter_agent import cover_letter_agent, acover_letter_agent
 from agents.application_saver_agent import application_saver_agent
-from agents.ats_score_agent import ats_score_agent
+from agents.ats_score_agent import ats_score_agent, aats_score_agent
 from agents.job_search_router import job_search_router
 from agents.state import CareerPilotState
+from services.metrics import traced_node
 
-from models.database import SessionLocal
+import threading
+import time
 import os
 
 
-# DB session generator
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def graph_node(name: str, func, afunc=None):
+    """
+    Timed node usable from both graph.invoke (func) and graph.ainvoke (afunc).
+    Nodes without an async variant are run in a worker thread by ainvoke.
+    """
+    return RunnableLambda(
+        traced_node(name, func),
+        afunc=traced_node(name, afunc) if afunc else None,
+        name=name
+    )
 
 
 def build_careerpilot_graph():
     graph = StateGraph(CareerPilotState)
 
     # -------------------- Node wrappers --------------------
-    graph.add_node("resume_extractor", resume_extractor_agent)
+    graph.add_node("resume_extractor", graph_node("resume_extractor", resume_extractor_agent))
     
     # NEW: Query Manager optimizes the search string
-    graph.add_node("query_manager", query_manager_agent)
+    graph.add_node("query_manager", graph_node("query_manager", query_manager_agent, aquery_manager_agent))
 
     # ATS Score
-    graph.add_node("ats_score", ats_score_agent)
+    graph.add_node("ats_score", graph_node("ats_score", ats_score_agent, aats_score_agent))
 
     # Search Agents
-    graph.add_node("job_search", job_search_agent)
-    graph.add_node("serpapi_job_search", serpapi_job_search_agent)
-    graph.add_node("tavily_job_search", tavily_job_search_agent)
+    graph.add_node("job_search", graph_node("job_search", job_search_agent))
+    graph.add_node("serpapi_job_search", graph_node("serpapi_job_search", serpapi_job_search_agent, aserpapi_job_search_agent))
+    graph.add_node("tavily_job_search", graph_node("tavily_job_search", tavily_job_search_agent, atavily_job_search_agent))
 
     # Downstream Analysis
-    graph.add_node("jd_analyzer", jd_analyzer_agent)
-    graph.add_node("fit_score", fit_score_agent)
-    graph.add_node("resume_improver", resume_improver_agent)
-    graph.add_node("cover_letter", cover_letter_agent)
+    # JD loading fans out into skill extraction + semantic matching,
+    # which run concurrently and join at fit_score.
+    graph.add_node("jd_analyzer", graph_node("jd_analyzer", jd_loader_agent))
+    graph.add_node("jd_skills", graph_node("jd_skills", jd_skills_agent))
+    graph.add_node("jd_matcher", graph_node("jd_matcher", jd_matcher_agent))
+    graph.add_node("fit_score", graph_node("fit_score", fit_score_agent, afit_score_agent))
+    graph.add_node("resume_improver", graph_node("resume_improver", resume_improver_agent, aresume_improver_agent))
+    graph.add_node("cover_letter", graph_node("cover_letter", cover_letter_agent, acover_letter_agent))
+
+    # Waits for resume_improver + cover_letter before saving
+    graph.add_node("analysis_join", lambda state: {})
 
     # Application Saver
+    # Uses the request's DB session passed in through state
     graph.add_node(
         "application_saver",
-        lambda state: application_saver_agent(state, next(get_db()))
+        graph_node("application_saver", lambda state: application_saver_agent(state, state["db"]))
     )
     
     # -------------------- Conditional Logic --------------------
@@ -101,6 +115,21 @@ def build_careerpilot_graph():
         # This prevents running fit_score/cover_letter on nothing.
         return "end_search"
 
+    def cover_letter_mode(state):
+        # Serial (default): the cover letter waits for improved_resume.
+        # Parallel: it is written from the original resume, alongside the improver.
+        return bool(state.get("parallel_cover_letter"))
+
+    def fit_score_fanout(state):
+        if cover_letter_mode(state):
+            return ["resume_improver", "cover_letter"]
+        return ["resume_improver"]
+
+    def resume_improver_next(state):
+        if cover_letter_mode(state):
+            return END
+        return "cover_letter"
+
     # -------------------- Edges --------------------
     
     graph.set_entry_point("resume_extractor")
@@ -151,10 +180,45 @@ def build_careerpilot_graph():
     )
 
     # Deep Analysis Pipeline (Only runs if job_id is present)
-    graph.add_edge("jd_analyzer", "fit_score")
-    graph.add_edge("fit_score", "resume_improver")
-    graph.add_edge("resume_improver", "cover_letter")
-    graph.add_edge("cover_letter", "application_saver")
+    graph.add_edge("jd_analyzer", "jd_skills")
+    graph.add_edge("jd_analyzer", "jd_matcher")
+    graph.add_edge(["jd_skills", "jd_matcher"], "fit_score")
+
+    graph.add_conditional_edges(
+        "fit_score",
+        fit_score_fanout,
+        ["resume_improver", "cover_letter"]
+    )
+    graph.add_conditional_edges(
+        "resume_improver",
+        resume_improver_next,
+        {"cover_letter": "cover_letter", END: END}
+    )
+
+    # Join fires once both have finished (in either mode)
+    graph.add_edge(["resume_improver", "cover_letter"], "analysis_join")
+    graph.add_edge("analysis_join", "application_saver")
     graph.add_edge("application_saver", END)
 
     return graph.compile()
+
+
+# ==========================================================
+# Compiled graph (built once per process)
+# ==========================================================
+_compiled_graph = None
+_compiled_graph_lock = threading.Lock()
+
+
+def get_careerpilot_graph():
+    """
+    Returns the process-wide compiled graph. It holds no per-request data:
+    DB session, user and API keys all travel in the invocation state.
+    """
+    global _compiled_graph
+    with _compiled_graph_lock:
+        if _compiled_graph is None:
+            start = time.perf_counter()
+            _compiled_graph = build_careerpilot_graph()
+            print(f"[Graph] Compiled CareerPilot graph in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return _compiled_graph
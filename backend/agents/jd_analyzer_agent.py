@@ -4,15 +4,23 @@ from sqlalchemy.orm import Session
 from models.job_model import Job
 from services.text_cleaner import TextCleaner
 from services.skill_extractor import SkillExtractor
-from services.embedding import EmbeddingService
+from services.embedding import get_embedding_service
+from services.pdf_reader import PDFReader
+from services.resume_vectors import get_resume_vectors
 
 
-def jd_analyzer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+EMPTY_JD_RESULT = {
+    "job_description": "",
+    "job_skills": [],
+    "job_metadata": {}
+}
+
+
+def jd_loader_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Job Description Analyzer Agent
-    Loads JD from DB using job_id
-    Extracts skills from JD
-    Performs semantic matching (JD → resume_chunks)
+    Loads the JD (manual text or job_id from DB) and cleans it.
+    Skill extraction and semantic matching run as separate nodes on the
+    cleaned text so they can execute concurrently.
     """
 
     # ----------------------------------------
@@ -26,11 +34,7 @@ def jd_analyzer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     else:
         job_id = state.get("job_id")
         if not job_id:
-            return {
-                "job_description": "",
-                "job_skills": [],
-                "job_metadata": {}
-            }
+            return dict(EMPTY_JD_RESULT, job_description_clean="")
             
         # ----------------------------------------
         # Get JD from database
@@ -38,11 +42,7 @@ def jd_analyzer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         job = db.query(Job).filter(Job.id == job_id).first()
     
         if not job:
-            return {
-                "job_description": "",
-                "job_skills": [],
-                "job_metadata": {}
-            }
+            return dict(EMPTY_JD_RESULT, job_description_clean="")
     
         jd_text = job.description
 
@@ -51,47 +51,87 @@ def jd_analyzer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     # ----------------------------------------
     cleaned_jd = TextCleaner.clean_text(jd_text)
 
-    # ----------------------------------------
-    # Extract Skills from JD
-    # ----------------------------------------
+    return {
+        "job_description": jd_text,
+        "job_description_clean": cleaned_jd
+    }
+
+
+def jd_skills_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extracts skills from the cleaned JD.
+    """
+    cleaned_jd = state.get("job_description_clean", "")
+    if not cleaned_jd:
+        return {"job_skills": []}
+
     extractor = SkillExtractor()
     job_skills, _ = extractor.extract_skills(cleaned_jd)
 
+    return {"job_skills": job_skills}
+
+
+def jd_matcher_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Semantic matching of the cleaned JD against resume chunks.
+    """
+    cleaned_jd = state.get("job_description_clean", "")
+    if not cleaned_jd:
+        return {"job_metadata": {}}
+
     # ----------------------------------------
     # Semantic Matching JD ⟶ Resume Chunks
+    # Scored in memory against this resume's chunk matrix only (never
+    # other users' resumes in the shared collection).
     # ----------------------------------------
-    embedder = EmbeddingService(collection_name="resume_chunks")
-
-    raw_results = embedder.vectorstore.similarity_search_with_score(
-        cleaned_jd,
-        k=5
-    )
+    resume_id = state.get("resume_id")
+    if not resume_id:
+        print("[JDMatcher] No resume_id in state, skipping semantic matching")
+        return {"job_metadata": {}}
 
-    top_chunks = []
-    sources = []
-    scores = []
+    embedder = get_embedding_service(collection_name="resume_chunks")
+    resume_vectors = get_resume_vectors()
 
-    for doc, dist in raw_results:
-        sim = 1 / (1 + dist)
-        top_chunks.append(doc.page_content)
-        sources.append(doc.metadata)
-        scores.append(round(sim, 4))
+    matches = resume_vectors.match(resume_id, embedder, [cleaned_jd], k=5)
 
-    avg_score = round(sum(scores) / len(scores), 4) if scores else 0.0
+    # Resumes passed as text (not extracted from the PDF in this run) may
+    # have no stored chunks yet: index them once, then match again
+    if matches is None and state.get("resume_text"):
+        chunks = PDFReader().chunk_text(state["resume_text"])
+        embedder.add_chunks(resume_id=resume_id, chunks=chunks)
+        resume_vectors.put(resume_id, chunks, embedder.model.embed_documents(chunks))
+        print(f"[JDMatcher] Indexed {len(chunks)} chunks for resume {resume_id}")
+        matches = resume_vectors.match(resume_id, embedder, [cleaned_jd], k=5)
 
     # ----------------------------------------
     # Build Metadata
     # ----------------------------------------
-    job_metadata = {
-        "top_matching_chunks": top_chunks,
-        "chunk_sources": sources,
-        "semantic_scores": scores,
-        "avg_semantic_score": avg_score
+    job_metadata = matches[0] if matches else {
+        "top_matching_chunks": [],
+        "chunk_sources": [],
+        "semantic_scores": [],
+        "avg_semantic_score": 0.0
     }
 
+    return {"job_metadata": job_metadata}
+
+
+def jd_analyzer_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Job Description Analyzer Agent
+    Loads JD from DB using job_id
+    Extracts skills from JD
+    Performs semantic matching (JD → resume_chunks)
+
+    Sequential composition of the loader / skills / matcher nodes above.
+    """
+    result = jd_loader_agent(state)
+    if not result.get("job_description_clean"):
+        return dict(EMPTY_JD_RESULT)
+
+    step_state = {**state, **result}
     return {
-        "job_description": jd_text,
-        "job_skills": job_skills,
-        "job_metadata": job_metadata
+        "job_description": result["job_description"],
+        **jd_skills_agent(step_state),
+        **jd_matcher_agent(step_state)
     }
-
@@ -1,106 +1,168 @@
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session, Query
+import os
 
 from models.job_model import Job
-from services.tfidf_search import TFIDFSearch
-from services.embedding import EmbeddingService
+from services.tfidf_search import get_job_index
+from services.fulltext_search import PostgresJobSearch
+from services.embedding import get_embedding_service
+from services.vector_index import get_job_vector_index
+from services.rank_fusion import fuse, SEARCH_CANDIDATE_POOL
 from services.text_cleaner import TextCleaner
 
 
-def job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+# Job columns that can narrow the candidate set before ranking
+FILTERABLE_FIELDS = ("location", "source", "employment_type")
+
+# Description characters returned with each ranked job (full text: GET /jobs/{id})
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "500"))
+
+# Keyword retriever: tfidf (in-process index) or postgres (full-text index,
+# PostgreSQL only; falls back to tfidf elsewhere)
+SEARCH_KEYWORD_BACKEND = os.getenv("SEARCH_KEYWORD_BACKEND", "tfidf").lower()
+
+
+def apply_job_filters(query: Query, filters: Optional[Dict[str, str]]) -> Query:
     """
-    Multi-strategy job search:
-    1. Keyword search (TF-IDF)
-    2. Semantic search (Chroma)
-    3. Hybrid fusion ranking
+    Case-insensitive filters on Job columns.
+    Location is a substring match; source / employment_type are exact.
+    User input is matched literally (% and _ are not wildcards).
     """
+    for field, value in (filters or {}).items():
+        if field not in FILTERABLE_FIELDS or not value:
+            continue
 
-    # -----------------------------------------
-    # Load query + DB session
-    # -----------------------------------------
-    query = state.get("search_query", "")
-    if not query:
-        raise ValueError("search_query missing in state")
+        column = getattr(Job, field)
+        if field == "location":
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(column.ilike(f"%{escaped}%", escape="\\"))
+        else:
+            query = query.filter(func.lower(column) == value.lower())
 
-    db: Session = state["db"]
-    cleaned_query = TextCleaner.clean_for_embeddings(query)
+    return query
 
-    # -----------------------------------------
-    # Load jobs from DB
-    # -----------------------------------------
-    jobs = db.query(Job).all()
-    if not jobs:
-        return {"recommended_jobs": []}
-
-    job_dicts = [
-        {
-            "id": job.id,
-            "title": job.title,
-            "company": job.company,
-            "location": job.location,
-            "description": job.description,
-            "source": job.source
-        }
-        for job in jobs
-    ]
+
+def rank_jobs(
+    db: Session,
+    queries: List[str],
+    job_filters: Optional[Dict[str, str]] = None,
+    top_k: int = 10,
+    google_api_key: str = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    Hybrid-rank jobs for each query. Keyword scores for all queries come from
+    one sparse product on the shared TF-IDF index (or one full-text query,
+    see SEARCH_KEYWORD_BACKEND), and semantic scores from one
+    batched embedding call + one vector index query (Chroma by default).
+    Each retriever contributes a pool of SEARCH_CANDIDATE_POOL candidates,
+    which are fused (SEARCH_FUSION) without visiting the rest of the corpus;
+    only the fused top_k jobs are loaded from the DB, with the description
+    cut to a SEARCH_SNIPPET_CHARS snippet.
+    Returns one ranked list per query (same order as `queries`).
+    """
 
     # -----------------------------------------
-    # TF-IDF keyword search
+    # Narrow the candidate set by filters (ids only)
     # -----------------------------------------
-    tfidf = TFIDFSearch()
-    tfidf.index_jobs(job_dicts)
-
-    keyword_results = tfidf.search(query, top_k=10)
-    keyword_scores = {r["job_id"]: r["score"] for r in keyword_results}
+    candidate_ids = None
+    if job_filters:
+        candidate_ids = [jid for (jid,) in apply_job_filters(db.query(Job.id), job_filters).all()]
+        if not candidate_ids:
+            return [[] for _ in queries]
 
-    # Normalize
-    if keyword_scores:
-        mk = max(keyword_scores.values())
-        if mk > 0:
-            keyword_scores = {k: v / mk for k, v in keyword_scores.items()}
+    pool = max(top_k, SEARCH_CANDIDATE_POOL)
 
     # -----------------------------------------
-    # Semantic Search (Chroma)
+    # Keyword search: Postgres full-text index, or the shared,
+    # incrementally updated TF-IDF index
     # -----------------------------------------
-    embedder = EmbeddingService(collection_name="job_chunks")
+    if SEARCH_KEYWORD_BACKEND == "postgres" and db.get_bind().dialect.name == "postgresql":
+        keyword_batch = PostgresJobSearch(db).search_batch(queries, top_k=pool, candidate_ids=candidate_ids)
+    else:
+        tfidf = get_job_index(db)
 
-    results = embedder.vectorstore.similarity_search_with_score(cleaned_query, k=10)
+        if len(tfidf):
+            keyword_batch = tfidf.search_batch(queries, top_k=pool, candidate_ids=candidate_ids)
+        else:
+            keyword_batch = [[] for _ in queries]
 
-    semantic_scores = {}
-
-    for doc, dist in results:
-        job_id = doc.metadata.get("job_id")
-        if not job_id:
-            continue
-
-        sim = 1 / (1 + dist)
-        semantic_scores[job_id] = sim
+    # -----------------------------------------
+    # Semantic Search (job-level scores from the configured vector index)
+    # -----------------------------------------
+    embedder = get_embedding_service(api_key=google_api_key, collection_name="job_chunks")
 
-    # Normalize
-    if semantic_scores:
-        ms = max(semantic_scores.values())
-        if ms > 0:
-            semantic_scores = {k: v / ms for k, v in semantic_scores.items()}
+    cleaned_queries = [TextCleaner.clean_for_embeddings(q) for q in queries]
+    semantic_batch = get_job_vector_index().search(
+        embedder, cleaned_queries, k=pool, candidate_ids=candidate_ids
+    )
 
     # -----------------------------------------
-    # Hybrid Fusion Score
+    # Hybrid Fusion over the candidate pools
     # -----------------------------------------
-    combined = {}
-    for job in job_dicts:
-        jid = job["id"]
-        combined[jid] = 0.5 * keyword_scores.get(jid, 0.0) + \
-                        0.5 * semantic_scores.get(jid, 0.0)
+    fused_batch = [
+        fuse(
+            [[(r["job_id"], r["score"]) for r in keyword_results], semantic_results],
+            top_k=top_k
+        )
+        for keyword_results, semantic_results in zip(keyword_batch, semantic_batch)
+    ]
 
     # -----------------------------------------
-    # Final Ranking
+    # Load a light projection of the jobs that made some top_k
     # -----------------------------------------
-    ranked = sorted(job_dicts, key=lambda j: combined.get(j["id"], 0), reverse=True)[:10]
+    ranked_ids = {jid for fused in fused_batch for jid, _ in fused}
+    job_dicts = {}
+    if ranked_ids:
+        rows = db.query(
+            Job.id,
+            Job.title,
+            Job.company,
+            Job.location,
+            Job.source,
+            func.substr(Job.description, 1, SEARCH_SNIPPET_CHARS).label("description")
+        ).filter(Job.id.in_(ranked_ids)).all()
+        job_dicts = {row.id: dict(row._mapping) for row in rows}
+
+    # Ids still in an index after their row was deleted are dropped here
+    return [
+        [
+            {**job_dicts[jid], "score": round(score, 4)}
+            for jid, score in fused if jid in job_dicts
+        ]
+        for fused in fused_batch
+    ]
 
-    for job in ranked:
-        job["score"] = round(combined.get(job["id"], 0), 4)
 
-    return {"recommended_jobs": ranked}
+def job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Multi-strategy job search:
+    1. Keyword search (TF-IDF)
+    2. Semantic search (job-level, via the vector index)
+    3. Hybrid fusion ranking
+
+    If state["search_queries"] holds several queries they are ranked together
+    and returned as recommended_jobs_batch (one list per query).
+    """
+
+    # -----------------------------------------
+    # Load query + DB session
+    # -----------------------------------------
+    queries = state.get("search_queries")
+    query = state.get("search_query", "")
+    if not queries and not query:
+        raise ValueError("search_query missing in state")
 
+    db: Session = state["db"]
 
+    results = rank_jobs(
+        db,
+        queries or [query],
+        job_filters=state.get("job_filters"),
+        google_api_key=state.get("google_api_key")
+    )
 
+    if queries:
+        return {"recommended_jobs_batch": results}
 
+    return {"recommended_jobs": results[0]}
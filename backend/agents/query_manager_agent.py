@@ -1,55 +1,18 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import os
 import json
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableConfig
+from services.llm_factory import get_llm_chain
 from pydantic import BaseModel, Field
 
 class SearchQuery(BaseModel):
     query: str = Field(description="The optimized boolean search query")
     explanation: str = Field(description="Brief explanation of why this query was constructed")
 
-def query_manager_agent(state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Query Manager Agent:
-    Uses LLM to construct a high-quality, strict boolean search query 
-    based on the resume category and extracted skills.
-    
-    Inputs: state["resume_category"], state["extracted_skills"]
-    Outputs: updates state["search_query"]
-    """
-    
-    print("--- QUERY MANAGER AGENT ---")
-    
-    resume_category = state.get("resume_category", "")
-    extracted_skills = state.get("extracted_skills", [])
-    
-    # If we don't have a category, fall back to a generic query or existing one
-    if not resume_category:
-        print("No resume category found. Skipping query optimization.")
-        return {}
-
-    # Setup LLM
-    api_key = state.get("google_api_key") or os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        print("No Google API Key. Skipping query optimization.")
-        return {}
-        
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.0,
-        google_api_key=api_key,
-        convert_system_message_to_human=True
-    )
-    
-    parser = PydanticOutputParser(pydantic_object=SearchQuery)
-    
-    # Top 5 skills to avoid query bloat
-    top_skills = extracted_skills[:5] if extracted_skills else []
-    
-    prompt_template = PromptTemplate(
-        template="""
+QUERY_MANAGER_PROMPT_VERSION = "1"
+QUERY_MANAGER_TEMPLATE = """
         You are an expert technical recruiter and search query engineer.
         Your task is to generate a STRICT boolean search query to find relevant job openings for a candidate.
         
@@ -73,18 +36,78 @@ def query_manager_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         {format_instructions}
         
         Generate the query now.
-        """,
-        input_variables=["category", "skills"],
-        partial_variables={"format_instructions": parser.get_format_instructions()}
+        """
+
+
+QUERY_PARSER = PydanticOutputParser(pydantic_object=SearchQuery)
+
+QUERY_MANAGER_PROMPT = PromptTemplate(
+    template=QUERY_MANAGER_TEMPLATE,
+    input_variables=["category", "skills"],
+    partial_variables={"format_instructions": QUERY_PARSER.get_format_instructions()}
+)
+
+
+def _prepare_query_manager(state: Dict[str, Any]):
+    """
+    Returns (chain, inputs, resume_category), or None when optimization is skipped.
+    """
+    resume_category = state.get("resume_category", "")
+    extracted_skills = state.get("extracted_skills", [])
+    
+    # If we don't have a category, fall back to a generic query or existing one
+    if not resume_category:
+        print("No resume category found. Skipping query optimization.")
+        return None
+
+    # Setup LLM
+    api_key = state.get("google_api_key") or os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        print("No Google API Key. Skipping query optimization.")
+        return None
+        
+    chain = get_llm_chain(
+        "query_manager", QUERY_MANAGER_PROMPT, QUERY_PARSER, api_key,
+        prompt_version=QUERY_MANAGER_PROMPT_VERSION,
+        temperature=0.0,
+        convert_system_message_to_human=True
     )
     
-    chain = prompt_template | llm | parser
+    # Top 5 skills to avoid query bloat
+    top_skills = extracted_skills[:5] if extracted_skills else []
+    
+    inputs = {
+        "category": resume_category,
+        "skills": ", ".join(top_skills)
+    }
+    return chain, inputs, resume_category
+
+
+def _fallback_query(resume_category: str) -> Dict[str, Any]:
+    # Fallback to simple category + jobs
+    fallback = f'{resume_category} "job openings" -course -tutorial'
+    return {"search_query": fallback}
+
+
+def query_manager_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Query Manager Agent:
+    Uses LLM to construct a high-quality, strict boolean search query 
+    based on the resume category and extracted skills.
+    
+    Inputs: state["resume_category"], state["extracted_skills"]
+    Outputs: updates state["search_query"]
+    """
+    
+    print("--- QUERY MANAGER AGENT ---")
+
+    prepared = _prepare_query_manager(state)
+    if prepared is None:
+        return {}
+    chain, inputs, resume_category = prepared
     
     try:
-        result = chain.invoke({
-            "category": resume_category,
-            "skills": ", ".join(top_skills)
-        })
+        result = chain.invoke(inputs)
         
         print(f"Generated Query: {result.query}")
         
@@ -94,6 +117,28 @@ def query_manager_agent(state: Dict[str, Any]) -> Dict[str, Any]:
         
     except Exception as e:
         print(f"Error in Query Manager: {e}")
-        # Fallback to simple category + jobs
-        fallback = f'{resume_category} "job openings" -course -tutorial'
-        return {"search_query": fallback}
+        return _fallback_query(resume_category)
+
+
+async def aquery_manager_agent(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Async variant of query_manager_agent."""
+
+    print("--- QUERY MANAGER AGENT ---")
+
+    prepared = _prepare_query_manager(state)
+    if prepared is None:
+        return {}
+    chain, inputs, resume_category = prepared
+
+    try:
+        result = await chain.ainvoke(inputs, config=config)
+
+        print(f"Generated Query: {result.query}")
+
+        return {
+            "search_query": result.query
+        }
+
+    except Exception as e:
+        print(f"Error in Query Manager: {e}")
+        return _fallback_query(resume_category)
@@ -3,7 +3,8 @@
 
 import os
 from services.pdf_reader import PDFReader
-from services.embedding import EmbeddingService
+from services.embedding import get_embedding_service
+from services.resume_vectors import get_resume_vectors
 
 def resume_extractor_agent(state):
 
@@ -37,8 +38,10 @@ def resume_extractor_agent(state):
     chunks = reader.extract_chunks(file_path)
     full_text = "\n".join(chunks)
 
-    embedder = EmbeddingService(collection_name="resume_chunks")
+    embedder = get_embedding_service(collection_name="resume_chunks")
     embedder.add_chunks(resume_id=resume_id, chunks=chunks)
+    # Keep the chunk matrix in memory for JD matching (vectors come from the embedding cache)
+    get_resume_vectors().put(resume_id, chunks, embedder.model.embed_documents(chunks))
 
     # Predict Field
     from services.resume_field_predictor import ResumeFieldPredictor
@@ -1,64 +1,26 @@
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Dict, Any, Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 import os
 
 
 from services.resume_formatter import ResumeFormatter
-
-
-def resume_improver_agent(state: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Resume Improver Agent (Gemini)
-    ------------------------------
-    Uses Gemini to rewrite / polish the resume so it matches the JD better,
-    while following strict rules:
-        - No fake experience
-        - No invented job titles
-        - No fake achievements or certifications
-        - Only rephrasing, restructuring, clarifying
-        - Add missing skills ONLY if supported by resume context
-        - ATS-friendly, clean formatting
-    """
-
-    resume_text = state.get("resume_text", "")
-    jd_text = state.get("job_description", "")
-    missing_skills = state.get("missing_skills", [])
-    fit_explanation = state.get("fit_explanation", "")
-
-    if not resume_text:
-        return {"improved_resume": resume_text}
-
-    # -----------------------------------------
-    # Gemini model
-    # -----------------------------------------
-    # -----------------------------------------
-    # Gemini model
-    # -----------------------------------------
-    google_api_key = state.get("google_api_key")
-    if not google_api_key:
-        raise ValueError("Google API Key not found in state")
-
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.15,
-        max_output_tokens=1500,
-        response_mime_type="text/plain",     # We want raw text
-        google_api_key=google_api_key
-    )
-
-    # -----------------------------------------
-    # Prompt Template
-    # -----------------------------------------
-    prompt = PromptTemplate(
-        input_variables=[
-            "resume_text",
-            "jd_text",
-            "missing_skills",
-            "fit_explanation",
-        ],
-        template="""
+from services.llm_factory import get_llm_chain
+
+
+# -----------------------------------------
+# Prompt Template
+# -----------------------------------------
+RESUME_IMPROVER_PROMPT_VERSION = "1"
+RESUME_IMPROVER_PROMPT = PromptTemplate(
+    input_variables=[
+        "resume_text",
+        "jd_text",
+        "missing_skills",
+        "fit_explanation",
+    ],
+    template="""
 You are an expert Resume Writer and Career Coach. Your task is to rewrite the candidate's resume to be **ATS-Optimized** and **highly relevant** to the target Job Description, while adhering to **STRICT TRUTHFULNESS**.
 
 INPUT DATA:
@@ -90,16 +52,65 @@ Produce a significantly improved version of the resume that utilizes the exact l
 OUTPUT:
 Produce ONLY the improved resume text.
 """
-    )
+)
 
-    chain = prompt | llm | StrOutputParser()
 
-    improved_raw = chain.invoke({
+def _prepare_resume_improver(state: Dict[str, Any]):
+    """
+    Returns (chain, inputs), or None when there is no resume to improve.
+    """
+    resume_text = state.get("resume_text", "")
+    jd_text = state.get("job_description", "")
+    missing_skills = state.get("missing_skills", [])
+    fit_explanation = state.get("fit_explanation", "")
+
+    if not resume_text:
+        return None
+
+    # -----------------------------------------
+    # Gemini model
+    # -----------------------------------------
+    google_api_key = state.get("google_api_key")
+    if not google_api_key:
+        raise ValueError("Google API Key not found in state")
+
+    chain = get_llm_chain(
+        "resume_improver", RESUME_IMPROVER_PROMPT, StrOutputParser(), google_api_key,
+        prompt_version=RESUME_IMPROVER_PROMPT_VERSION,
+        temperature=0.15,
+        max_output_tokens=1500,
+        response_mime_type="text/plain"     # We want raw text
+    )
+
+    inputs = {
         "resume_text": resume_text,
         "jd_text": jd_text,
         "missing_skills": missing_skills,
         "fit_explanation": fit_explanation,
-    })
+    }
+
+    return chain, inputs
+
+
+def resume_improver_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resume Improver Agent (Gemini)
+    ------------------------------
+    Uses Gemini to rewrite / polish the resume so it matches the JD better,
+    while following strict rules:
+        - No fake experience
+        - No invented job titles
+        - No fake achievements or certifications
+        - Only rephrasing, restructuring, clarifying
+        - Add missing skills ONLY if supported by resume context
+        - ATS-friendly, clean formatting
+    """
+    prepared = _prepare_resume_improver(state)
+    if prepared is None:
+        return {"improved_resume": state.get("resume_text", "")}
+
+    chain, inputs = prepared
+    improved_raw = chain.invoke(inputs)
 
     # -----------------------------------------
     # Format + clean output
@@ -108,3 +119,14 @@ Produce ONLY the improved resume text.
 
     return {"improved_resume": improved_resume}
 
+
+async def aresume_improver_agent(state: Dict[str, Any], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """Async variant of resume_improver_agent (non-blocking Gemini call)."""
+    prepared = _prepare_resume_improver(state)
+    if prepared is None:
+        return {"improved_resume": state.get("resume_text", "")}
+
+    chain, inputs = prepared
+    improved_raw = await chain.ainvoke(inputs, config=config)
+
+    return {"improved_resume": ResumeFormatter.format_resume(improved_raw)}
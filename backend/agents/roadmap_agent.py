@@ -1,11 +1,13 @@
 # backend/agents/roadmap_agent.py
 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from services.llm_factory import get_llm_chain
 from pydantic import BaseModel, Field
 from typing import List
 
+ROADMAP_PROMPT_VERSION = "1"
+
 class RoadmapStep(BaseModel):
     step_number: int = Field(description="The sequence number of the step")
     title: str = Field(description="Title of the milestone or step")
@@ -16,21 +18,10 @@ class RoadmapStep(BaseModel):
 class RoadmapOutput(BaseModel):
     roadmap: List[RoadmapStep] = Field(description="List of steps in the roadmap")
 
-def generate_roadmap(resume_text: str, job_description: str, google_api_key: str):
-    """
-    Generates a structured career roadmap based on the gap between resume and JD.
-    """
-    
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.3,
-        google_api_key=google_api_key
-    )
-
-    parser = JsonOutputParser(pydantic_object=RoadmapOutput)
+ROADMAP_PARSER = JsonOutputParser(pydantic_object=RoadmapOutput)
 
-    prompt = PromptTemplate(
-        template="""
+ROADMAP_PROMPT = PromptTemplate(
+    template="""
         You are an expert career coach and technical mentor.
         Your task is to create a detailed, step-by-step learning roadmap for a candidate to bridge the gap between their current skills (Resume) and the target job requirements (Job Description).
 
@@ -51,11 +42,21 @@ def generate_roadmap(resume_text: str, job_description: str, google_api_key: str
 
         {format_instructions}
         """,
-        input_variables=["resume_text", "job_description"],
-        partial_variables={"format_instructions": parser.get_format_instructions()}
-    )
+    input_variables=["resume_text", "job_description"],
+    partial_variables={"format_instructions": ROADMAP_PARSER.get_format_instructions()}
+)
 
-    chain = prompt | llm | parser
+def generate_roadmap(resume_text: str, job_description: str, google_api_key: str):
+    """
+    Generates a structured career roadmap based on the gap between resume and JD.
+    """
+    
+    chain = get_llm_chain(
+        "roadmap", ROADMAP_PROMPT, ROADMAP_PARSER, google_api_key,
+        prompt_version=ROADMAP_PROMPT_VERSION,
+        temperature=0.3,
+        cache=True
+    )
 
     try:
         result = chain.invoke({
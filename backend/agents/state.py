@@ -19,6 +19,8 @@ class CareerPilotState(TypedDict, total=False):
     resume_id: str             # PDF path OR resume table ID
     job_id: str                # Selected job ID (JD source)
     search_query: Optional[str]  # For job search pipeline
+    search_queries: Optional[List[str]]  # Batch job search (one ranking per query)
+    job_filters: Optional[Dict[str, str]]  # {location, source, employment_type}
     use_serpapi: Optional[bool]
     use_tavily: Optional[bool]
     google_api_key: Optional[str] # User provided API key
@@ -43,6 +45,7 @@ class CareerPilotState(TypedDict, total=False):
     # ----------------------------
     manual_jd_text: Optional[str] # For manual JD analysis flow
     job_description: str
+    job_description_clean: str    # Cleaned JD shared by jd_skills / jd_matcher
     job_skills: List[str]
 
     job_metadata: Dict[str, Any]  # {
@@ -56,6 +59,7 @@ class CareerPilotState(TypedDict, total=False):
     # Job Search Results
     # ----------------------------
     recommended_jobs: Optional[List[Dict[str, Any]]]  # List of job recommendations from search
+    recommended_jobs_batch: Optional[List[List[Dict[str, Any]]]]  # Per-query results for search_queries
     serpapi_error: Optional[str]
     serpapi_warning: Optional[str]
     tavily_error: Optional[str]
@@ -72,6 +76,7 @@ class CareerPilotState(TypedDict, total=False):
     # ----------------------------
     # AI-Generated Content
     # ----------------------------
+    parallel_cover_letter: Optional[bool]  # Write cover letter from the original resume, concurrently with the improver
     improved_resume: str
     cover_letter: str
     ats_score: float
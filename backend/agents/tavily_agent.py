@@ -1,20 +1,16 @@
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
-from uuid import uuid4
+import asyncio
 import json
-from tavily import TavilyClient
+from tavily import TavilyClient, AsyncTavilyClient
 
-from models.job_model import Job
 from services.job_ingestor import JobIngestor
 
-def tavily_job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+
+def _prepare_tavily(state: Dict[str, Any]):
     """
-    Tavily job search agent:
-    1. Uses Tavily API to search for jobs based on search_query
-    2. Stores found jobs in database
-    3. Returns recommended jobs similar to job_search_agent
+    Returns (query, tavily_key, None), or (None, None, result) when the search can't run.
     """
-    
     raw_query = state.get("search_query", "")
     if not raw_query:
         raise ValueError("search_query missing in state")
@@ -26,96 +22,125 @@ def tavily_job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
     else:
         query = f'{raw_query} hiring now -course -tutorial -blog -article -news'
     
-    db: Session = state["db"]
     tavily_key = state.get("tavily_api_key")
     
     if not tavily_key:
-        return {
+        return None, None, {
             "recommended_jobs": [],
             "tavily_error": "TAVILY_API_KEY not provided."
         }
+
+    print(f"[Tavily] Searching for: {query}")
+    return query, tavily_key, None
+
+
+def _error_result(e: Exception) -> Dict[str, Any]:
+    import traceback
+    print(traceback.format_exc())
+    return {
+        "recommended_jobs": [],
+        "tavily_error": f"Tavily search failed: {str(e)}"
+    }
+
+
+def _process_tavily_results(response: Dict[str, Any], query: str, db: Session) -> Dict[str, Any]:
+    """
+    Stores new jobs from a Tavily response and returns the agent result.
+    Blocking (DB + vector store); the async agent runs it in a worker thread.
+    """
+    results = response.get("results", [])
+    if not results:
+         return {
+            "recommended_jobs": [],
+            "tavily_warning": f"No jobs found for '{query}' via Tavily."
+        }
+
+    print(f"[Tavily] Found {len(results)} results")
+
+    jobs = []
+    for idx, result in enumerate(results):
+        try:
+            title = result.get("title", "Unknown Job")
+            url = result.get("url", "")
+            content = result.get("content", "")
+
+            # Tavily returns generic content, so we treat it as description
+            # We might not get company/location explicitly, so we leave them generic or try to extract
+            jobs.append({
+                "title": title,
+                "company": "Unknown Company", # Tavily doesn't always separate this
+                "location": "Unknown Location",
+                "description": content[:5000], # Limit length
+                "url": url,
+                "source": "Tavily", # Mark source
+                "score": result.get("score", 1.0)
+            })
+
+        except Exception as e:
+            print(f"Warning: Failed to process Tavily result {idx}: {str(e)}")
+            continue
+
+    # Store all results at once (dedupe on url, one commit, batched embedding)
+    stored = JobIngestor().ingest_many(db, jobs, dedupe_on=("url",))
+
+    recommended_jobs = [
+        {
+            "id": job_id,
+            "title": job["title"],
+            "company": job["company"],
+            "location": job["location"],
+            "description": job["description"][:500],
+            "score": job["score"],
+            "url": job["url"],
+            "source": "Tavily"
+        }
+        for job_id, job in zip(stored["job_ids"], jobs)
+    ]
+
+    return {"recommended_jobs": recommended_jobs}
+
+
+def tavily_job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Tavily job search agent:
+    1. Uses Tavily API to search for jobs based on search_query
+    2. Stores found jobs in database
+    3. Returns recommended jobs similar to job_search_agent
+    """
+    query, tavily_key, early = _prepare_tavily(state)
+    if early is not None:
+        return early
+
+    db: Session = state["db"]
     
     try:
-        print(f"[Tavily] Searching for: {query}")
         client = TavilyClient(api_key=tavily_key)
         
         # Tavily search
         response = client.search(query, search_depth="advanced", max_results=10)
         
-        results = response.get("results", [])
-        if not results:
-             return {
-                "recommended_jobs": [],
-                "tavily_warning": f"No jobs found for '{query}' via Tavily."
-            }
-
-        print(f"[Tavily] Found {len(results)} results")
-        
-        recommended_jobs = []
-        job_ingestor = JobIngestor()
-        
-        for idx, result in enumerate(results):
-            try:
-                job_id = str(uuid4())
-                title = result.get("title", "Unknown Job")
-                url = result.get("url", "")
-                content = result.get("content", "")
-                
-                # Tavily returns generic content, so we treat it as description
-                # We might not get company/location explicitly, so we leave them generic or try to extract
-                company = "Unknown Company" # Tavily doesn't always separate this
-                location = "Unknown Location"
-                
-                # Check if job already exists (by url)
-                existing_job = db.query(Job).filter(Job.url == url).first()
-
-                if existing_job:
-                    print(f"[Tavily] Job already exists: {title} (ID: {existing_job.id})")
-                    job_id = existing_job.id
-                else:
-                    # Create job record
-                    job_record = Job(
-                        id=job_id,
-                        title=title,
-                        company=company, 
-                        location=location,
-                        description=content[:5000], # Limit length
-                        url=url,
-                        source="Tavily" # Mark source
-                    )
-                    
-                    db.add(job_record)
-                    db.commit()
-                    db.refresh(job_record)
-                    
-                    # Ingest
-                    if content:
-                        try:
-                            job_ingestor.ingest_job(job_id, content)
-                        except Exception as e:
-                            print(f"Warning: Failed to ingest job {job_id}: {str(e)}")
-                
-                recommended_jobs.append({
-                    "id": job_id,
-                    "title": title,
-                    "company": company,
-                    "location": location,
-                    "description": content[:500],
-                    "score": result.get("score", 1.0),
-                    "url": url,
-                    "source": "Tavily"
-                })
-                
-            except Exception as e:
-                print(f"Warning: Failed to process Tavily result {idx}: {str(e)}")
-                continue
-        
-        return {"recommended_jobs": recommended_jobs}
+        return _process_tavily_results(response, query, db)
 
     except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        return {
-            "recommended_jobs": [],
-            "tavily_error": f"Tavily search failed: {str(e)}"
-        }
+        return _error_result(e)
+
+
+async def atavily_job_search_agent(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async variant of tavily_job_search_agent (AsyncTavilyClient for the
+    search, DB / ingestion work in a worker thread).
+    """
+    query, tavily_key, early = _prepare_tavily(state)
+    if early is not None:
+        return early
+
+    db: Session = state["db"]
+
+    try:
+        client = AsyncTavilyClient(api_key=tavily_key)
+        response = await client.search(query, search_depth="advanced", max_results=10)
+
+        return await asyncio.to_thread(_process_tavily_results, response, query, db)
+
+    except Exception as e:
+        return _error_result(e)
@@ -1,4 +1,6 @@
 import os
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -12,30 +14,103 @@ from routers.auth_router import router as auth_router
 from routers.settings_router import router as settings_router
 from routers.roadmap_router import router as roadmap_router
 from routers.manual_analysis_router import router as manual_analysis_router
+from routers.metrics_router import router as metrics_router
 
 from models.database import Base, engine
 from models.user_model import User # Import to ensure table creation
+from models.migrations import run_migrations
+from services.metrics import instrument_engine
 
 # ==========================================================
 # 1. Create database tables
 # ==========================================================
 Base.metadata.create_all(bind=engine)
 
+# Time every DB query (exposed on /metrics)
+instrument_engine(engine)
 
 
 
+
+# ==========================================================
+# 2. Startup / shutdown
+# ==========================================================
+def warm_up():
+    """
+    Build shared, request-independent objects once so the first requests
+    don't pay for them, and report how long each step took.
+    """
+    from agents.graph import get_careerpilot_graph
+    from services.skill_matcher import get_skill_matcher
+    from services.tfidf_search import get_job_index
+
+    steps = [
+        ("careerpilot_graph", get_careerpilot_graph),
+        ("skill_matcher", get_skill_matcher),
+        ("job_tfidf_index", get_job_index),
+    ]
+
+    timings = {}
+    total_start = time.perf_counter()
+    for name, build in steps:
+        start = time.perf_counter()
+        try:
+            build()
+        except Exception as e:
+            print(f"[Startup] Warning: {name} warm-up failed: {e}")
+        timings[name] = (time.perf_counter() - start) * 1000
+
+    print("[Startup] Warm-up timings:")
+    for name, ms in timings.items():
+        print(f"[Startup]   {name:<20} {ms:8.1f} ms")
+    print(f"[Startup]   {'total':<20} {(time.perf_counter() - total_start) * 1000:8.1f} ms")
+
+
+def drain_ingestion_queue():
+    """
+    Give queued job embeddings a few seconds to finish before exit.
+    """
+    from services.ingestion_queue import get_ingestion_queue
+
+    queue = get_ingestion_queue()
+    queue.stop(timeout=float(os.getenv("INGEST_SHUTDOWN_TIMEOUT", "10")))
+    print(f"[Shutdown] Ingestion queue: {queue.stats()}")
+
+
+def flush_job_index():
+    """
+    Write TF-IDF index changes still waiting on the debounced save.
+    """
+    from services.tfidf_search import flush_job_index as flush
+
+    flush()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Indexes and other schema changes create_all doesn't apply to existing tables
+    run_migrations(engine)
+    warm_up()
+
+    yield
+
+    drain_ingestion_queue()
+    flush_job_index()
+
+
 # ==========================================================
-# 2. Initialize FastAPI app
+# 3. Initialize FastAPI app
 # ==========================================================
 app = FastAPI(
     title="CareerPilot AI Backend",
     version="1.0.0",
-    description="Agentic Job Search + Resume Improvement System using LangGraph + Gemini"
+    description="Agentic Job Search + Resume Improvement System using LangGraph + Gemini",
+    lifespan=lifespan
 )
 
 
 # ==========================================================
-# 3. CORS settings (adjust for production)
+# 4. CORS settings (adjust for production)
 # ==========================================================
 app.add_middleware(
     CORSMiddleware,
@@ -43,11 +118,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After"],  # /jobs/all pagination cursor
 )
 
 
 # ==========================================================
-# 4. Ensure required folders exist
+# 5. Ensure required folders exist
 # ==========================================================
 def ensure_directories():
     # Get absolute path to backend directory
@@ -67,7 +143,7 @@ ensure_directories()
 
 
 # ==========================================================
-# 5. Register Routers
+# 6. Register Routers
 # ==========================================================
 app.include_router(auth_router)
 app.include_router(settings_router)
@@ -77,10 +153,11 @@ app.include_router(application_router)
 app.include_router(careerpilot_router)
 app.include_router(roadmap_router)
 app.include_router(manual_analysis_router)
+app.include_router(metrics_router)
 
 
 # ==========================================================
-# 6. Root endpoint
+# 7. Root endpoint
 # ==========================================================
 @app.get("/")
 def root():
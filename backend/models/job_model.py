@@ -5,6 +5,11 @@ from sqlalchemy.orm import relationship
 from .database import Base
 
 
+# Full-text document of a job. The GIN index in models/migrations.py is built
+# on this exact expression, so queries must use it verbatim to hit the index.
+JOB_TSVECTOR_SQL = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+
+
 class Job(Base):
     __tablename__ = "jobs"
 
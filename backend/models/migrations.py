@@ -0,0 +1,126 @@
+# backend/models/migrations.py
+
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from .job_model import JOB_TSVECTOR_SQL
+
+
+# pg_advisory_xact_lock key, so concurrent workers don't migrate at once
+MIGRATIONS_LOCK_ID = 7310025
+
+# Rows each job dedupe key must be unique among. Tavily results all share
+# "Unknown Company", so they are keyed by url instead. JobIngestor filters
+# its lookups with the same predicates so they can use these indexes.
+NON_TAVILY_JOBS = "source IS NULL OR source <> 'Tavily'"
+TAVILY_JOBS = "source = 'Tavily' AND url IS NOT NULL"
+
+# (sql, fallback sql run if sql hits existing duplicate rows)
+Step = Tuple[str, Optional[str]]
+
+
+def _index(name: str, table: str, columns: str, where: str = None, unique: bool = False, using: str = None) -> Step:
+    sql = (
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table}"
+        f"{f' USING {using}' if using else ''} ({columns})"
+        f"{f' WHERE {where}' if where else ''}"
+    )
+    if not unique:
+        return sql, None
+
+    # Existing duplicates: keep lookups fast with a plain index of the same name
+    return sql, sql.replace("CREATE UNIQUE INDEX", "CREATE INDEX", 1)
+
+
+class Migration:
+    """
+    One schema version: DDL steps applied in order, inside the runner's
+    transaction. `dialects` limits it to those databases (e.g. GIN indexes).
+    """
+
+    def __init__(self, version: int, description: str, steps: List[Step], dialects: Sequence[str] = None):
+        self.version = version
+        self.description = description
+        self.steps = steps
+        self.dialects = tuple(dialects) if dialects else None
+
+
+# ==========================================================
+# Schema versions (append only; never edit an applied one)
+# ==========================================================
+MIGRATIONS = [
+    Migration(1, "jobs dedupe keys", [
+        _index("uq_jobs_title_company", "jobs", "title, company", where=NON_TAVILY_JOBS, unique=True),
+        _index("uq_jobs_tavily_url", "jobs", "url", where=TAVILY_JOBS, unique=True),
+    ]),
+    Migration(2, "per-user and per-job lookups", [
+        _index("ix_applications_user_created", "applications", "user_id, created_at"),
+        _index("ix_applications_job_id", "applications", "job_id"),
+        _index("ix_applications_resume_id", "applications", "resume_id"),
+        _index("ix_resumes_user_created", "resumes", "user_id, created_at"),
+        _index("ix_roadmaps_user_job", "roadmaps", "user_id, job_id"),
+        _index("ix_roadmaps_job_id", "roadmaps", "job_id"),
+    ]),
+    Migration(3, "jobs full-text search", [
+        _index("ix_jobs_fts", "jobs", JOB_TSVECTOR_SQL, using="GIN"),
+    ], dialects=["postgresql"]),
+]
+
+
+def _apply_step(conn: Connection, sql: str, fallback: Optional[str]):
+    if fallback is None:
+        conn.execute(text(sql))
+        return
+
+    try:
+        with conn.begin_nested():
+            conn.execute(text(sql))
+    except IntegrityError as e:
+        print(f"[Migrations] Warning: existing rows violate a unique index, creating it non-unique: {e.orig}")
+        conn.execute(text(fallback))
+
+
+def run_migrations(engine: Engine, migrations: List[Migration] = None) -> List[int]:
+    """
+    Applies every migration not yet recorded in schema_migrations, in one
+    transaction. Run after Base.metadata.create_all (tables must exist).
+    Returns the versions applied.
+    """
+    migrations = migrations if migrations is not None else MIGRATIONS
+    dialect = engine.dialect.name
+    applied_now = []
+
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATIONS_LOCK_ID})
+
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "description VARCHAR NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in applied:
+                continue
+
+            # Left unrecorded so it still runs once the database supports it
+            if migration.dialects and dialect not in migration.dialects:
+                print(f"[Migrations] Skipping {migration.version} ({migration.description}): needs {', '.join(migration.dialects)}")
+                continue
+
+            for sql, fallback in migration.steps:
+                _apply_step(conn, sql, fallback)
+
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                {"version": migration.version, "description": migration.description}
+            )
+            applied_now.append(migration.version)
+            print(f"[Migrations] Applied {migration.version}: {migration.description}")
+
+    return applied_now
@@ -1,6 +1,6 @@
 # backend/models/schemas.py
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conint
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date
 
@@ -52,6 +52,43 @@ class JobResponseModel(JobCreateModel):
         orm_mode = True
 
 
+class JobListItemModel(BaseModel):
+    """
+    /jobs/all row; only the requested `fields` are present.
+    """
+    id: Optional[str] = None
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    employment_type: Optional[str] = None
+    experience_level: Optional[str] = None
+    skills: Optional[List[str]] = None
+    description: Optional[str] = None
+    salary_range: Optional[str] = None
+    url: Optional[str] = None
+    posted_date: Optional[date] = None
+    source: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Bounds for /jobs/search-batch (each query costs an embedding + a ranking pass)
+MAX_BATCH_QUERIES = 50
+MAX_SEARCH_TOP_K = 100
+
+
+class JobBatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=MAX_BATCH_QUERIES)
+    top_k: Optional[conint(ge=1, le=MAX_SEARCH_TOP_K)] = 10
+    job_filters: Optional[Dict[str, str]] = None  # location / source / employment_type
+    google_api_key: Optional[str] = None
+
+
+class JobBatchSearchResponse(BaseModel):
+    results: List[List[Dict[str, Any]]]  # one ranked list per query
+
+
 # ==========================================================
 # Application Schemas (ATS Scores)
 # ==========================================================
@@ -82,11 +119,14 @@ class CareerPilotRequest(BaseModel):
     resume_id: str                  # path or resume DB ID
     job_id: Optional[str] = None
     search_query: Optional[str] = None
+    job_filters: Optional[Dict[str, str]] = None  # location / source / employment_type
     use_serpapi: Optional[bool] = False  # Flag to use SerpAPI for job search
     use_tavily: Optional[bool] = False   # Flag to use Tavily for job search
     google_api_key: Optional[str] = None
     serpapi_api_key: Optional[str] = None
     tavily_api_key: Optional[str] = None
+    parallel_cover_letter: Optional[bool] = False  # Opt-in: cover letter from original resume, in parallel with the improver
+    include_timings: Optional[bool] = False  # Attach per-stage timings to the response
     
     # Optional intermediate data to skip steps
     resume_text: Optional[str] = None
@@ -130,6 +170,9 @@ class CareerPilotResponse(BaseModel):
     serpapi_error: Optional[str] = None
     serpapi_warning: Optional[str] = None
 
+    # Per-stage timings (only when include_timings was requested)
+    timings: Optional[Dict[str, Any]] = None
+
 
     class Config:
         extra = "allow"  # Allow extra fields that might be in the state
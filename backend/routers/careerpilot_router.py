@@ -1,13 +1,17 @@
 # backend/routers/careerpilot_router.py
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Any, Dict
 import os
+import json
 import traceback
 
-from models.database import get_db
+from models.database import get_db, SessionLocal
 from models.schemas import CareerPilotRequest, CareerPilotResponse
-from agents.graph import build_careerpilot_graph
+from agents.graph import get_careerpilot_graph
+from services.metrics import collect_timings, summarize_timings
 
 from models.user_model import User
 from utils.auth import get_current_user
@@ -15,26 +19,29 @@ from utils.encryption import decrypt_api_key
 
 router = APIRouter(prefix="/careerpilot", tags=["CareerPilot"])
 
+# Nodes whose LLM tokens are forwarded to streaming clients
+TOKEN_STREAM_NODES = {"resume_improver", "cover_letter"}
 
-@router.post("/analyze", response_model=CareerPilotResponse)
-def analyze(
-    request: CareerPilotRequest, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    
+# State keys never sent to streaming clients
+PRIVATE_STATE_KEYS = {"db", "google_api_key", "serpapi_api_key", "tavily_api_key"}
+
+
+def build_initial_state(request: CareerPilotRequest, db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Validates the request keys and returns the graph input state.
+    """
     # Extract API keys from request
     google_api_key = request.google_api_key
     serpapi_api_key = request.serpapi_api_key
     tavily_api_key = request.tavily_api_key
-    
+
     # Validate that Google API key is provided (required)
     if not google_api_key:
         raise HTTPException(
             status_code=400,
             detail="Google Gemini AI API key not provided. Please enter your API key in the configuration panel."
         )
-    
+
     # Validate SerpAPI key if use_serpapi is requested
     use_serpapi = request.use_serpapi or False
     if use_serpapi and not serpapi_api_key:
@@ -46,19 +53,19 @@ def analyze(
     if use_tavily and not tavily_api_key:
         use_tavily = False
 
-    graph = build_careerpilot_graph()
-
     initial_state = {
         "db": db,
-        "user_id": current_user.id,
+        "user_id": user_id,
         "resume_id": request.resume_id,
         "job_id": request.job_id,
         "search_query": request.search_query,
+        "job_filters": request.job_filters,
         "use_serpapi": use_serpapi,
         "use_tavily": use_tavily,
         "google_api_key": google_api_key,  # Pass user's Google API key
         "serpapi_api_key": serpapi_api_key if use_serpapi else None,  # Pass SerpAPI key if needed
         "tavily_api_key": tavily_api_key if use_tavily else None,
+        "parallel_cover_letter": request.parallel_cover_letter,
         "timestamp": "now",
         
         # Pass intermediate data if available
@@ -67,45 +74,68 @@ def analyze(
         "skill_categories": request.skill_categories,
         "job_description": request.job_description
     }
+    return initial_state
+
+
+def build_response(final_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Maps the final graph state onto CareerPilotResponse fields.
+    """
+    # Get recommended_jobs and ensure it's a list
+    recommended_jobs = final_state.get("recommended_jobs")
+    if recommended_jobs is None:
+        recommended_jobs = []
+    elif not isinstance(recommended_jobs, list):
+        print(f"[Router] WARNING: recommended_jobs is not a list: {type(recommended_jobs)}")
+        recommended_jobs = []
+
+    # Ensure all required response fields have default values if missing
+    # This handles cases where the graph ends early (e.g., job search without job_id)
+    response_data = {
+        "resume_text": final_state.get("resume_text"),
+        "extracted_skills": final_state.get("extracted_skills", []),
+        "skill_categories": final_state.get("skill_categories", {}),
+        "job_id": final_state.get("job_id"),
+        "job_description": final_state.get("job_description"),
+        "job_skills": final_state.get("job_skills", []),
+        "job_metadata": final_state.get("job_metadata", {}),
+        "missing_skills": final_state.get("missing_skills", []),
+        "skill_match_score": final_state.get("skill_match_score"),
+        "overall_fit_score": final_state.get("overall_fit_score"),
+        "fit_explanation": final_state.get("fit_explanation"),
+        "improved_resume": final_state.get("improved_resume"),
+        "cover_letter": final_state.get("cover_letter"),
+        "application_id": final_state.get("application_id"),
+        "timestamp": final_state.get("timestamp", "now"),
+        # Always include recommended_jobs as a list (never None)
+        "recommended_jobs": recommended_jobs
+    }
+
+    # Add SerpAPI error/warning if present
+    if "serpapi_error" in final_state:
+        response_data["serpapi_error"] = final_state.get("serpapi_error")
+    if "serpapi_warning" in final_state:
+        response_data["serpapi_warning"] = final_state.get("serpapi_warning")
+    return response_data
+
+
+@router.post("/analyze", response_model=CareerPilotResponse)
+async def analyze(
+    request: CareerPilotRequest, 
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    initial_state = build_initial_state(request, db, current_user.id)
+    graph = get_careerpilot_graph()
 
     try:
-        final_state = graph.invoke(initial_state)
-        
-        # Get recommended_jobs and ensure it's a list
-        recommended_jobs = final_state.get("recommended_jobs")
-        if recommended_jobs is None:
-            recommended_jobs = []
-        elif not isinstance(recommended_jobs, list):
-            print(f"[Router] WARNING: recommended_jobs is not a list: {type(recommended_jobs)}")
-            recommended_jobs = []
-        
-        # Ensure all required response fields have default values if missing
-        # This handles cases where the graph ends early (e.g., job search without job_id)
-        response_data = {
-            "resume_text": final_state.get("resume_text"),
-            "extracted_skills": final_state.get("extracted_skills", []),
-            "skill_categories": final_state.get("skill_categories", {}),
-            "job_id": final_state.get("job_id"),
-            "job_description": final_state.get("job_description"),
-            "job_skills": final_state.get("job_skills", []),
-            "job_metadata": final_state.get("job_metadata", {}),
-            "missing_skills": final_state.get("missing_skills", []),
-            "skill_match_score": final_state.get("skill_match_score"),
-            "overall_fit_score": final_state.get("overall_fit_score"),
-            "fit_explanation": final_state.get("fit_explanation"),
-            "improved_resume": final_state.get("improved_resume"),
-            "cover_letter": final_state.get("cover_letter"),
-            "application_id": final_state.get("application_id"),
-            "timestamp": final_state.get("timestamp", "now"),
-            # Always include recommended_jobs as a list (never None)
-            "recommended_jobs": recommended_jobs
-        }
+        with collect_timings() as timings:
+            final_state = await graph.ainvoke(initial_state)
         
-        # Add SerpAPI error/warning if present
-        if "serpapi_error" in final_state:
-            response_data["serpapi_error"] = final_state.get("serpapi_error")
-        if "serpapi_warning" in final_state:
-            response_data["serpapi_warning"] = final_state.get("serpapi_warning")
+        response_data = build_response(final_state)
+        if request.include_timings:
+            response_data["timings"] = summarize_timings(timings)
+        recommended_jobs = response_data["recommended_jobs"]
         
         # Debug: Print recommended_jobs count and sample
         print(f"[Router] Returning {len(recommended_jobs)} recommended jobs")
@@ -132,3 +162,74 @@ def analyze(
         print(f"[Router] Full traceback:")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+# ==========================================================
+# Streaming variant (Server-Sent Events)
+# ==========================================================
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(
+    request: CareerPilotRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Same pipeline as /analyze, streamed as Server-Sent Events:
+    - event "update": {node, data} with each node's partial state as it completes
+    - event "token":  {node, content} Gemini tokens for the resume improver / cover letter
+    - event "done":   the full CareerPilotResponse payload
+    - event "error":  {detail} if the run fails
+    """
+    # The session must outlive the request handler, so the generator owns it
+    db = SessionLocal()
+    try:
+        initial_state = build_initial_state(request, db, current_user.id)
+    except Exception:
+        db.close()
+        raise
+
+    graph = get_careerpilot_graph()
+
+    async def event_stream():
+        final_state = dict(initial_state)
+        timings = []
+        try:
+            with collect_timings() as timings:
+                async for mode, chunk in graph.astream(
+                    initial_state,
+                    stream_mode=["updates", "messages"]
+                ):
+                    if mode == "messages":
+                        message, metadata = chunk
+                        node = metadata.get("langgraph_node")
+                        if node in TOKEN_STREAM_NODES and message.content:
+                            yield sse_event("token", {"node": node, "content": message.content})
+                        continue
+
+                    for node, update in chunk.items():
+                        if not update:
+                            continue
+                        final_state.update(update)
+                        public = {k: v for k, v in update.items() if k not in PRIVATE_STATE_KEYS}
+                        yield sse_event("update", {"node": node, "data": public})
+
+            response_data = build_response(final_state)
+            if request.include_timings:
+                response_data["timings"] = summarize_timings(timings)
+            yield sse_event("done", response_data)
+
+        except Exception as e:
+            print("[Router] ERROR: Exception occurred during streamed graph execution")
+            traceback.print_exc()
+            yield sse_event("error", {"detail": str(e)})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
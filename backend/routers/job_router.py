@@ -1,16 +1,30 @@
 # backend/routers/job_router.py
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from typing import Optional
 from uuid import uuid4
+import os
 
 from models.database import get_db
 from models.job_model import Job
-from models.schemas import JobCreateModel, JobResponseModel
+from models.schemas import JobCreateModel, JobResponseModel, JobListItemModel, JobBatchSearchRequest, JobBatchSearchResponse
 from services.job_ingestor import JobIngestor
+from services.tfidf_search import get_job_index
+from services.ingestion_queue import get_ingestion_queue
+from services.reindex import get_reindex_engine
+from services.vector_index import describe_job_vector_index, rebuild_job_vector_index
+from agents.job_search_agent import rank_jobs
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+# /jobs/all page size (default and upper bound)
+JOBS_PAGE_SIZE = int(os.getenv("JOBS_PAGE_SIZE", "100"))
+JOBS_MAX_PAGE_SIZE = int(os.getenv("JOBS_MAX_PAGE_SIZE", "1000"))
+
+LISTABLE_FIELDS = tuple(JobListItemModel.model_fields)
+
 
 @router.post("/add", response_model=JobResponseModel)
 def add_job(job: JobCreateModel, db: Session = Depends(get_db)):
@@ -31,25 +45,120 @@ def add_job(job: JobCreateModel, db: Session = Depends(get_db)):
     )
 
     db.add(record)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A job with this title and company already exists.")
     db.refresh(record)
+
+    # Keep the shared keyword index current
+    get_job_index().add_jobs([
+        {"id": job_id, "title": job.title, "description": job.description}
+    ])
     
-    # Index job in vector store for semantic search
-    if job.description:
-        try:
-            ingestor = JobIngestor()
-            ingestor.ingest_job(job_id=job_id, job_description=job.description)
-            print(f"[JobRouter] Successfully indexed job {job_id} in vector store")
-        except Exception as e:
-            print(f"[JobRouter] Warning: Failed to index job in vector store: {e}")
-            # Don't fail the request if vector indexing fails
-    
+    # Embed for semantic search in the background; the request doesn't wait
+    queued = get_ingestion_queue().enqueue([{"id": job_id, "description": job.description}])
+    if queued:
+        print(f"[JobRouter] Queued job {job_id} for vector indexing")
+
     return record
 
 
-@router.get("/all", response_model=list[JobResponseModel])
-def get_all_jobs(db: Session = Depends(get_db)):
-    return db.query(Job).all()
+@router.get("/all", response_model=list[JobListItemModel], response_model_exclude_unset=True)
+def get_all_jobs(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(JOBS_PAGE_SIZE, ge=1, le=JOBS_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    One page of jobs in id order. While more rows remain, the X-Next-After
+    header holds the cursor to pass as `after` for the next page.
+    `fields` is a comma-separated column list (id is always included).
+    """
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(LISTABLE_FIELDS)
+    unknown = [name for name in names if name not in LISTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown job fields: {', '.join(unknown)}")
+
+    names = ["id"] + [name for name in dict.fromkeys(names) if name != "id"]
+    query = db.query(*[getattr(Job, name) for name in names]).order_by(Job.id)
+    if after:
+        query = query.filter(Job.id > after)
+
+    # One extra row tells whether another page follows
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-After"] = rows[-1].id
+
+    return [dict(zip(names, row)) for row in rows]
+
+
+@router.post("/search-batch", response_model=JobBatchSearchResponse)
+def search_jobs_batch(request: JobBatchSearchRequest, db: Session = Depends(get_db)):
+    """
+    Rank the job corpus for N queries at once; returns N ranked lists.
+    """
+    queries = [q for q in request.queries if q and q.strip()]
+    if len(queries) != len(request.queries):
+        raise HTTPException(status_code=400, detail="Queries must be non-empty strings.")
+
+    if not queries:
+        return {"results": []}
+
+    results = rank_jobs(
+        db,
+        queries,
+        job_filters=request.job_filters,
+        top_k=request.top_k or 10,
+        google_api_key=request.google_api_key
+    )
+
+    return {"results": results}
+
+
+@router.get("/reindex")
+def list_reindex_runs():
+    return [run.to_dict() for run in get_reindex_engine().list_runs()]
+
+
+@router.get("/vector-index")
+def vector_index_status():
+    """
+    Semantic search backend (JOB_VECTOR_INDEX) and, for local indexes, their size / age.
+    """
+    return describe_job_vector_index()
+
+
+@router.post("/vector-index/rebuild")
+def rebuild_vector_index():
+    """
+    Rebuild the local ANN index from job_chunks in the background.
+    """
+    rebuild_job_vector_index(background=True)
+    return describe_job_vector_index()
+
+
+@router.get("/ingestion/status")
+def ingestion_status():
+    """
+    Background embedding queue: queued / in-flight / done / failed counts.
+    """
+    return get_ingestion_queue().stats()
+
+
+@router.get("/ingestion/status/{job_id}")
+def job_ingestion_status(job_id: str):
+    """
+    Embedding status of one job: queued, embedding, retrying, done or failed.
+    """
+    status = get_ingestion_queue().job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="No ingestion record for this job.")
+    return status
 
 
 @router.get("/{job_id}", response_model=JobResponseModel)
@@ -66,36 +175,40 @@ def get_job(job_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/reindex-all")
-def reindex_all_jobs(db: Session = Depends(get_db)):
+def reindex_all_jobs():
     """
-    Re-index all existing jobs in the vector store.
-    Useful when jobs were added before vector indexing was implemented.
+    Re-index all existing jobs in the vector store, in the background.
+    Unchanged chunks are skipped and stale ones removed, so re-running is
+    cheap. Returns the run handle; poll GET /jobs/reindex/{run_id}.
     """
-    jobs = db.query(Job).all()
-    
-    if not jobs:
-        return {"message": "No jobs found to index", "indexed_count": 0}
-    
-    ingestor = JobIngestor()
-    indexed_count = 0
-    failed_count = 0
-    
-    for job in jobs:
-        if job.description:
-            try:
-                ingestor.ingest_job(job_id=job.id, job_description=job.description)
-                indexed_count += 1
-                print(f"[JobRouter] Re-indexed job {job.id}: {job.title}")
-            except Exception as e:
-                failed_count += 1
-                print(f"[JobRouter] Failed to re-index job {job.id}: {e}")
-    
-    return {
-        "message": f"Re-indexing complete",
-        "total_jobs": len(jobs),
-        "indexed_count": indexed_count,
-        "failed_count": failed_count
-    }
+    return get_reindex_engine().start().to_dict()
+
+
+@router.get("/reindex/{run_id}")
+def get_reindex_run(run_id: str):
+    run = get_reindex_engine().get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Reindex run not found.")
+    return run.to_dict()
+
+
+@router.post("/reindex/{run_id}/resume")
+def resume_reindex_run(run_id: str):
+    """
+    Continue an interrupted, cancelled or failed run from its last checkpoint.
+    """
+    run = get_reindex_engine().resume(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Reindex run not found.")
+    return run.to_dict()
+
+
+@router.post("/reindex/{run_id}/cancel")
+def cancel_reindex_run(run_id: str):
+    run = get_reindex_engine().cancel(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Reindex run not found.")
+    return run.to_dict()
 
 
 @router.delete("/{job_id}")
@@ -108,4 +221,14 @@ def delete_job(job_id: str, db: Session = Depends(get_db)):
     db.delete(job)
     db.commit()
 
+    get_job_index().remove_jobs([job_id])
+
+    # Drop its vectors too, including any still waiting on the ingestion queue
+    get_ingestion_queue().discard([job_id])
+    try:
+        removed = JobIngestor().remove_jobs([job_id])
+        print(f"[JobRouter] Removed {removed} chunks of job {job_id} from vector store")
+    except Exception as e:
+        print(f"[JobRouter] Warning: Failed to remove job {job_id} from vector store: {e}")
+
     return {"message": "Job deleted successfully"}
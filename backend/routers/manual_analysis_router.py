@@ -7,7 +7,7 @@ from models.database import get_db
 from models.user_model import User
 from models.resume_model import Resume
 from routers.auth_router import get_current_user
-from agents.graph import build_careerpilot_graph
+from agents.graph import get_careerpilot_graph
 
 router = APIRouter(
     prefix="/manual-analysis",
@@ -68,8 +68,8 @@ async def analyze_manual_jd(
          raise HTTPException(status_code=400, detail="Google API Key is missing. Please configure it in settings.")
 
     # 3. Run Graph
-    app = build_careerpilot_graph()
-    result = app.invoke(state)
+    app = get_careerpilot_graph()
+    result = await app.ainvoke(state)
     
     # 4. Extract Results
     return {
@@ -0,0 +1,30 @@
+# backend/routers/metrics_router.py
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+import os
+
+from services.metrics import registry
+
+router = APIRouter(tags=["Metrics"])
+
+# Off by default: timings are internal data. Scrapers send
+# "Authorization: Bearer <METRICS_TOKEN>" when a token is configured.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus text exposition of node / LLM / Chroma / DB timings and token counts.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token.")
+
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -11,6 +11,8 @@ from services.pdf_reader import PDFReader
 from services.text_cleaner import TextCleaner
 from services.skill_extractor import SkillExtractor
 from services.ats_service import ATSService
+from services.embedding import get_embedding_service
+from services.resume_vectors import get_resume_vectors
 from typing import Optional
 from fastapi import Form
 from pydantic import BaseModel
@@ -124,6 +126,14 @@ def delete_resume(
     db.delete(resume)
     db.commit()
 
+    # Remove its chunks from the vector store
+    try:
+        get_resume_vectors().invalidate(resume_id)
+        removed = get_embedding_service(collection_name="resume_chunks").delete_owner("resume_id", [resume_id])
+        print(f"[ResumeRouter] Removed {removed} chunks of resume {resume_id} from vector store")
+    except Exception as e:
+        print(f"[ResumeRouter] Warning: Failed to remove resume {resume_id} from vector store: {e}")
+
     return {"message": "Resume deleted successfully"}
 
 
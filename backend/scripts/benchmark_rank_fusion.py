@@ -0,0 +1,201 @@
+# scripts/benchmark_rank_fusion.py
+"""
+Offline relevance comparison of hybrid fusion strategies (nDCG@10, MRR,
+recall@10) on the hand-labelled corpus in scripts/fixtures/fusion_relevance.json.
+
+    cd backend
+    python -m scripts.benchmark_rank_fusion
+    python -m scripts.benchmark_rank_fusion --pool 20 --semantic gemini
+
+The keyword side is the real TFIDFSearch index. The semantic side is either
+Gemini embeddings (--semantic gemini, needs GOOGLE_API_KEY) or, by default,
+an LSA model (TF-IDF + truncated SVD) fitted on the fixture, a crude offline
+stand-in that at least matches on co-occurring terms.
+
+"learned" grid-searches the keyword / semantic weights with leave-one-query-out
+cross-validation; the weights fitted on every query are printed as a
+SEARCH_FUSION_WEIGHTS value.
+"""
+
+from typing import Dict, List
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from services.rank_fusion import fuse
+from services.tfidf_search import TFIDFSearch
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fusion_relevance.json")
+WEIGHT_GRID = [round(w, 1) for w in np.arange(0.0, 1.01, 0.1)]
+
+
+# ------------------------------------------
+# Retrievers
+# ------------------------------------------
+def keyword_rankings(jobs: List[Dict], queries: List[str], pool: int):
+    index = TFIDFSearch()
+    index.index_jobs(jobs)
+    return [
+        [(r["job_id"], r["score"]) for r in results]
+        for results in index.search_batch(queries, top_k=pool)
+    ]
+
+
+def _rank_by_similarity(job_ids: List[str], doc_vecs: np.ndarray, query_vecs: np.ndarray, pool: int):
+    sims = normalize(query_vecs) @ normalize(doc_vecs).T
+    rankings = []
+    for row in sims:
+        top = np.argsort(-row, kind="stable")[:pool]
+        rankings.append([(job_ids[i], float(row[i])) for i in top])
+    return rankings
+
+
+def lsa_rankings(jobs: List[Dict], queries: List[str], pool: int, dims: int):
+    texts = [f"{job['title']} {job['description']}" for job in jobs]
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    svd = TruncatedSVD(n_components=min(dims, len(jobs) - 1), random_state=0)
+
+    doc_vecs = svd.fit_transform(vectorizer.fit_transform(texts))
+    query_vecs = svd.transform(vectorizer.transform(queries))
+    return _rank_by_similarity([job["id"] for job in jobs], doc_vecs, query_vecs, pool)
+
+
+def gemini_rankings(jobs: List[Dict], queries: List[str], pool: int):
+    from services.embedding import get_embedding_service
+
+    model = get_embedding_service(collection_name="job_chunks").model
+    texts = [f"{job['title']} {job['description']}" for job in jobs]
+
+    doc_vecs = np.asarray(model.embed_documents(texts, task_type="retrieval_document"), dtype=np.float32)
+    query_vecs = np.asarray(model.embed_documents(queries, task_type="retrieval_query"), dtype=np.float32)
+    return _rank_by_similarity([job["id"] for job in jobs], doc_vecs, query_vecs, pool)
+
+
+# ------------------------------------------
+# Metrics
+# ------------------------------------------
+def ndcg_at_k(ranked: List[str], relevant: Dict[str, int], k: int) -> float:
+    dcg = sum((2 ** relevant.get(jid, 0) - 1) / math.log2(i + 2) for i, jid in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(i + 2) for i, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def mrr(ranked: List[str], relevant: Dict[str, int]) -> float:
+    for i, jid in enumerate(ranked):
+        if relevant.get(jid, 0) > 0:
+            return 1.0 / (i + 1)
+    return 0.0
+
+
+def recall_at_k(ranked: List[str], relevant: Dict[str, int], k: int) -> float:
+    hits = {jid for jid in ranked[:k] if relevant.get(jid, 0) > 0}
+    return len(hits) / len(relevant) if relevant else 0.0
+
+
+def evaluate(runs: List[List[str]], qrels: List[Dict[str, int]], k: int) -> Dict[str, float]:
+    return {
+        f"ndcg@{k}": float(np.mean([ndcg_at_k(r, q, k) for r, q in zip(runs, qrels)])),
+        "mrr": float(np.mean([mrr(r, q) for r, q in zip(runs, qrels)])),
+        f"recall@{k}": float(np.mean([recall_at_k(r, q, k) for r, q in zip(runs, qrels)])),
+    }
+
+
+# ------------------------------------------
+# Strategies
+# ------------------------------------------
+def fused_runs(keyword, semantic, k: int, **options) -> List[List[str]]:
+    return [
+        [jid for jid, _ in fuse([kw, sem], top_k=k, **options)]
+        for kw, sem in zip(keyword, semantic)
+    ]
+
+
+def learn_weights(keyword, semantic, qrels, k: int, **options):
+    """
+    Keyword weight (semantic = 1 - w) maximizing mean nDCG@k over the given
+    queries. Returns (weight, leave-one-query-out runs).
+    """
+    def best_weight(indices):
+        scores = {}
+        for w in WEIGHT_GRID:
+            runs = fused_runs([keyword[i] for i in indices], [semantic[i] for i in indices], k, weights=(w, 1 - w), **options)
+            scores[w] = np.mean([ndcg_at_k(r, qrels[i], k) for r, i in zip(runs, indices)])
+        # Ties go to the weight closest to an even split
+        return max(WEIGHT_GRID, key=lambda w: (round(scores[w], 9), -abs(w - 0.5)))
+
+    everything = list(range(len(qrels)))
+    held_out_runs = []
+    for i in everything:
+        w = best_weight([j for j in everything if j != i])
+        held_out_runs.extend(fused_runs([keyword[i]], [semantic[i]], k, weights=(w, 1 - w), **options))
+
+    return best_weight(everything), held_out_runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--pool", type=int, default=50, help="candidates per retriever (SEARCH_CANDIDATE_POOL)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--semantic", choices=["lsa", "gemini"], default="lsa")
+    parser.add_argument("--lsa-dims", type=int, default=16)
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    jobs = fixture["jobs"]
+    queries = [q["query"] for q in fixture["queries"]]
+    qrels = [q["relevant"] for q in fixture["queries"]]
+
+    keyword = keyword_rankings(jobs, queries, args.pool)
+    if args.semantic == "gemini":
+        semantic = gemini_rankings(jobs, queries, args.pool)
+    else:
+        semantic = lsa_rankings(jobs, queries, args.pool, args.lsa_dims)
+
+    # The previous ranker: top 10 per retriever, max-normalized, 0.5 / 0.5
+    legacy_keyword = [r[:10] for r in keyword]
+    legacy_semantic = [r[:10] for r in semantic]
+
+    rows = [
+        ("keyword only", [[jid for jid, _ in r[:args.k]] for r in keyword]),
+        (f"{args.semantic} only", [[jid for jid, _ in r[:args.k]] for r in semantic]),
+        ("weighted max, top-10 pools", fused_runs(legacy_keyword, legacy_semantic, args.k, method="weighted", weights=(0.5, 0.5), normalization="max")),
+        ("weighted max", fused_runs(keyword, semantic, args.k, method="weighted", weights=(0.5, 0.5), normalization="max")),
+        ("weighted minmax", fused_runs(keyword, semantic, args.k, method="weighted", weights=(0.5, 0.5), normalization="minmax")),
+        (f"rrf k={args.rrf_k}", fused_runs(keyword, semantic, args.k, method="rrf", weights=(1.0, 1.0), rrf_k=args.rrf_k)),
+    ]
+
+    learned = []
+    for label, options in [
+        ("learned minmax", {"method": "weighted", "normalization": "minmax"}),
+        ("learned rrf", {"method": "rrf", "rrf_k": args.rrf_k}),
+    ]:
+        weight, runs = learn_weights(keyword, semantic, qrels, args.k, **options)
+        rows.append((f"{label} (LOO)", runs))
+        learned.append((label, weight))
+
+    print(f"{len(jobs)} jobs, {len(queries)} queries, pool {args.pool}, semantic = {args.semantic}\n")
+    metric_names = list(evaluate(rows[0][1], qrels, args.k))
+    print(f"{'strategy':<30}" + "".join(f"{name:>11}" for name in metric_names))
+    for name, runs in rows:
+        metrics = evaluate(runs, qrels, args.k)
+        print(f"{name:<30}" + "".join(f"{metrics[m]:>11.3f}" for m in metric_names))
+
+    print()
+    for label, weight in learned:
+        print(f"{label}: SEARCH_FUSION_WEIGHTS={weight},{round(1 - weight, 1)}")
+
+
+if __name__ == "__main__":
+    main()
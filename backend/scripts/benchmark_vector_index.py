@@ -0,0 +1,166 @@
+# scripts/benchmark_vector_index.py
+"""
+Job-level recall@k and query latency of the job_chunks vector index backends
+on synthetic clustered embeddings.
+
+    cd backend
+    python -m scripts.benchmark_vector_index --sizes 10000 100000
+    python -m scripts.benchmark_vector_index --sizes 1000000 --skip-chroma-above 100000
+
+Ground truth is the exact backend (max aggregation over every chunk).
+IVF is measured at several nprobe values. The Chroma path (HNSW,
+k * JOB_VECTOR_OVERFETCH chunks aggregated per job) runs only if chromadb
+is installed, and only up to --skip-chroma-above chunks since loading is slow.
+"""
+
+import argparse
+import tempfile
+import shutil
+import time
+
+import numpy as np
+
+from services.vector_index import ChromaJobIndex, LocalJobIndex, JOB_VECTOR_OVERFETCH
+
+
+def synthetic_corpus(chunks: int, dim: int, chunks_per_job: int, seed: int = 0):
+    """
+    Jobs grouped into topics; each job's chunks scatter around the job's center.
+    """
+    rng = np.random.default_rng(seed)
+    jobs = max(1, chunks // chunks_per_job)
+    topics = max(1, jobs // 50)
+
+    topic_centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    job_centers = topic_centers[rng.integers(0, topics, size=jobs)] + 0.5 * rng.normal(size=(jobs, dim)).astype(np.float32)
+
+    job_of_chunk = np.sort(rng.integers(0, jobs, size=chunks))
+    vectors = np.empty((chunks, dim), dtype=np.float32)
+    for start in range(0, chunks, 100_000):
+        stop = min(chunks, start + 100_000)
+        vectors[start:stop] = job_centers[job_of_chunk[start:stop]] + 0.3 * rng.normal(size=(stop - start, dim)).astype(np.float32)
+
+    return vectors, [f"job-{j}" for j in job_of_chunk], job_centers
+
+
+def make_queries(job_centers: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    picks = job_centers[rng.integers(0, len(job_centers), size=count)]
+    return (picks + 0.4 * rng.normal(size=picks.shape)).astype(np.float32)
+
+
+def timed_search(search, queries: np.ndarray, k: int):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query[None, :], k)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def recall_at_k(results, truth, k: int) -> float:
+    hits = [
+        len({job for job, _ in got[:k]} & {job for job, _ in want[:k]}) / max(1, min(k, len(want)))
+        for got, want in zip(results, truth)
+    ]
+    return float(np.mean(hits))
+
+
+class _PrecomputedEmbedder:
+    """
+    Minimal stand-in for EmbeddingService so ChromaJobIndex can be timed on
+    raw vectors (queries arrive already embedded).
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def similarity_search_batch(self, query_vecs, k: int = 5):
+        raw = self.collection.query(query_embeddings=np.asarray(query_vecs).tolist(), n_results=k, include=["metadatas", "distances"])
+
+        class Doc:
+            def __init__(self, metadata):
+                self.metadata = metadata
+
+        return [
+            [(Doc(meta), dist) for meta, dist in zip(metas, dists)]
+            for metas, dists in zip(raw["metadatas"], raw["distances"])
+        ]
+
+
+def chroma_search(vectors: np.ndarray, job_ids, batch: int = 5000):
+    try:
+        import chromadb
+    except ImportError:
+        return None
+
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"bench-{time.time_ns()}", metadata={"hnsw:space": "l2"})
+    for start in range(0, len(vectors), batch):
+        stop = min(len(vectors), start + batch)
+        collection.add(
+            ids=[str(i) for i in range(start, stop)],
+            embeddings=vectors[start:stop].tolist(),
+            metadatas=[{"job_id": job_id} for job_id in job_ids[start:stop]]
+        )
+
+    index = ChromaJobIndex(overfetch=JOB_VECTOR_OVERFETCH)
+    embedder = _PrecomputedEmbedder(collection)
+    return lambda query, k: index.search(embedder, query, k=k)
+
+
+def run(size: int, args):
+    print(f"\n=== {size:,} chunks, dim {args.dim} ===")
+    vectors, job_ids, job_centers = synthetic_corpus(size, args.dim, args.chunks_per_job)
+    queries = make_queries(job_centers, args.queries)
+    workdir = tempfile.mkdtemp(prefix="vector-index-bench-")
+
+    try:
+        rows = []
+
+        meta = LocalJobIndex.build(f"{workdir}/exact", vectors, job_ids, kind="exact")
+        exact = LocalJobIndex(f"{workdir}/exact")
+        truth, lat = timed_search(exact.search_vectors, queries, args.k)
+        rows.append(("exact", meta["build_seconds"], 1.0, lat))
+
+        meta = LocalJobIndex.build(f"{workdir}/ivf", vectors, job_ids, kind="ivf", nlist=args.nlist)
+        for nprobe in args.nprobe:
+            ivf = LocalJobIndex(f"{workdir}/ivf", nprobe=nprobe)
+            results, lat = timed_search(ivf.search_vectors, queries, args.k)
+            rows.append((f"ivf nlist={meta['nlist']} nprobe={nprobe}", meta["build_seconds"], recall_at_k(results, truth, args.k), lat))
+
+        if size <= args.skip_chroma_above:
+            start = time.perf_counter()
+            search = chroma_search(vectors, job_ids)
+            if search is None:
+                print("chromadb not installed, skipping the Chroma backend")
+            else:
+                build_seconds = round(time.perf_counter() - start, 3)
+                results, lat = timed_search(search, queries, args.k)
+                rows.append(("chroma (hnsw)", build_seconds, recall_at_k(results, truth, args.k), lat))
+
+        print(f"{'backend':<32} {'build s':>9} {'recall@' + str(args.k):>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for name, build_seconds, recall, lat in rows:
+            print(f"{name:<32} {build_seconds:>9.2f} {recall:>10.3f} {np.percentile(lat, 50):>9.2f} {np.percentile(lat, 99):>9.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--chunks-per-job", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 = ~sqrt(chunks)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--skip-chroma-above", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args)
+
+
+if __name__ == "__main__":
+    main()
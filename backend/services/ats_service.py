@@ -1,29 +1,16 @@
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Dict, Any, Optional
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 import json
 
-class ATSService:
-    @staticmethod
-    def calculate_score(resume_text: str, google_api_key: str) -> Dict[str, Any]:
-        """
-        Calculates ATS score and generates a report for the given resume text.
-        """
-        if not resume_text or not google_api_key:
-            return {"ats_score": 0.0, "ats_report": "Missing resume text or API key."}
+from services.llm_factory import get_llm_chain
 
-        try:
-            llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                temperature=0.1,
-                response_mime_type="application/json",
-                google_api_key=google_api_key
-            )
-
-            prompt = PromptTemplate(
-                input_variables=["resume_text"],
-                template="""
+
+ATS_PROMPT_VERSION = "1"
+ATS_PROMPT = PromptTemplate(
+    input_variables=["resume_text"],
+    template="""
 You are a strict, highly critical Applicant Tracking System (ATS) and expert resume auditor.
 Your job is to brutally evaluate the resume text below and assign a realistic score.
 
@@ -48,24 +35,65 @@ Return STRICT JSON:
   "ats_report": "Markdown string with 3-5 bullet points of specific, actionable feedback. Focus on what is missing or weak."
 }}
 """
-            )
+)
 
-            chain = prompt | llm | StrOutputParser()
+
+class ATSService:
+    @staticmethod
+    def _build_chain(google_api_key: str):
+        return get_llm_chain(
+            "ats_score", ATS_PROMPT, StrOutputParser(), google_api_key,
+            prompt_version=ATS_PROMPT_VERSION,
+            temperature=0.1,
+            cache=True,
+            response_mime_type="application/json"
+        )
+
+    @staticmethod
+    def _parse(raw: str) -> Dict[str, Any]:
+        # Parse JSON safely
+        try:
+            data = json.loads(raw)
+        except:
+            # Fallback extraction if JSON is messy
+            s = raw.find("{")
+            e = raw.rfind("}") + 1
+            data = json.loads(raw[s:e])
+
+        return {
+            "ats_score": float(data.get("ats_score", 0)),
+            "ats_report": data.get("ats_report", "No report generated.")
+        }
+
+    @staticmethod
+    def calculate_score(resume_text: str, google_api_key: str) -> Dict[str, Any]:
+        """
+        Calculates ATS score and generates a report for the given resume text.
+        """
+        if not resume_text or not google_api_key:
+            return {"ats_score": 0.0, "ats_report": "Missing resume text or API key."}
+
+        try:
+            chain = ATSService._build_chain(google_api_key)
             raw = chain.invoke({"resume_text": resume_text})
-            
-            # Parse JSON safely
-            try:
-                data = json.loads(raw)
-            except:
-                # Fallback extraction if JSON is messy
-                s = raw.find("{")
-                e = raw.rfind("}") + 1
-                data = json.loads(raw[s:e])
-
-            return {
-                "ats_score": float(data.get("ats_score", 0)),
-                "ats_report": data.get("ats_report", "No report generated.")
-            }
+            return ATSService._parse(raw)
+
+        except Exception as e:
+            print(f"ATS Service Error: {e}")
+            return {"ats_score": 0.0, "ats_report": f"Error calculating ATS score: {str(e)}"}
+
+    @staticmethod
+    async def acalculate_score(resume_text: str, google_api_key: str, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """
+        Async variant of calculate_score.
+        """
+        if not resume_text or not google_api_key:
+            return {"ats_score": 0.0, "ats_report": "Missing resume text or API key."}
+
+        try:
+            chain = ATSService._build_chain(google_api_key)
+            raw = await chain.ainvoke({"resume_text": resume_text}, config=config)
+            return ATSService._parse(raw)
 
         except Exception as e:
             print(f"ATS Service Error: {e}")
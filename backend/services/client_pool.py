@@ -0,0 +1,45 @@
+# services/client_pool.py
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import threading
+import time
+
+
+class KeyedLRUPool:
+    """
+    Bounded LRU of long-lived objects (API clients, chains, vector store
+    handles) keyed by their construction parameters. Entries idle for more
+    than ttl seconds are dropped, and past max_size the least recently used
+    one is evicted.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, list]" = OrderedDict()   # key -> [value, last_used]
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+
+        with self._lock:
+            # Drop idle entries
+            for k in [k for k, (_, last_used) in self._items.items() if now - last_used > self.ttl]:
+                del self._items[k]
+
+            entry = self._items.get(key)
+            if entry is None:
+                entry = [factory(), now]
+                self._items[key] = entry
+
+                while len(self._items) > self.max_size:
+                    self._items.popitem(last=False)
+            else:
+                entry[1] = now
+
+            self._items.move_to_end(key)
+            return entry[0]
+
+    def __len__(self):
+        return len(self._items)
@@ -3,10 +3,39 @@
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
-from typing import List
+from services.embedding_cache import CachedEmbeddings, get_embedding_cache
+from services.metrics import track
+from services.client_pool import KeyedLRUPool
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import os
 
 
+BASE_DIR = os.path.dirname(
+    os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )
+)
+DEFAULT_PERSIST_DIR = os.path.join(BASE_DIR, "data/vectorstore/chroma")
+DEFAULT_MODEL_NAME = "models/text-embedding-004"
+
+# Pool bounds for get_embedding_service()
+MAX_POOLED_SERVICES = int(os.getenv("EMBEDDING_POOL_SIZE", "32"))
+POOLED_SERVICE_TTL = float(os.getenv("EMBEDDING_POOL_TTL", "1800"))  # seconds idle
+
+# Documents per Chroma add call (one embedding request each)
+UPSERT_BATCH_SIZE = 100
+
+
+def chunk_id(owner_id: str, chunk_index: int, content: str) -> str:
+    """
+    Deterministic Chroma id of a chunk: re-adding unchanged text yields the
+    same id, so it is skipped or replaced instead of duplicated.
+    """
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    return f"{owner_id}:{chunk_index}:{digest}"
+
+
 class EmbeddingService:
     """
     Embedding + VectorStore using Google Generative AI (Gemini)
@@ -17,7 +46,7 @@ class EmbeddingService:
     def __init__(
         self,
         api_key: str = None,
-        model_name: str = "models/text-embedding-004",
+        model_name: str = DEFAULT_MODEL_NAME,
         persist_dir: str = None,
         collection_name: str = "resume_chunks"
     ):
@@ -29,20 +58,21 @@ class EmbeddingService:
             # We will handle this gracefully or raise error when actually used
             print("Warning: No Google API Key provided for EmbeddingService")
 
-        self.model = GoogleGenerativeAIEmbeddings(
-            model=model_name,
-            google_api_key=self.api_key
-        )
-
-        BASE_DIR = os.path.dirname(
-            os.path.dirname(
-                os.path.dirname(os.path.abspath(__file__))
-            )
+        # Repeated texts (skill vocab, JD chunks, queries) are served from
+        # the shared on-disk embedding cache instead of the API
+        self.model = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(
+                model=model_name,
+                google_api_key=self.api_key
+            ),
+            model_name=model_name,
+            cache=get_embedding_cache()
         )
 
         if persist_dir is None:
-            persist_dir = os.path.join(BASE_DIR, "data/vectorstore/chroma")
+            persist_dir = DEFAULT_PERSIST_DIR
 
+        self.model_name = model_name
         self.persist_dir = persist_dir
         self.collection_name = collection_name
 
@@ -55,7 +85,11 @@ class EmbeddingService:
     # ------------------------------------------
     # Add chunks to Chroma
     # ------------------------------------------
-    def add_chunks(self, resume_id: str, chunks: List[str]):
+    def add_chunks(self, resume_id: str, chunks: List[str]) -> Dict[str, int]:
+        """
+        Stores a resume's chunks, replacing whatever was stored for it
+        before (re-extracting the same resume adds nothing).
+        """
         documents = [
             Document(
                 page_content=chunk,
@@ -63,8 +97,91 @@ class EmbeddingService:
             )
             for i, chunk in enumerate(chunks)
         ]
-        self.vectorstore.add_documents(documents)
-        self.vectorstore.persist()
+        return self.sync_documents("resume_id", [resume_id], documents)
+
+    # ------------------------------------------
+    # Upserts keyed on (owner id, chunk index, content hash)
+    # ------------------------------------------
+    def upsert_documents(self, docs: List[Document], owner_field: str, batch_size: int = UPSERT_BATCH_SIZE):
+        """
+        Adds docs under their chunk_id(); a doc whose id already exists
+        replaces the stored one instead of being duplicated.
+        """
+        for start in range(0, len(docs), batch_size):
+            batch = docs[start:start + batch_size]
+            ids = [
+                chunk_id(d.metadata[owner_field], d.metadata["chunk_index"], d.page_content)
+                for d in batch
+            ]
+            with track("chroma", "add_documents"):
+                self.vectorstore.add_documents(batch, ids=ids)
+
+    def sync_documents(
+        self,
+        owner_field: str,
+        owner_ids: List[str],
+        docs: List[Document],
+        batch_size: int = UPSERT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Makes the stored chunks of owner_ids exactly docs:
+        - docs whose id is already stored are skipped (no embedding call)
+        - new / changed docs are embedded and added
+        - stored chunks not in docs (old text, legacy random ids) are deleted
+        """
+        existing = self.chunk_owners(owner_field, owner_ids)
+
+        wanted = set()
+        to_add = []
+        for doc in docs:
+            doc_id = chunk_id(doc.metadata[owner_field], doc.metadata["chunk_index"], doc.page_content)
+            if doc_id in wanted:
+                continue
+            wanted.add(doc_id)
+            if doc_id not in existing:
+                to_add.append(doc)
+
+        stale = [doc_id for doc_id in existing if doc_id not in wanted]
+
+        # Add before deleting so an owner is never left without chunks
+        self.upsert_documents(to_add, owner_field, batch_size)
+        self.delete_ids(stale)
+
+        return {"added": len(to_add), "unchanged": len(wanted) - len(to_add), "removed": len(stale)}
+
+    def delete_owner(self, owner_field: str, owner_ids: List[str]) -> int:
+        """
+        Deletes every chunk belonging to owner_ids. Returns the number removed.
+        """
+        ids = list(self.chunk_owners(owner_field, owner_ids))
+        self.delete_ids(ids)
+        return len(ids)
+
+    # ------------------------------------------
+    # Chunk ids by owner (job_id / resume_id metadata)
+    # ------------------------------------------
+    def chunk_owners(self, field: str, values: List[str]) -> Dict[str, str]:
+        """
+        Returns {chunk id: owner value} for every chunk whose metadata[field]
+        is one of values.
+        """
+        if not values:
+            return {}
+
+        where = {field: values[0]} if len(values) == 1 else {field: {"$in": list(values)}}
+        with track("chroma", "get"):
+            raw = self.vectorstore.get(where=where, include=["metadatas"])
+
+        return {
+            doc_id: (meta or {}).get(field)
+            for doc_id, meta in zip(raw["ids"], raw["metadatas"])
+        }
+
+    def delete_ids(self, ids: List[str]):
+        if not ids:
+            return
+        with track("chroma", "delete"):
+            self.vectorstore.delete(ids=list(ids))
 
     # ------------------------------------------
     # Retriever (no scores)
@@ -84,12 +201,86 @@ class EmbeddingService:
     # ------------------------------------------
     # ❗ NEW: Real semantic search WITH SCORES
     # ------------------------------------------
-    def similarity_search_with_score(self, text: str, k: int = 5):
+    def similarity_search_with_score(self, text: str, k: int = 5, filter: Optional[dict] = None):
         """
         Returns list of (Document, distance)
         Distance → lower = more similar
+        filter: Chroma metadata filter, e.g. {"resume_id": ...}
         """
-        return self.vectorstore.similarity_search_with_score(text, k=k)
+        with track("chroma", "similarity_search"):
+            return self.vectorstore.similarity_search_with_score(text, k=k, filter=filter)
+
+    def similarity_search_batch(self, texts: List[str], k: int = 5) -> List[List[Tuple[Document, float]]]:
+        """
+        Batched version of similarity_search_with_score: one embedding call
+        for all texts and one Chroma query. Returns one result list per text.
+        """
+        if not texts:
+            return []
+
+        with track("embedding", "embed_queries"):
+            query_vecs = self.model.embed_documents(texts, task_type="retrieval_query")
 
+        with track("chroma", "query_batch"):
+            return self._query_by_vectors(query_vecs, k)
+
+    def _query_by_vectors(self, query_vecs: List[List[float]], k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        One query for all vectors on the raw Chroma collection, which the
+        LangChain wrapper keeps private. If a wrapper upgrade drops that
+        handle, falls back to one public by-vector search per query
+        (same distances, just more round trips).
+        """
+        collection = getattr(self.vectorstore, "_collection", None)
+        if collection is None or not hasattr(collection, "query"):
+            return [
+                self.vectorstore.similarity_search_by_vector_with_relevance_scores(vec, k=k)
+                for vec in query_vecs
+            ]
+
+        raw = collection.query(
+            query_embeddings=query_vecs,
+            n_results=k,
+            include=["documents", "metadatas", "distances"]
+        )
+
+        return [
+            [
+                (Document(page_content=doc or "", metadata=meta or {}), dist)
+                for doc, meta, dist in zip(docs, metas, dists)
+            ]
+            for docs, metas, dists in zip(raw["documents"], raw["metadatas"], raw["distances"])
+        ]
+
+
+# ==========================================================
+# Shared instances (one per persist_dir / collection / model / key)
+# ==========================================================
+_pool = KeyedLRUPool(MAX_POOLED_SERVICES, POOLED_SERVICE_TTL)
+
+
+def get_embedding_service(
+    api_key: str = None,
+    collection_name: str = "resume_chunks",
+    persist_dir: str = None,
+    model_name: str = DEFAULT_MODEL_NAME
+) -> EmbeddingService:
+    """
+    Return a long-lived EmbeddingService instead of building a new embeddings
+    client + Chroma handle per call. Instances idle for longer than
+    EMBEDDING_POOL_TTL are dropped, and at most EMBEDDING_POOL_SIZE are kept
+    (least recently used evicted first).
+    """
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    persist_dir = os.path.abspath(persist_dir or DEFAULT_PERSIST_DIR)
 
+    # Never keep raw API keys around as dict keys
+    key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    key = (persist_dir, collection_name, model_name, key_hash)
 
+    return _pool.get_or_create(key, lambda: EmbeddingService(
+        api_key=api_key,
+        model_name=model_name,
+        persist_dir=persist_dir,
+        collection_name=collection_name
+    ))
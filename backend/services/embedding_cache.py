@@ -0,0 +1,253 @@
+# services/embedding_cache.py
+
+from langchain_core.embeddings import Embeddings
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+from services.text_cleaner import TextCleaner
+
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(
+        os.path.dirname(os.path.abspath(__file__))
+    )
+)
+DEFAULT_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(BASE_DIR, "data/vectorstore/embedding_cache.sqlite3")
+)
+DEFAULT_MAX_DISK_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+DEFAULT_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+
+
+class EmbeddingCache:
+    """
+    Two-tier vector cache:
+    - in-memory LRU of recently used vectors
+    - SQLite table of float32 blobs on local disk, evicted oldest-first
+      once it grows past max_disk_mb
+
+    Keys are opaque strings (see CachedEmbeddings.make_key).
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_disk_mb: float = DEFAULT_MAX_DISK_MB,
+        memory_items: int = DEFAULT_MEMORY_ITEMS
+    ):
+        self.path = path
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.memory_items = memory_items
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()
+        self._disk_bytes = int(row[0])
+
+    # ------------------------------------------
+    # Lookup / store
+    # ------------------------------------------
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            disk_keys = []
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+                    self.memory_hits += 1
+                else:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                now = time.time()
+                for start in range(0, len(disk_keys), 500):
+                    batch = disk_keys[start:start + 500]
+                    marks = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vec
+                        self._remember(key, vec)
+                    if rows:
+                        self._conn.execute(
+                            f"UPDATE embeddings SET last_used = ? WHERE key IN ({marks})", [now, *batch]
+                        )
+                self._conn.commit()
+
+                hits = sum(1 for key in disk_keys if key in found)
+                self.disk_hits += hits
+                self.misses += len(disk_keys) - hits
+
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, vec in items.items():
+                blob = np.asarray(vec, dtype=np.float32).tobytes()
+                old = self._conn.execute(
+                    "SELECT LENGTH(vector) FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    (key, blob, now)
+                )
+                self._disk_bytes += len(blob) - (old[0] if old else 0)
+                self._remember(key, np.frombuffer(blob, dtype=np.float32))
+
+            self._evict_disk()
+            self._conn.commit()
+
+    def _remember(self, key: str, vec: np.ndarray):
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drop least recently used rows until the table is back under ~90% of the cap."""
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used ASC"
+        )
+        drop = []
+        freed = 0
+        for key, size in rows:
+            if self._disk_bytes - freed <= target:
+                break
+            drop.append(key)
+            freed += size
+
+        for start in range(0, len(drop), 500):
+            batch = drop[start:start + 500]
+            self._conn.execute(
+                f"DELETE FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            for key in batch:
+                self._memory.pop(key, None)
+
+        self._disk_bytes -= freed
+
+    # ------------------------------------------
+    # Stats
+    # ------------------------------------------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings wrapper that serves repeated texts from an
+    EmbeddingCache and only sends misses to the underlying model.
+    Keys are sha256(model_name, task, cleaned text).
+    """
+
+    def __init__(self, model: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+
+    def make_key(self, text: str, task: str) -> str:
+        cleaned = TextCleaner.clean_text(text)
+        payload = f"{self.model_name}\x00{task}\x00{cleaned}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _embed(self, texts: List[str], task: str, embed_fn) -> List[List[float]]:
+        keys = [self.make_key(t, task) for t in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            new_items = {
+                key: np.asarray(vec, dtype=np.float32)
+                for key, vec in zip(missing.keys(), vectors)
+            }
+            self.cache.put_many(new_items)
+            found.update(new_items)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_documents(self, texts: List[str], task_type: Optional[str] = None, **kwargs) -> List[List[float]]:
+        if task_type:
+            kwargs["task_type"] = task_type
+        task = (task_type or "retrieval_document").lower()
+
+        return self._embed(
+            texts,
+            task,
+            lambda batch: self.model.embed_documents(batch, **kwargs)
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(
+            [text],
+            "retrieval_query",
+            lambda batch: [self.model.embed_query(batch[0])]
+        )[0]
+
+
+# ==========================================================
+# Process-wide cache
+# ==========================================================
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
@@ -0,0 +1,59 @@
+# services/fulltext_search.py
+
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models.job_model import JOB_TSVECTOR_SQL
+
+
+class PostgresJobSearch:
+    """
+    Keyword search on the jobs table's GIN full-text index (migration 3),
+    a server-side alternative to the in-process TF-IDF index: nothing is
+    held in app memory and new rows are searchable once committed.
+
+    Query terms are OR-ed like TF-IDF's, and jobs are ranked by ts_rank_cd
+    (term frequency and proximity). Same interface as TFIDFSearch.search_batch.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        candidate_ids: Optional[Iterable[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        All queries in one round trip (one LATERAL top-k per query).
+        If candidate_ids is given, only those jobs are ranked.
+        """
+        params = {"queries": list(queries), "top_k": top_k}
+        candidate_filter = ""
+        if candidate_ids is not None:
+            params["candidate_ids"] = list(candidate_ids)
+            candidate_filter = "AND jobs.id = ANY(:candidate_ids)"
+
+        rows = self.db.execute(text(f"""
+            SELECT q.n AS query_index, hit.id AS job_id, hit.score
+            FROM unnest(CAST(:queries AS text[])) WITH ORDINALITY AS q(query, n)
+            CROSS JOIN LATERAL (
+                SELECT jobs.id, ts_rank_cd({JOB_TSVECTOR_SQL}, tsq) AS score
+                FROM jobs,
+                     CAST(replace(CAST(plainto_tsquery('english', q.query) AS text), '&', '|') AS tsquery) AS tsq
+                WHERE {JOB_TSVECTOR_SQL} @@ tsq {candidate_filter}
+                ORDER BY score DESC, jobs.id
+                LIMIT :top_k
+            ) AS hit
+            ORDER BY q.n, hit.score DESC, hit.id
+        """), params).all()
+
+        results = [[] for _ in queries]
+        for row in rows:
+            results[row.query_index - 1].append({"job_id": row.job_id, "score": float(row.score)})
+        return results
+
+    def search(self, query: str, top_k=10, candidate_ids: Optional[Iterable[str]] = None):
+        return self.search_batch([query], top_k=top_k, candidate_ids=candidate_ids)[0]
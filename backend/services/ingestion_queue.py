@@ -0,0 +1,301 @@
+# services/ingestion_queue.py
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import threading
+import heapq
+import queue
+import time
+import os
+
+from services.job_ingestor import JobIngestor
+
+
+# Jobs embedded per worker batch, and how long to wait for a batch to fill
+INGEST_BATCH_JOBS = int(os.getenv("INGEST_BATCH_JOBS", "32"))
+INGEST_BATCH_WAIT = float(os.getenv("INGEST_BATCH_WAIT", "0.5"))        # seconds
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "4"))
+INGEST_RETRY_BACKOFF = float(os.getenv("INGEST_RETRY_BACKOFF", "2.0"))  # seconds, doubled per attempt
+# Per-job statuses kept for the status endpoint
+INGEST_STATUS_HISTORY = int(os.getenv("INGEST_STATUS_HISTORY", "5000"))
+
+
+class IngestionQueue:
+    """
+    In-process queue that chunks + embeds job descriptions into the
+    'job_chunks' collection on a background thread.
+    - enqueue() returns immediately; callers have already stored the Job rows
+    - the worker drains up to batch_jobs jobs at a time and embeds them together
+    - jobs of a failed batch are retried individually with exponential
+      backoff, up to max_attempts, then marked "failed"
+    A job counts as unfinished (Queue.unfinished_tasks) from enqueue until it
+    is done, failed or discarded, including while it waits for a retry.
+    Pending work lives in memory only: jobs still unfinished when stop()
+    times out can be recovered with /jobs/reindex-all.
+    """
+
+    def __init__(
+        self,
+        batch_jobs: int = INGEST_BATCH_JOBS,
+        batch_wait: float = INGEST_BATCH_WAIT,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+        retry_backoff: float = INGEST_RETRY_BACKOFF,
+        history: int = INGEST_STATUS_HISTORY
+    ):
+        self.batch_jobs = batch_jobs
+        self.batch_wait = batch_wait
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.history = history
+
+        self.ingestor = JobIngestor()
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._retries: List[tuple] = []      # heap of (due, seq, item)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._statuses: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._counters = {"enqueued": 0, "done": 0, "failed": 0, "retries": 0, "chunks": 0}
+        self._in_flight = 0
+        self._discarded = set()              # ids of jobs deleted while pending
+        self._last_error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._draining = threading.Event()   # stop() in progress: retries are due now
+        self._thread: Optional[threading.Thread] = None
+
+    # ----------------------------------------
+    # Producer side
+    # ----------------------------------------
+    def enqueue(self, jobs: List[Dict[str, Any]]) -> int:
+        """
+        jobs: [{"id", "description"}, ...]. Jobs without a description are skipped.
+        Returns the number of jobs queued.
+        """
+        count = 0
+        for job in jobs:
+            if not job.get("description"):
+                continue
+            item = {"id": job["id"], "description": job["description"], "attempts": 0}
+            self._set_status(item["id"], "queued", attempts=0)
+            self._queue.put(item)
+            count += 1
+
+        if count:
+            with self._lock:
+                self._counters["enqueued"] += count
+            self.start()
+        return count
+
+    def discard(self, job_ids: List[str]):
+        """
+        Called when jobs are deleted: pending work for them is dropped, and
+        chunks of a batch already in flight are removed once it lands.
+        """
+        pending = ("queued", "embedding", "retrying")
+        with self._lock:
+            for job_id in job_ids:
+                if (self._statuses.get(job_id) or {}).get("status") in pending:
+                    self._discarded.add(job_id)
+
+    def _take_discarded(self, batch: List[Dict[str, Any]]) -> List[str]:
+        with self._lock:
+            ids = [item["id"] for item in batch if item["id"] in self._discarded]
+            self._discarded.difference_update(ids)
+        for job_id in ids:
+            self._set_status(job_id, "discarded")
+        return ids
+
+    def _finish(self, count: int = 1):
+        """Marks count items done, failed or discarded."""
+        for _ in range(count):
+            self._queue.task_done()
+
+    # ----------------------------------------
+    # Worker
+    # ----------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._draining.clear()
+            self._thread = threading.Thread(target=self._run, name="job-ingestion", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Lets the worker finish everything unfinished (up to timeout), then
+        stops it. Pending retries run right away instead of after their backoff.
+        """
+        thread = self._thread
+        if thread is None:
+            return
+        self._draining.set()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self._queue.unfinished_tasks:
+            time.sleep(0.05)
+        self._stop.set()
+        thread.join(timeout=max(0.0, deadline - time.monotonic()) + 1.0)
+
+        left = self._queue.unfinished_tasks
+        if left:
+            print(f"[IngestionQueue] Warning: Stopped with {left} jobs not embedded; recover them with /jobs/reindex-all")
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._process(batch)
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        # Retries go one job at a time, so a bad description only fails itself
+        retry = self._due_retry()
+        if retry is not None:
+            return [retry]
+
+        # Block for the first item (bounded so retries / stop are noticed)
+        try:
+            batch = [self._take(timeout=self._wait_for_retry())]
+        except queue.Empty:
+            return []
+
+        # Then let the batch fill for up to batch_wait
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_jobs:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._take(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _take(self, timeout: float) -> Dict[str, Any]:
+        item = self._queue.get(timeout=timeout)
+        with self._lock:
+            self._in_flight += 1
+        return item
+
+    def _due_retry(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._retries and (self._draining.is_set() or self._retries[0][0] <= time.monotonic()):
+                self._in_flight += 1
+                return heapq.heappop(self._retries)[2]
+        return None
+
+    def _wait_for_retry(self) -> float:
+        with self._lock:
+            if not self._retries:
+                return 1.0
+            if self._draining.is_set():
+                return 0.0
+            return min(1.0, max(0.0, self._retries[0][0] - time.monotonic()))
+
+    def _process(self, batch: List[Dict[str, Any]]):
+        # Counted in flight since _next_batch took them off the queue
+        taken = len(batch)
+        try:
+            # Skip jobs deleted while they were waiting
+            dropped = set(self._take_discarded(batch))
+            batch = [item for item in batch if item["id"] not in dropped]
+            self._finish(len(dropped))
+            if not batch:
+                return
+
+            for item in batch:
+                item["attempts"] += 1
+                self._set_status(item["id"], "embedding", attempts=item["attempts"])
+
+            try:
+                result = self.ingestor.sync_jobs(batch)
+            except Exception as e:
+                self._on_failure(batch, e)
+                return
+
+            with self._lock:
+                self._counters["done"] += len(batch)
+                self._counters["chunks"] += result["added"]
+            for item in batch:
+                self._set_status(
+                    item["id"], "done",
+                    attempts=item["attempts"], chunks=result["chunks_per_job"].get(item["id"], 0), error=None
+                )
+            self._finish(len(batch))
+            print(f"[IngestionQueue] Embedded {len(batch)} jobs ({result['added']} new chunks, {result['unchanged']} unchanged)")
+
+            # Deleted while this batch was embedding
+            late = self._take_discarded(batch)
+            if late:
+                try:
+                    self.ingestor.remove_jobs(late)
+                except Exception as e:
+                    print(f"[IngestionQueue] Warning: Failed to remove chunks of deleted jobs {late}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight -= taken
+
+    def _on_failure(self, batch: List[Dict[str, Any]], error: Exception):
+        message = f"{type(error).__name__}: {error}"
+        print(f"[IngestionQueue] Warning: Failed to embed {len(batch)} jobs: {message}")
+
+        with self._lock:
+            self._last_error = message
+
+        for item in batch:
+            if item["attempts"] >= self.max_attempts:
+                with self._lock:
+                    self._counters["failed"] += 1
+                self._set_status(item["id"], "failed", attempts=item["attempts"], error=message)
+                self._finish()
+                continue
+
+            delay = self.retry_backoff * (2 ** (item["attempts"] - 1))
+            with self._lock:
+                self._counters["retries"] += 1
+                self._seq += 1
+                heapq.heappush(self._retries, (time.monotonic() + delay, self._seq, item))
+            self._set_status(item["id"], "retrying", attempts=item["attempts"], error=message)
+
+    # ----------------------------------------
+    # Status
+    # ----------------------------------------
+    def _set_status(self, job_id: str, status: str, **fields):
+        with self._lock:
+            entry = self._statuses.pop(job_id, None) or {"job_id": job_id}
+            entry.update(fields, status=status, updated_at=time.time())
+            self._statuses[job_id] = entry
+            while len(self._statuses) > self.history:
+                self._statuses.popitem(last=False)
+
+    def job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._statuses.get(job_id)
+            return dict(entry) if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "queued": self._queue.qsize(),
+                "retry_pending": len(self._retries),
+                "in_flight": self._in_flight,
+                **self._counters,
+                "last_error": self._last_error,
+            }
+
+
+# ==========================================================
+# Process-wide queue
+# ==========================================================
+_ingestion_queue: Optional[IngestionQueue] = None
+_ingestion_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    global _ingestion_queue
+    with _ingestion_queue_lock:
+        if _ingestion_queue is None:
+            _ingestion_queue = IngestionQueue()
+        return _ingestion_queue
@@ -1,10 +1,39 @@
 # services/job_ingestor.py
 
-from typing import List
-from services.text_cleaner import TextCleaner
-from services.embedding import EmbeddingService
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+import os
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from models.job_model import Job
+from models.migrations import NON_TAVILY_JOBS, TAVILY_JOBS
+from services.text_cleaner import TextCleaner
+from services.embedding import get_embedding_service
+from services.tfidf_search import get_job_index
+
+
+# Chunks per Chroma add_documents call (one embedding request each)
+EMBED_BATCH_SIZE = int(os.getenv("JOB_EMBED_BATCH_SIZE", "100"))
+# Embed new jobs on the background ingestion queue instead of in the request
+INGEST_IN_BACKGROUND = os.getenv("INGEST_IN_BACKGROUND", "1") != "0"
+
+JOB_FIELDS = (
+    "title", "company", "location", "employment_type", "experience_level",
+    "skills", "description", "salary_range", "url", "posted_date", "source"
+)
+
+# Rows a dedupe key is unique among (the partial unique indexes' predicates,
+# so the existing-job lookup can use them)
+DEDUPE_SCOPES = {
+    ("title", "company"): NON_TAVILY_JOBS,
+    ("url",): TAVILY_JOBS,
+}
+
 
 class JobIngestor:
     """
@@ -12,6 +41,7 @@ class JobIngestor:
     - Cleans JD text
     - Chunks JD
     - Embeds chunks into Chroma with metadata { job_id, chunk_index }
+      under deterministic ids (see services.embedding.chunk_id)
     - Used when creating or updating job postings
     """
 
@@ -21,38 +51,193 @@ class JobIngestor:
             chunk_overlap=chunk_overlap
         )
 
-    def ingest_job(self, job_id: str, job_description: str):
+    def chunk_job(self, job_id: str, job_description: str) -> List[Document]:
         """
-        Main method to store job description into Chroma vector DB.
+        Cleans + splits one JD into Documents tagged with { job_id, chunk_index }.
         """
-
-        # 1. Clean text
         cleaned = TextCleaner.clean_text(job_description)
-
-        # 2. Create chunks
         chunks = self.splitter.split_text(cleaned)
 
-        # 3. Embed chunks into Chroma under 'job_chunks'
-        embedder = EmbeddingService(collection_name="job_chunks")
+        return [
+            Document(page_content=chunk, metadata={"job_id": job_id, "chunk_index": idx})
+            for idx, chunk in enumerate(chunks)
+        ]
 
+    def embed_documents(self, docs: List[Document], batch_size: int = EMBED_BATCH_SIZE):
+        """
+        Upserts chunk Documents into the 'job_chunks' collection in batches,
+        under their deterministic chunk ids.
+        """
+        if not docs:
+            return
+
+        embedder = get_embedding_service(collection_name="job_chunks")
+        embedder.upsert_documents(docs, "job_id", batch_size)
+
+    def sync_jobs(self, jobs: List[Dict[str, Any]], batch_size: int = EMBED_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        Brings the stored chunks of these jobs ({"id", "description"}) in
+        line with their current descriptions (see EmbeddingService.sync_documents):
+        unchanged chunks are skipped, new ones embedded, stale ones deleted.
+        """
         docs = []
-        for idx, chunk in enumerate(chunks):
-            docs.append({
-                "page_content": chunk,
-                "metadata": {
-                    "job_id": job_id,
-                    "chunk_index": idx
-                }
-            })
-
-        # Convert to LangChain Document objects
-        from langchain_core.documents import Document
-        docs = [Document(page_content=d["page_content"], metadata=d["metadata"]) for d in docs]
-
-        embedder.vectorstore.add_documents(docs)
-        # Note: persist() is deprecated in Chroma 0.4.x - docs are automatically persisted
+        chunks_per_job = {}
+        for job in jobs:
+            job_docs = self.chunk_job(job["id"], job["description"]) if job.get("description") else []
+            chunks_per_job[job["id"]] = len(job_docs)
+            docs.extend(job_docs)
+
+        embedder = get_embedding_service(collection_name="job_chunks")
+        result = embedder.sync_documents("job_id", [job["id"] for job in jobs], docs, batch_size)
+
+        return {**result, "chunks_per_job": chunks_per_job}
+
+    def remove_jobs(self, job_ids: List[str]) -> int:
+        """
+        Deletes every stored chunk of these jobs. Returns the number removed.
+        """
+        embedder = get_embedding_service(collection_name="job_chunks")
+        return embedder.delete_owner("job_id", list(job_ids))
+
+    def ingest_job(self, job_id: str, job_description: str):
+        """
+        Main method to store job description into Chroma vector DB.
+        """
+        result = self.sync_jobs([{"id": job_id, "description": job_description}])
 
         return {
-            "num_chunks": len(chunks),
+            "num_chunks": result["chunks_per_job"][job_id],
             "job_id": job_id
         }
+
+    def ingest_many(
+        self,
+        db: Session,
+        jobs: List[Dict[str, Any]],
+        dedupe_on: Sequence[str] = ("title", "company"),
+        background: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Bulk path for search results:
+        1. one query to find jobs already stored (matched on dedupe_on columns)
+        2. one transaction inserting every new job
+        3. one TF-IDF index update
+        4. batched embedding of all new jobs' chunks, either handed to the
+           background ingestion queue (default, see INGEST_IN_BACKGROUND)
+           or done inline
+
+        jobs: dicts with Job column values (title, company, description, url, ...).
+        Returns:
+            job_ids      - stored id per input job (existing or newly created)
+            new_job_ids  - ids inserted by this call
+            num_chunks   - chunks embedded inline (0 when queued)
+            queued       - jobs handed to the ingestion queue
+        """
+        if not jobs:
+            return {"job_ids": [], "new_job_ids": [], "num_chunks": 0, "queued": 0}
+
+        dedupe_on = tuple(dedupe_on)
+        keys = [tuple(job.get(col) for col in dedupe_on) for job in jobs]
+
+        # ----------------------------------------
+        # 1. Existing jobs (single query)
+        # ----------------------------------------
+        for attempt in range(2):
+            existing = self._find_existing(db, dedupe_on, set(keys))
+
+            # ----------------------------------------
+            # 2. Insert new jobs (single commit)
+            # ----------------------------------------
+            job_ids = []
+            new_records = []
+            # Taken from the inputs: the records expire on commit, and reading
+            # them back afterwards would cost one SELECT per job
+            new_jobs = []
+            for key, job in zip(keys, jobs):
+                job_id = existing.get(key)
+                if job_id is None:
+                    job_id = job.get("id") or str(uuid4())
+                    existing[key] = job_id     # duplicates within the batch map to the first
+                    new_records.append(Job(id=job_id, **{f: job.get(f) for f in JOB_FIELDS if f in job}))
+                    new_jobs.append({"id": job_id, "title": job.get("title"), "description": job.get("description") or ""})
+                job_ids.append(job_id)
+
+            if not new_records:
+                break
+
+            try:
+                db.add_all(new_records)
+                db.commit()
+                break
+            except IntegrityError:
+                # Another writer stored some of these keys after our lookup; look again
+                db.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.rollback()
+                raise
+
+        print(f"[JobIngestor] {len(jobs)} jobs: {len(new_records)} new, {len(jobs) - len(new_records)} existing")
+
+        # ----------------------------------------
+        # 3. Keyword index
+        # ----------------------------------------
+        get_job_index().add_jobs(new_jobs)
+
+        # ----------------------------------------
+        # 4. Batched embedding
+        # ----------------------------------------
+        if background is None:
+            background = INGEST_IN_BACKGROUND
+
+        if background:
+            # Local import: ingestion_queue builds on this module
+            from services.ingestion_queue import get_ingestion_queue
+            return {
+                "job_ids": job_ids,
+                "new_job_ids": [job["id"] for job in new_jobs],
+                "num_chunks": 0,
+                "queued": get_ingestion_queue().enqueue(new_jobs)
+            }
+
+        num_chunks = 0
+        try:
+            docs = []
+            for job in new_jobs:
+                if job["description"]:
+                    docs.extend(self.chunk_job(job["id"], job["description"]))
+            self.embed_documents(docs)
+            num_chunks = len(docs)
+        except Exception as e:
+            print(f"[JobIngestor] Warning: Failed to embed {len(new_jobs)} new jobs: {e}")
+
+        return {
+            "job_ids": job_ids,
+            "new_job_ids": [job["id"] for job in new_jobs],
+            "num_chunks": num_chunks,
+            "queued": 0
+        }
+
+    @staticmethod
+    def _find_existing(db: Session, dedupe_on: Tuple[str, ...], keys: set) -> Dict[tuple, str]:
+        keys = [key for key in keys if all(value is not None for value in key)]
+        if not keys:
+            return {}
+
+        columns = [getattr(Job, col) for col in dedupe_on]
+        query = db.query(Job.id, *columns)
+
+        if len(columns) == 1:
+            query = query.filter(columns[0].in_([key[0] for key in keys]))
+        else:
+            query = query.filter(tuple_(*columns).in_(keys))
+
+        scope = DEDUPE_SCOPES.get(dedupe_on)
+        if scope:
+            query = query.filter(text(f"({scope})"))
+
+        found = {}
+        for row in query.all():
+            found.setdefault(tuple(row[1:]), row[0])
+        return found
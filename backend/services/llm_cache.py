@@ -0,0 +1,252 @@
+# services/llm_cache.py
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from typing import Any, Dict, Optional, Tuple
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(BASE_DIR, "data", "llm_cache", "llm_cache.sqlite3")
+)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+
+class LLMResponseStore:
+    """
+    SQLite table of serialized LLM generations.
+    Entries expire after ttl seconds; past max_mb the least recently used
+    rows are evicted (down to ~90% of the cap).
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_mb: float = LLM_CACHE_MAX_MB
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_namespace ON llm_responses(namespace)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM llm_responses").fetchone()
+        self._bytes = int(row[0])
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._delete([key])
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def put(self, key: str, namespace: str, value: str):
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT LENGTH(value) FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, namespace, value, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, namespace, value, now, now)
+            )
+            self._bytes += len(value) - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def clear(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._conn.execute("DELETE FROM llm_responses")
+            else:
+                self._conn.execute("DELETE FROM llm_responses WHERE namespace = ?", (namespace,))
+            self._conn.commit()
+            row = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM llm_responses").fetchone()
+            self._bytes = int(row[0])
+
+    def _delete(self, keys):
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM llm_responses WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchone()
+            self._conn.execute(
+                f"DELETE FROM llm_responses WHERE key IN ({','.join('?' * len(batch))})", batch
+            )
+            self._bytes -= int(rows[0])
+
+    def _evict(self):
+        # Expired rows first, then least recently used until under ~90% of the cap
+        if self.ttl:
+            expired = [
+                key for (key,) in self._conn.execute(
+                    "SELECT key FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl,)
+                )
+            ]
+            if expired:
+                self._delete(expired)
+
+        if self._bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        drop = []
+        freed = 0
+        for key, size in self._conn.execute(
+            "SELECT key, LENGTH(value) FROM llm_responses ORDER BY last_used ASC"
+        ):
+            if self._bytes - freed <= target:
+                break
+            drop.append(key)
+            freed += size
+        self._delete(drop)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes": self._bytes,
+            }
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache (pass as ChatGoogleGenerativeAI(cache=...)) over a
+    shared LLMResponseStore. Keys are sha256 of
+    (namespace, prompt version, llm_string, rendered prompt):
+    llm_string carries the model name and sampling params (temperature,
+    max tokens, mime type), the rendered prompt carries the inputs.
+    Bumping the prompt version invalidates a namespace's entries.
+    """
+
+    def __init__(self, store: LLMResponseStore, namespace: str, version: str):
+        self.store = store
+        self.namespace = namespace
+        self.version = version
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        payload = f"{self.namespace}\x00{self.version}\x00{llm_string}\x00{prompt}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.store.get(self._key(prompt, llm_string))
+        if value is None:
+            return None
+        try:
+            return [_decode_generation(gen) for gen in json.loads(value)]
+        except Exception as e:
+            print(f"[LLMCache] Warning: Ignoring unreadable entry in {self.namespace}: {e}")
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        try:
+            value = json.dumps([_encode_generation(gen) for gen in return_val])
+        except Exception as e:
+            print(f"[LLMCache] Warning: Could not serialize response for {self.namespace}: {e}")
+            return
+        self.store.put(self._key(prompt, llm_string), self.namespace, value)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear(self.namespace)
+
+
+def _encode_generation(gen: Generation) -> Dict[str, Any]:
+    if isinstance(gen, ChatGeneration):
+        return {"message": message_to_dict(gen.message)}
+    return {"text": gen.text}
+
+
+def _decode_generation(data: Dict[str, Any]) -> Generation:
+    if "message" not in data:
+        return Generation(text=data["text"])
+
+    message = messages_from_dict([data["message"]])[0]
+    # A cache hit costs no tokens; flag it for the metrics handler
+    if hasattr(message, "usage_metadata"):
+        message.usage_metadata = None
+    message.response_metadata = {**message.response_metadata, "cache_hit": True}
+    return ChatGeneration(message=message)
+
+
+# ==========================================================
+# Shared store + per-prompt caches
+# ==========================================================
+_store: Optional[LLMResponseStore] = None
+_caches: Dict[Tuple[str, str], LLMResponseCache] = {}
+_lock = threading.Lock()
+
+
+def get_llm_response_store() -> LLMResponseStore:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = LLMResponseStore()
+        return _store
+
+
+def get_llm_cache(namespace: str, version: str) -> Optional[LLMResponseCache]:
+    """
+    Cache for one prompt (namespace) at a given prompt version, or None
+    when LLM_CACHE_ENABLED=0 (the model then runs uncached).
+    """
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    store = get_llm_response_store()
+    with _lock:
+        cache = _caches.get((namespace, version))
+        if cache is None:
+            cache = _caches[(namespace, version)] = LLMResponseCache(store, namespace, version)
+        return cache
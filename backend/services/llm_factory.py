@@ -0,0 +1,97 @@
+# services/llm_factory.py
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.runnables import Runnable
+from typing import Any, Optional
+import hashlib
+import os
+
+from services.metrics import llm_metrics_handler
+from services.llm_cache import get_llm_cache
+from services.client_pool import KeyedLRUPool
+
+
+DEFAULT_CHAT_MODEL = "gemini-2.5-flash"
+
+# Pool bounds for get_chat_model() / get_llm_chain()
+MAX_POOLED_CLIENTS = int(os.getenv("LLM_CLIENT_POOL_SIZE", "64"))
+POOLED_CLIENT_TTL = float(os.getenv("LLM_CLIENT_POOL_TTL", "1800"))  # seconds idle
+
+
+_clients = KeyedLRUPool(MAX_POOLED_CLIENTS, POOLED_CLIENT_TTL)
+_chains = KeyedLRUPool(MAX_POOLED_CLIENTS, POOLED_CLIENT_TTL)
+
+
+def _key_hash(api_key: str) -> str:
+    # Never keep raw API keys around as dict keys
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+
+def get_chat_model(
+    google_api_key: str,
+    namespace: str,
+    prompt_version: str = "1",
+    model: str = DEFAULT_CHAT_MODEL,
+    temperature: float = 0.0,
+    cache: Optional[bool] = None,
+    **options: Any
+) -> ChatGoogleGenerativeAI:
+    """
+    Shared ChatGoogleGenerativeAI client, so HTTP / gRPC connections are
+    reused across calls. Keyed by (api key hash, model, temperature,
+    output options such as response_mime_type / max_output_tokens, cache
+    namespace + prompt version). The client carries the metrics callback
+    and, if cached, the namespace's response cache.
+
+    cache defaults to temperature == 0.0, so sampled drafts a user may re-run
+    for a different version (cover letter, improved resume) are never frozen
+    or stored on disk. Scoring chains opt in with cache=True.
+    """
+    if cache is None:
+        cache = temperature == 0.0
+
+    key = (
+        _key_hash(google_api_key), model, temperature,
+        tuple(sorted(options.items())), namespace, prompt_version, cache
+    )
+
+    return _clients.get_or_create(key, lambda: ChatGoogleGenerativeAI(
+        model=model,
+        temperature=temperature,
+        google_api_key=google_api_key,
+        callbacks=[llm_metrics_handler],
+        cache=get_llm_cache(namespace, prompt_version) if cache else False,
+        **options
+    ))
+
+
+def get_llm_chain(
+    namespace: str,
+    prompt,
+    parser,
+    google_api_key: str,
+    prompt_version: str = "1",
+    model: str = DEFAULT_CHAT_MODEL,
+    temperature: float = 0.0,
+    cache: Optional[bool] = None,
+    **options: Any
+) -> Runnable:
+    """
+    Prebuilt `prompt | llm | parser` chain for one prompt, reused across
+    calls. prompt / parser are the module-level constants of the calling
+    agent; namespace names both the chain and its response cache
+    (see get_chat_model for when it is used).
+    """
+    key = (
+        namespace, prompt_version, _key_hash(google_api_key), model, temperature,
+        tuple(sorted(options.items())), cache
+    )
+
+    def build():
+        llm = get_chat_model(
+            google_api_key, namespace, prompt_version,
+            model=model, temperature=temperature, cache=cache, **options
+        )
+        return prompt | llm | parser
+
+    return _chains.get_or_create(key, build)
@@ -0,0 +1,286 @@
+# services/metrics.py
+
+from langchain_core.callbacks import BaseCallbackHandler
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+import threading
+import inspect
+import time
+
+
+# Histogram buckets for stage durations (seconds)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics store rendered in the Prometheus text
+    exposition format (see render()). Two metric families:
+    - careerpilot_stage_duration_seconds (histogram) by kind / name / status
+      where kind is one of node, llm, chroma, embedding, vector_index, db
+    - careerpilot_llm_tokens_total (counter) by model / direction
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., count, sum]
+        self._durations: Dict[LabelKey, List[float]] = {}
+        self._tokens: Dict[LabelKey, int] = {}
+
+    def observe(self, kind: str, name: str, seconds: float, status: str = "ok"):
+        key = (("kind", kind), ("name", name), ("status", status))
+        with self._lock:
+            series = self._durations.get(key)
+            if series is None:
+                series = self._durations[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def add_tokens(self, model: str, input_tokens: int, output_tokens: int):
+        with self._lock:
+            for direction, count in (("input", input_tokens), ("output", output_tokens)):
+                if count:
+                    key = (("model", model), ("direction", direction))
+                    self._tokens[key] = self._tokens.get(key, 0) + int(count)
+
+    def render(self) -> str:
+        def fmt(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = []
+            for k, v in labels + extra:
+                v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+                pairs.append(f'{k}="{v}"')
+            return "{" + ",".join(pairs) + "}"
+
+        lines = [
+            "# HELP careerpilot_stage_duration_seconds Wall time of graph nodes and external calls.",
+            "# TYPE careerpilot_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for labels, series in sorted(self._durations.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"careerpilot_stage_duration_seconds_bucket{fmt(labels, (('le', repr(bound)),))} {count}")
+                lines.append(f"careerpilot_stage_duration_seconds_bucket{fmt(labels, (('le', '+Inf'),))} {series[-2]}")
+                lines.append(f"careerpilot_stage_duration_seconds_count{fmt(labels)} {series[-2]}")
+                lines.append(f"careerpilot_stage_duration_seconds_sum{fmt(labels)} {series[-1]:.6f}")
+
+            lines.append("# HELP careerpilot_llm_tokens_total Gemini tokens used, by model and direction.")
+            lines.append("# TYPE careerpilot_llm_tokens_total counter")
+            for labels, count in sorted(self._tokens.items()):
+                lines.append(f"careerpilot_llm_tokens_total{fmt(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ==========================================================
+# Per-request timings
+# ==========================================================
+_request_timings: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "careerpilot_request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings():
+    """
+    Collects every record() made in this context (including graph nodes run
+    in worker threads / tasks, which inherit the context) into a list.
+    """
+    timings: List[Dict[str, Any]] = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        try:
+            _request_timings.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned stream)
+            pass
+
+
+def record(kind: str, name: str, seconds: float, status: str = "ok", **extra):
+    registry.observe(kind, name, seconds, status)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append({
+            "kind": kind,
+            "name": name,
+            "ms": round(seconds * 1000, 2),
+            "status": status,
+            **extra
+        })
+
+
+@contextmanager
+def track(kind: str, name: str):
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record(kind, name, time.perf_counter() - start, status)
+
+
+def summarize_timings(timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Response-friendly view: the raw events plus total ms per kind.
+    """
+    totals: Dict[str, float] = {}
+    for t in timings:
+        totals[t["kind"]] = round(totals.get(t["kind"], 0.0) + t["ms"], 2)
+    return {"totals_ms": totals, "events": list(timings)}
+
+
+# ==========================================================
+# Graph node wrapper
+# ==========================================================
+def traced_node(name: str, func):
+    """
+    Wraps a graph node function (sync or async) with a "node" timing.
+    The wrapper only takes `config` if the wrapped function does, so
+    LangGraph keeps passing RunnableConfig exactly as before.
+    """
+    takes_config = "config" in inspect.signature(func).parameters
+
+    if inspect.iscoroutinefunction(func):
+        if takes_config:
+            async def wrapper(state, config=None):
+                with track("node", name):
+                    return await func(state, config=config)
+        else:
+            async def wrapper(state):
+                with track("node", name):
+                    return await func(state)
+    else:
+        if takes_config:
+            def wrapper(state, config=None):
+                with track("node", name):
+                    return func(state, config=config)
+        else:
+            def wrapper(state):
+                with track("node", name):
+                    return func(state)
+
+    wrapper.__name__ = getattr(func, "__name__", name)
+    return wrapper
+
+
+# ==========================================================
+# Gemini calls (LangChain callbacks)
+# ==========================================================
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler attached to ChatGoogleGenerativeAI clients: records
+    latency, status and token usage of every LLM call.
+    """
+
+    # Run in the caller's context so per-request timings see the call
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[Any, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, serialized, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = (
+            params.get("model")
+            or (kwargs.get("metadata") or {}).get("ls_model_name")
+            or ((serialized or {}).get("kwargs") or {}).get("model")
+            or "unknown"
+        )
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), str(model))
+
+    def _finish(self, run_id, status: str, input_tokens: int = 0, output_tokens: int = 0):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, model = started
+
+        registry.add_tokens(model, input_tokens, output_tokens)
+        record(
+            "llm", model, time.perf_counter() - start, status,
+            input_tokens=input_tokens, output_tokens=output_tokens
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, serialized, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        input_tokens = output_tokens = 0
+        cache_hit = False
+        for generations in response.generations:
+            for gen in generations:
+                message = getattr(gen, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+                cache_hit = cache_hit or bool((getattr(message, "response_metadata", None) or {}).get("cache_hit"))
+        self._finish(run_id, "cached" if cache_hit else "ok", input_tokens, output_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "error")
+
+
+llm_metrics_handler = LLMMetricsHandler()
+
+
+# ==========================================================
+# Database queries (SQLAlchemy engine events)
+# ==========================================================
+_db_instrumented = set()
+
+
+def instrument_engine(engine):
+    """
+    Times every cursor execution on the engine, labelled by statement
+    verb (SELECT / INSERT / UPDATE / ...).
+    """
+    from sqlalchemy import event
+
+    if id(engine) in _db_instrumented:
+        return
+    _db_instrumented.add(id(engine))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            record("db", _statement_verb(statement), time.perf_counter() - starts.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("metrics_query_start") if conn is not None else None
+        if starts:
+            record(
+                "db", _statement_verb(exception_context.statement or ""),
+                time.perf_counter() - starts.pop(), "error"
+            )
+
+
+def _statement_verb(statement: str) -> str:
+    parts = statement.split(None, 1)
+    return parts[0].upper() if parts else "UNKNOWN"
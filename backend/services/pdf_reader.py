@@ -42,4 +42,13 @@ class PDFReader:
             return [chunk.page_content for chunk in chunks]
 
         except Exception as e:
-            raise RuntimeError(f"Error chunking PDF: {e}")
\ No newline at end of file
+            raise RuntimeError(f"Error chunking PDF: {e}")
+
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split already-extracted resume text with the same splitter as extract_chunks.
+
+        :param text: Resume text
+        :return: List of text chunks
+        """
+        return self.text_splitter.split_text(text)
@@ -0,0 +1,107 @@
+# services/rank_fusion.py
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import os
+
+
+# weighted (score fusion) or rrf (reciprocal rank fusion)
+SEARCH_FUSION = os.getenv("SEARCH_FUSION", "weighted").lower()
+# Candidates taken from each retriever before fusion
+SEARCH_CANDIDATE_POOL = int(os.getenv("SEARCH_CANDIDATE_POOL", "50"))
+# Retriever weights, in retriever order (keyword, semantic)
+SEARCH_FUSION_WEIGHTS = tuple(float(w) for w in os.getenv("SEARCH_FUSION_WEIGHTS", "0.5,0.5").split(","))
+# Weighted fusion: per-pool score normalization, max or minmax
+SEARCH_FUSION_NORMALIZATION = os.getenv("SEARCH_FUSION_NORMALIZATION", "max").lower()
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# (id, score) pairs, best first
+Ranking = List[Tuple[str, float]]
+
+
+def normalize_scores(ranking: Ranking, method: str = "max") -> Dict[str, float]:
+    """
+    Maps one retriever's pool scores onto [0, 1]:
+    max    -> score / best score
+    minmax -> (score - worst) / (best - worst)
+    """
+    if not ranking:
+        return {}
+
+    values = [score for _, score in ranking]
+    high = max(values)
+
+    if method == "minmax":
+        low = min(values)
+        if high > low:
+            return {doc_id: (score - low) / (high - low) for doc_id, score in ranking}
+        return {doc_id: 1.0 for doc_id, _ in ranking}
+
+    if high > 0:
+        return {doc_id: score / high for doc_id, score in ranking}
+    return {doc_id: score for doc_id, score in ranking}
+
+
+def weighted_fusion(
+    rankings: Sequence[Ranking],
+    weights: Sequence[float],
+    normalization: str = "max"
+) -> Dict[str, float]:
+    """
+    sum(weight_i * normalized score_i) over the retrievers that returned the id.
+    """
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for doc_id, score in normalize_scores(ranking, normalization).items():
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * score
+    return fused
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Ranking],
+    weights: Optional[Sequence[float]] = None,
+    k: int = RRF_K
+) -> Dict[str, float]:
+    """
+    sum(weight_i / (k + rank_i)), scaled so an id ranked first by every
+    retriever scores 1.0. Only ranks are used, so retrievers with
+    incomparable score scales fuse without calibration.
+    """
+    weights = weights or [1.0] * len(rankings)
+    best = sum(weights) / (k + 1)
+
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+
+    if best > 0:
+        fused = {doc_id: score / best for doc_id, score in fused.items()}
+    return fused
+
+
+def fuse(
+    rankings: Sequence[Ranking],
+    top_k: int = 10,
+    method: Optional[str] = None,
+    weights: Optional[Sequence[float]] = None,
+    normalization: Optional[str] = None,
+    rrf_k: Optional[int] = None
+) -> Ranking:
+    """
+    Fuses candidate pools from several retrievers and returns the top_k
+    (id, score) pairs. Only ids present in some pool are scored, so the
+    cost depends on the pool sizes, not on the corpus.
+    """
+    method = method or SEARCH_FUSION
+    weights = weights or SEARCH_FUSION_WEIGHTS
+
+    if method == "rrf":
+        fused = reciprocal_rank_fusion(rankings, weights, rrf_k or RRF_K)
+    elif method == "weighted":
+        fused = weighted_fusion(rankings, weights, normalization or SEARCH_FUSION_NORMALIZATION)
+    else:
+        raise ValueError(f"Unknown fusion method: {method}")
+
+    # Ties keep first-seen order (keyword pool first)
+    return heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
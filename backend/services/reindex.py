@@ -0,0 +1,327 @@
+# services/reindex.py
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+import threading
+import json
+import time
+import os
+
+from sqlalchemy import func
+
+from models.database import SessionLocal
+from models.job_model import Job
+from services.job_ingestor import JobIngestor
+from services.vector_index import rebuild_job_vector_index
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REINDEX_STATE_DIR = os.getenv("REINDEX_STATE_DIR", os.path.join(BASE_DIR, "data", "reindex"))
+REINDEX_PAGE_SIZE = int(os.getenv("REINDEX_PAGE_SIZE", "200"))     # jobs read per DB page
+REINDEX_BATCH_JOBS = int(os.getenv("REINDEX_BATCH_JOBS", "20"))    # jobs per sync_jobs() call
+REINDEX_WORKERS = int(os.getenv("REINDEX_WORKERS", "4"))
+# Errors kept on a run (the counters always cover everything)
+MAX_RECORDED_ERRORS = 50
+
+
+class ReindexRun:
+    """
+    Handle + checkpoint of one reindex pass over the jobs table.
+    Saved as JSON after every page, so a run interrupted by a crash or
+    restart can be resumed after last_job_id. Jobs of failed batches are
+    kept in failed_job_ids until a later attempt syncs them.
+    """
+
+    FIELDS = (
+        "id", "status", "created_at", "updated_at", "finished_at",
+        "last_job_id", "total_jobs", "processed_jobs", "failed_jobs",
+        "added_chunks", "unchanged_chunks", "removed_chunks", "errors",
+        "failed_job_ids"
+    )
+
+    def __init__(self, run_id: Optional[str] = None):
+        now = time.time()
+        self.id = run_id or str(uuid4())
+        self.status = "pending"     # pending, running, completed, cancelled, failed, interrupted
+        self.created_at = now
+        self.updated_at = now
+        self.finished_at: Optional[float] = None
+        self.last_job_id: Optional[str] = None
+        self.total_jobs = 0
+        self.processed_jobs = 0
+        self.failed_jobs = 0
+        self.added_chunks = 0
+        self.unchanged_chunks = 0
+        self.removed_chunks = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.failed_job_ids: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data["progress"] = round(self.processed_jobs / self.total_jobs, 4) if self.total_jobs else 0.0
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReindexRun":
+        run = cls(data["id"])
+        for field in cls.FIELDS:
+            if field in data:
+                setattr(run, field, data[field])
+        return run
+
+
+class ReindexEngine:
+    """
+    Rebuilds the 'job_chunks' collection from the jobs table:
+    - streams (id, description) in keyset pages ordered by id
+    - syncs each page in batches on a bounded thread pool; unchanged chunks
+      are skipped and stale ones removed (JobIngestor.sync_jobs)
+    - checkpoints after every page; resume() continues after last_job_id
+    - jobs of failed batches are retried once the pass reaches the end,
+      and again on every resume() until they sync
+    One run at a time per process.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        state_dir: str = REINDEX_STATE_DIR,
+        page_size: int = REINDEX_PAGE_SIZE,
+        batch_jobs: int = REINDEX_BATCH_JOBS,
+        workers: int = REINDEX_WORKERS
+    ):
+        self.session_factory = session_factory
+        self.state_dir = state_dir
+        self.page_size = page_size
+        self.batch_jobs = batch_jobs
+        self.workers = workers
+
+        self.ingestor = JobIngestor()
+
+        self._runs: Dict[str, ReindexRun] = {}
+        self._active: Optional[ReindexRun] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.state_dir, exist_ok=True)
+
+    # ----------------------------------------
+    # Public API
+    # ----------------------------------------
+    def start(self) -> ReindexRun:
+        """
+        Starts a new run in the background, or returns the one in progress.
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._active
+            run = ReindexRun()
+            self._launch(run)
+            return run
+
+    def resume(self, run_id: str) -> Optional[ReindexRun]:
+        """
+        Continues an unfinished run from its checkpoint. Returns None for
+        unknown ids; the run is returned unchanged if it completed with
+        every job synced, or another run is in progress.
+        """
+        with self._lock:
+            run = self._load(run_id)
+            if run is None:
+                return None
+            if self._active is None and (run.status != "completed" or run.failed_job_ids):
+                self._launch(run)
+            return run
+
+    def cancel(self, run_id: str) -> Optional[ReindexRun]:
+        with self._lock:
+            run = self._load(run_id)
+            if run is not None and self._active is run:
+                self._cancel.set()
+            return run
+
+    def get(self, run_id: str) -> Optional[ReindexRun]:
+        with self._lock:
+            return self._load(run_id)
+
+    def list_runs(self) -> List[ReindexRun]:
+        with self._lock:
+            for name in os.listdir(self.state_dir):
+                if name.endswith(".json"):
+                    self._load(name[:-len(".json")])
+            return sorted(self._runs.values(), key=lambda r: r.created_at, reverse=True)
+
+    # ----------------------------------------
+    # Run loop
+    # ----------------------------------------
+    def _launch(self, run: ReindexRun):
+        # Caller holds self._lock
+        self._runs[run.id] = run
+        self._active = run
+        self._cancel.clear()
+        run.status = "running"
+        run.finished_at = None
+        self._save(run)
+        threading.Thread(target=self._run, args=(run,), name=f"reindex-{run.id[:8]}", daemon=True).start()
+
+    def _run(self, run: ReindexRun):
+        db = self.session_factory()
+        try:
+            run.total_jobs = db.query(func.count(Job.id)).scalar() or 0
+            print(f"[Reindex] Run {run.id}: {run.total_jobs} jobs, resuming after {run.last_job_id}")
+
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reindex") as pool:
+                while not self._cancel.is_set():
+                    page = self._next_page(db, run.last_job_id)
+                    if not page:
+                        break
+
+                    batches = [page[i:i + self.batch_jobs] for i in range(0, len(page), self.batch_jobs)]
+                    for batch, outcome in zip(batches, pool.map(self._sync_batch, batches)):
+                        self._apply(run, batch, outcome)
+
+                    # Failed jobs are in failed_job_ids, so moving past them is safe
+                    run.last_job_id = page[-1]["id"]
+                    self._save(run)
+
+                if run.failed_job_ids and not self._cancel.is_set():
+                    self._retry_failed(db, run, pool)
+
+            run.status = "cancelled" if self._cancel.is_set() else "completed"
+            if run.status == "completed":
+                # Local ANN index (if configured) is a snapshot of job_chunks
+                rebuild_job_vector_index(background=True)
+        except Exception as e:
+            run.status = "failed"
+            self._record_error(run, None, e)
+            print(f"[Reindex] Run {run.id} failed: {e}")
+        finally:
+            db.close()
+            run.finished_at = time.time()
+            with self._lock:
+                self._save(run)
+                self._active = None
+
+        print(
+            f"[Reindex] Run {run.id} {run.status}: {run.processed_jobs}/{run.total_jobs} jobs, "
+            f"{run.added_chunks} added, {run.unchanged_chunks} unchanged, {run.removed_chunks} removed, "
+            f"{run.failed_jobs} failed"
+        )
+
+    def _next_page(self, db, after: Optional[str]) -> List[Dict[str, Any]]:
+        query = db.query(Job.id, Job.description)
+        if after is not None:
+            query = query.filter(Job.id > after)
+        rows = query.order_by(Job.id).limit(self.page_size).all()
+        return [{"id": job_id, "description": description or ""} for job_id, description in rows]
+
+    def _retry_failed(self, db, run: ReindexRun, pool: ThreadPoolExecutor):
+        """
+        One more attempt at the jobs in failed_job_ids. Jobs deleted since
+        are dropped; jobs that fail again stay for the next resume().
+        """
+        retry_ids = list(run.failed_job_ids)
+        print(f"[Reindex] Run {run.id}: retrying {len(retry_ids)} failed jobs")
+
+        for start in range(0, len(retry_ids), self.page_size):
+            if self._cancel.is_set():
+                return
+            ids = retry_ids[start:start + self.page_size]
+            rows = db.query(Job.id, Job.description).filter(Job.id.in_(ids)).all()
+            jobs = [{"id": job_id, "description": description or ""} for job_id, description in rows]
+
+            found = {job["id"] for job in jobs}
+            self._forget_failed(run, [job_id for job_id in ids if job_id not in found])
+
+            batches = [jobs[i:i + self.batch_jobs] for i in range(0, len(jobs), self.batch_jobs)]
+            for batch, outcome in zip(batches, pool.map(self._sync_batch, batches)):
+                self._apply(run, batch, outcome, retry=True)
+            self._save(run)
+
+    def _sync_batch(self, batch: List[Dict[str, Any]]):
+        try:
+            return self.ingestor.sync_jobs(batch)
+        except Exception as e:
+            return e
+
+    def _apply(self, run: ReindexRun, batch: List[Dict[str, Any]], outcome, retry: bool = False):
+        job_ids = [job["id"] for job in batch]
+        if not retry:
+            run.processed_jobs += len(batch)
+
+        if isinstance(outcome, Exception):
+            if not retry:
+                run.failed_job_ids.extend(job_ids)
+                run.failed_jobs = len(run.failed_job_ids)
+            self._record_error(run, job_ids, outcome)
+            print(f"[Reindex] Warning: Failed to sync {len(batch)} jobs: {outcome}")
+        else:
+            if retry:
+                self._forget_failed(run, job_ids)
+            run.added_chunks += outcome["added"]
+            run.unchanged_chunks += outcome["unchanged"]
+            run.removed_chunks += outcome["removed"]
+        run.updated_at = time.time()
+
+    @staticmethod
+    def _forget_failed(run: ReindexRun, job_ids: List[str]):
+        if job_ids:
+            done = set(job_ids)
+            run.failed_job_ids = [job_id for job_id in run.failed_job_ids if job_id not in done]
+            run.failed_jobs = len(run.failed_job_ids)
+
+    @staticmethod
+    def _record_error(run: ReindexRun, job_ids: Optional[List[str]], error: Exception):
+        if len(run.errors) < MAX_RECORDED_ERRORS:
+            run.errors.append({"job_ids": job_ids, "error": f"{type(error).__name__}: {error}"})
+
+    # ----------------------------------------
+    # Checkpoints
+    # ----------------------------------------
+    def _path(self, run_id: str) -> str:
+        return os.path.join(self.state_dir, f"{run_id}.json")
+
+    def _save(self, run: ReindexRun):
+        run.updated_at = time.time()
+        tmp = self._path(run.id) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(run.to_dict(), f)
+        os.replace(tmp, self._path(run.id))
+
+    def _load(self, run_id: str) -> Optional[ReindexRun]:
+        # Caller holds self._lock
+        run = self._runs.get(run_id)
+        if run is not None:
+            return run
+
+        path = self._path(os.path.basename(run_id))
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                run = ReindexRun.from_dict(json.load(f))
+        except Exception as e:
+            print(f"[Reindex] Warning: Unreadable checkpoint {path}: {e}")
+            return None
+
+        # Saved as running/pending by a process that no longer exists
+        if run.status in ("running", "pending"):
+            run.status = "interrupted"
+        self._runs[run.id] = run
+        return run
+
+
+# ==========================================================
+# Process-wide engine
+# ==========================================================
+_reindex_engine: Optional[ReindexEngine] = None
+_reindex_engine_lock = threading.Lock()
+
+
+def get_reindex_engine() -> ReindexEngine:
+    global _reindex_engine
+    with _reindex_engine_lock:
+        if _reindex_engine is None:
+            _reindex_engine = ReindexEngine()
+        return _reindex_engine
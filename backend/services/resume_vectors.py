@@ -0,0 +1,155 @@
+# services/resume_vectors.py
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import threading
+import os
+
+import numpy as np
+
+from services.metrics import track
+
+
+# Resumes whose chunk matrices are kept in memory (~20 chunks x 768 floats each)
+RESUME_VECTOR_CACHE_SIZE = int(os.getenv("RESUME_VECTOR_CACHE_SIZE", "512"))
+
+
+class ResumeVectors:
+    """
+    One resume's chunks as a float32 matrix (rows in chunk_index order)
+    plus the squared row norms used for L2 distances.
+    """
+
+    def __init__(self, chunks: List[str], vectors, sources: List[Dict[str, Any]]):
+        self.chunks = list(chunks)
+        self.sources = sources
+        self.matrix = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(self.chunks), -1)
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def scores(self, query_matrix: np.ndarray) -> np.ndarray:
+        """
+        (queries x chunks) similarities 1 / (1 + squared L2 distance), the
+        same scale as Chroma's default "l2" space used before.
+        """
+        q_sq = np.einsum("ij,ij->i", query_matrix, query_matrix)
+        dist = q_sq[:, None] + self.sq_norms[None, :] - 2.0 * (query_matrix @ self.matrix.T)
+        np.maximum(dist, 0.0, out=dist)
+        return 1.0 / (1.0 + dist)
+
+
+class ResumeVectorCache:
+    """
+    LRU of ResumeVectors keyed by resume_id, so scoring a JD against a
+    resume is one matrix product instead of a Chroma query. Filled by
+    resume_extractor_agent, or loaded from the resume_chunks collection on
+    first use. A resume_id's text never changes after upload, so entries
+    only need dropping when the resume is deleted or re-extracted.
+    """
+
+    def __init__(self, max_resumes: int = RESUME_VECTOR_CACHE_SIZE):
+        self.max_resumes = max_resumes
+        self._items: "OrderedDict[str, ResumeVectors]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, resume_id: str, chunks: List[str], vectors, sources=None) -> ResumeVectors:
+        if sources is None:
+            sources = [{"resume_id": resume_id, "chunk_index": i} for i in range(len(chunks))]
+        entry = ResumeVectors(chunks, vectors, sources)
+        with self._lock:
+            self._items[resume_id] = entry
+            self._items.move_to_end(resume_id)
+            while len(self._items) > self.max_resumes:
+                self._items.popitem(last=False)
+        return entry
+
+    def get(self, resume_id: str) -> Optional[ResumeVectors]:
+        with self._lock:
+            entry = self._items.get(resume_id)
+            if entry is not None:
+                self._items.move_to_end(resume_id)
+            return entry
+
+    def invalidate(self, resume_id: str):
+        with self._lock:
+            self._items.pop(resume_id, None)
+
+    def load(self, resume_id: str, embedder) -> Optional[ResumeVectors]:
+        """
+        Cached entry, else the resume's stored chunk vectors from Chroma.
+        None when the resume has no stored chunks.
+        """
+        entry = self.get(resume_id)
+        if entry is not None:
+            return entry
+
+        with track("chroma", "get"):
+            raw = embedder.vectorstore.get(
+                where={"resume_id": resume_id},
+                include=["embeddings", "documents", "metadatas"]
+            )
+
+        embeddings = raw.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return None
+
+        rows = sorted(
+            zip(raw["documents"], raw["metadatas"], embeddings),
+            key=lambda row: (row[1] or {}).get("chunk_index", 0)
+        )
+        return self.put(
+            resume_id,
+            [doc or "" for doc, _, _ in rows],
+            np.asarray([vec for _, _, vec in rows], dtype=np.float32),
+            [meta or {} for _, meta, _ in rows]
+        )
+
+    def match(self, resume_id: str, embedder, jd_texts: List[str], k: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Scores each JD text against all of the resume's chunks at once.
+        Returns one job_metadata dict per JD (top_matching_chunks,
+        chunk_sources, semantic_scores, avg_semantic_score), or None when
+        the resume has no stored chunks.
+        """
+        entry = self.load(resume_id, embedder)
+        if entry is None:
+            return None
+        if not jd_texts:
+            return []
+
+        with track("embedding", "embed_queries"):
+            if len(jd_texts) == 1:
+                query_vecs = [embedder.model.embed_query(jd_texts[0])]
+            else:
+                query_vecs = embedder.model.embed_documents(jd_texts, task_type="retrieval_query")
+
+        sims = entry.scores(np.asarray(query_vecs, dtype=np.float32))
+
+        results = []
+        for row in sims:
+            top = np.argsort(-row, kind="stable")[:k]
+            scores = [round(float(row[i]), 4) for i in top]
+            results.append({
+                "top_matching_chunks": [entry.chunks[i] for i in top],
+                "chunk_sources": [entry.sources[i] for i in top],
+                "semantic_scores": scores,
+                "avg_semantic_score": round(sum(scores) / len(scores), 4) if scores else 0.0
+            })
+        return results
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ==========================================================
+# Process-wide cache
+# ==========================================================
+_resume_vectors: Optional[ResumeVectorCache] = None
+_resume_vectors_lock = threading.Lock()
+
+
+def get_resume_vectors() -> ResumeVectorCache:
+    global _resume_vectors
+    with _resume_vectors_lock:
+        if _resume_vectors is None:
+            _resume_vectors = ResumeVectorCache()
+        return _resume_vectors
@@ -3,13 +3,11 @@
 import re
 import numpy as np
 
-from services.skill_database import (
-    SKILL_VOCAB,
-    SKILL_ALIASES,
-    SKILL_CATEGORIES,
-)
 from services.text_cleaner import TextCleaner
-from services.embedding import EmbeddingService
+from services.embedding import get_embedding_service
+from services.skill_vectors import get_skill_vectors, normalize_rows
+from services.skill_matcher import get_skill_matcher
+from services.skill_taxonomy import get_skill_taxonomy
 
 
 # ---------------------------------------------
@@ -35,27 +33,26 @@ class SkillExtractor:
     """
 
     def __init__(self, api_key: str = None):
-        self.embedder = EmbeddingService(api_key=api_key)  # for semantic matching
+        self.embedder = get_embedding_service(api_key=api_key)  # for semantic matching
 
     # -----------------------------------------
     # Normalize using alias rules
     # -----------------------------------------
     def normalize(self, skill: str) -> str:
-        skill = skill.lower().strip()
-        return SKILL_ALIASES.get(skill, skill)
+        return get_skill_taxonomy().normalize(skill)
 
     # -----------------------------------------
     # 1️⃣ Keyword Extraction
     # -----------------------------------------
-    def keyword_extract(self, text: str):
-        text_lower = text.lower()
-        found = []
-
-        for skill in SKILL_VOCAB:
-            if skill in text_lower:
-                found.append(skill)
+    def keyword_matches(self, text: str):
+        """
+        Single pass of the compiled skill automaton over the text.
+        Returns [{skill, matched, start, end}] with canonical skill names.
+        """
+        return get_skill_matcher().find(text)
 
-        return found
+    def keyword_extract(self, text: str):
+        return list(dict.fromkeys(m["skill"] for m in self.keyword_matches(text)))
 
     # -----------------------------------------
     # 2️⃣ Regex Extraction
@@ -63,45 +60,56 @@ class SkillExtractor:
     TECH_REGEX = r"\b([a-zA-Z0-9\+\#\.\-]{2,20})\b"
 
     def regex_extract(self, text: str):
-        matches = re.findall(self.TECH_REGEX, text)
-        matches = [self.normalize(m.lower()) for m in matches]
-        return [m for m in matches if m in SKILL_VOCAB]
+        taxonomy = get_skill_taxonomy()
+        matches = (taxonomy.canonical(m) for m in re.findall(self.TECH_REGEX, text))
+        return [m for m in matches if m is not None]
 
     # -----------------------------------------
     # 3️⃣ Semantic Extraction
     # -----------------------------------------
-    def semantic_extract(self, text: str, threshold: float = 0.60):
+    def semantic_matches(self, text: str, threshold: float = 0.60):
+        """
+        Returns [{skill, sentence, similarity}] for every vocab skill whose
+        best-matching sentence is above the threshold.
+        """
         sentences = [s.strip() for s in text.split("\n") if s.strip()]
         if not sentences:
             return []
 
-        # Embed sentences
-        sentence_vecs = self.embedder.model.embed_documents(sentences)
-
-        # Embed skill vocab
-        skill_vecs = self.embedder.model.embed_documents(SKILL_VOCAB)
+        # Embed sentences (vocab vectors are precomputed + normalized)
+        sentence_vecs = normalize_rows(
+            np.asarray(self.embedder.model.embed_documents(sentences), dtype=np.float32)
+        )
+        skills, skill_matrix = get_skill_vectors(self.embedder.model, self.embedder.model_name)
+
+        # (n_skills x n_sentences) cosine similarities in one product
+        sims = skill_matrix @ sentence_vecs.T
+        best = sims.argmax(axis=1)
+        best_sims = sims[np.arange(len(skills)), best]
+
+        return [
+            {
+                "skill": skills[i],
+                "sentence": sentences[best[i]],
+                "similarity": round(float(best_sims[i]), 4)
+            }
+            for i in np.flatnonzero(best_sims > threshold)
+        ]
 
-        found = []
-
-        for skill, s_vec in zip(SKILL_VOCAB, skill_vecs):
-            for r_vec in sentence_vecs:
-                sim = cosine_sim(s_vec, r_vec)
-                if sim > threshold:
-                    found.append(skill)
-                    break
-
-        return found
+    def semantic_extract(self, text: str, threshold: float = 0.60):
+        return [m["skill"] for m in self.semantic_matches(text, threshold)]
 
     # -----------------------------------------
     # Categorization
     # -----------------------------------------
     def categorize(self, skills):
-        categorized = {}
+        taxonomy = get_skill_taxonomy()
+        categorized = {category_name: [] for category_name in taxonomy.categories}
 
-        for category_name, skill_list in SKILL_CATEGORIES.items():
-            categorized[category_name] = [
-                skill for skill in skills if skill in skill_list
-            ]
+        for skill in skills:
+            category_name = taxonomy.category(skill)
+            if category_name is not None:
+                categorized[category_name].append(skill)
 
         return categorized
 
@@ -0,0 +1,145 @@
+# services/skill_matcher.py
+
+from collections import deque
+from typing import Dict, List, Optional
+import threading
+
+from services.skill_taxonomy import get_skill_taxonomy
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+class SkillMatcher:
+    """
+    Aho–Corasick automaton over skill surface forms (canonical names and
+    aliases). One pass over the text finds every occurrence; matches must
+    sit on word boundaries so "c", "r" or "go" don't fire inside other
+    words, and overlapping matches resolve leftmost-longest ("c++" wins
+    over "c").
+    """
+
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        patterns = { surface_form: canonical_skill }
+        """
+        self.surfaces: List[str] = []
+        self.canonicals: List[str] = []
+
+        # Node 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._term: List[int] = [-1]       # pattern id ending at node (or -1)
+        self._out_link: List[int] = [0]    # nearest suffix node with a pattern
+
+        for surface, canonical in patterns.items():
+            surface = " ".join(surface.lower().split())
+            if surface:
+                self._insert(surface, canonical)
+
+        self._build_links()
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    # ------------------------------------------
+    # Construction
+    # ------------------------------------------
+    def _insert(self, surface: str, canonical: str):
+        node = 0
+        for ch in surface:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._term.append(-1)
+                self._out_link.append(0)
+            node = nxt
+
+        if self._term[node] == -1:
+            self._term[node] = len(self.surfaces)
+            self.surfaces.append(surface)
+            self.canonicals.append(canonical)
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                if fail == child:
+                    fail = 0
+
+                self._fail[child] = fail
+                self._out_link[child] = fail if self._term[fail] != -1 else self._out_link[fail]
+
+    # ------------------------------------------
+    # Matching
+    # ------------------------------------------
+    def find(self, text: str) -> List[Dict]:
+        """
+        Returns [{skill, matched, start, end}] (offsets into text.lower()),
+        non-overlapping and in order of appearance.
+        """
+        text = text.lower()
+        n = len(text)
+        goto, fail, term, out_link = self._goto, self._fail, self._term, self._out_link
+
+        candidates = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            hit = node if term[node] != -1 else out_link[node]
+            while hit:
+                pid = term[hit]
+                start = i - len(self.surfaces[pid]) + 1
+                end = i + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                   (end == n or not _is_word_char(text[end])):
+                    candidates.append((start, end, pid))
+                hit = out_link[hit]
+
+        # Leftmost-longest, non-overlapping
+        candidates.sort(key=lambda c: (c[0], -(c[1] - c[0])))
+
+        matches = []
+        last_end = 0
+        for start, end, pid in candidates:
+            if start < last_end:
+                continue
+            matches.append({
+                "skill": self.canonicals[pid],
+                "matched": self.surfaces[pid],
+                "start": start,
+                "end": end
+            })
+            last_end = end
+
+        return matches
+
+
+# ==========================================================
+# Shared matcher over the skill taxonomy
+# ==========================================================
+_matcher: Optional[SkillMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_skill_matcher() -> SkillMatcher:
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = SkillMatcher(dict(get_skill_taxonomy().surface_forms()))
+        return _matcher
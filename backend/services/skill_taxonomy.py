@@ -0,0 +1,408 @@
+# services/skill_taxonomy.py
+
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import threading
+import hashlib
+import json
+import csv
+import os
+
+from services.skill_database import SKILL_VOCAB, SKILL_ALIASES, SKILL_CATEGORIES
+
+
+# Compiled taxonomy directory, or a .json / .csv source (compiled next to
+# it on first use). Unset -> built-in lists from skill_database.py.
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH")
+
+COMPILED_FORMAT_VERSION = 1
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def taxonomy_checksum(entries: List[Dict]) -> str:
+    """Content hash of taxonomy entries; changes whenever a skill, alias, category or parent does."""
+    payload = json.dumps(entries, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# ==========================================================
+# Backends
+# ==========================================================
+class _DictBackend:
+    """In-memory hash maps; used for the built-in skill database."""
+
+    def __init__(self, entries: List[Dict]):
+        self.categories: List[str] = []
+        self.version = taxonomy_checksum(entries)
+        self._skills: List[str] = []
+        self._canonical: Dict[str, str] = {}
+        self._category: Dict[str, str] = {}
+        self._parent: Dict[str, str] = {}
+
+        for entry in entries:
+            name = normalize_term(entry["name"])
+            if name not in self._canonical or self._canonical[name] != name:
+                self._skills.append(name)
+            self._canonical[name] = name
+
+            category = entry.get("category")
+            if category:
+                if category not in self.categories:
+                    self.categories.append(category)
+                self._category[name] = category
+
+            if entry.get("parent"):
+                self._parent[name] = normalize_term(entry["parent"])
+
+            for alias in entry.get("aliases") or []:
+                self._canonical.setdefault(normalize_term(alias), name)
+
+    def canonical(self, term: str) -> Optional[str]:
+        return self._canonical.get(term)
+
+    def category(self, skill: str) -> Optional[str]:
+        return self._category.get(self._canonical.get(skill, skill))
+
+    def parent(self, skill: str) -> Optional[str]:
+        return self._parent.get(self._canonical.get(skill, skill))
+
+    def surface_forms(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._canonical.items())
+
+    def skills(self) -> List[str]:
+        return list(self._skills)
+
+
+class _MappedBackend:
+    """
+    Compiled taxonomy opened with np.load(mmap_mode="r"): nothing is parsed
+    up front, pages are read on demand. Lookups go through an
+    open-addressing hash table of 64-bit term hashes.
+    """
+
+    def __init__(self, compiled_dir: str):
+        with open(os.path.join(compiled_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("version") != COMPILED_FORMAT_VERSION:
+            raise ValueError(f"Unsupported taxonomy format version: {meta.get('version')}")
+
+        self.categories: List[str] = meta["categories"]
+        # Both absent in directories compiled before they were recorded
+        self._num_skills: Optional[int] = meta.get("num_skills")
+        self.version: str = meta.get("checksum") or ""
+
+        def load(name):
+            return np.load(os.path.join(compiled_dir, f"{name}.npy"), mmap_mode="r")
+
+        self._strings = load("strings")
+        self._offsets = load("offsets")
+        self._hashes = load("hashes")
+        self._canonical = load("canonical")
+        self._category = load("category")
+        self._parent = load("parent")
+        self._slots = load("slots")
+        self._mask = len(self._slots) - 1
+
+        if not self.version:
+            self.version = hashlib.sha256(self._strings.tobytes() + self._canonical.tobytes()).hexdigest()[:16]
+
+    def _term(self, idx: int) -> str:
+        return bytes(self._strings[self._offsets[idx]:self._offsets[idx + 1]]).decode("utf-8")
+
+    def _find(self, term: str) -> int:
+        h = term_hash(term)
+        slot = h & self._mask
+        while True:
+            idx = int(self._slots[slot])
+            if idx == -1:
+                return -1
+            if int(self._hashes[idx]) == h and self._term(idx) == term:
+                return idx
+            slot = (slot + 1) & self._mask
+
+    def canonical(self, term: str) -> Optional[str]:
+        idx = self._find(term)
+        return self._term(int(self._canonical[idx])) if idx != -1 else None
+
+    def category(self, skill: str) -> Optional[str]:
+        idx = self._find(skill)
+        if idx == -1:
+            return None
+        cat = int(self._category[int(self._canonical[idx])])
+        return self.categories[cat] if cat != -1 else None
+
+    def parent(self, skill: str) -> Optional[str]:
+        idx = self._find(skill)
+        if idx == -1:
+            return None
+        parent = int(self._parent[int(self._canonical[idx])])
+        return self._term(parent) if parent != -1 else None
+
+    def surface_forms(self) -> Iterator[Tuple[str, str]]:
+        for idx in range(len(self._offsets) - 1):
+            yield self._term(idx), self._term(int(self._canonical[idx]))
+
+    def skills(self) -> List[str]:
+        # Skill names are interned first, so they are terms 0 .. num_skills - 1
+        if self._num_skills is not None:
+            return [self._term(idx) for idx in range(self._num_skills)]
+        return [term for term, canonical in self.surface_forms() if term == canonical]
+
+
+# ==========================================================
+# Public taxonomy object
+# ==========================================================
+class SkillTaxonomy:
+    """
+    Skill vocabulary with O(1) lookups:
+    - alias / surface form -> canonical skill
+    - skill -> category
+    - skill -> parent skill (hierarchy)
+
+    Loaded lazily on first lookup, from the built-in lists or a compiled
+    on-disk taxonomy (see compile_taxonomy).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = self._load()
+        return self._backend
+
+    def _load(self):
+        if not self.path:
+            backend = _DictBackend(builtin_entries())
+            backend.categories = list(SKILL_CATEGORIES.keys())
+            return backend
+
+        compiled_dir = self.path
+        if os.path.isfile(self.path):
+            compiled_dir = self.path + ".compiled"
+            meta_path = os.path.join(compiled_dir, "meta.json")
+            if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(self.path):
+                print(f"[SkillTaxonomy] Compiling {self.path} -> {compiled_dir}")
+                compile_taxonomy(load_taxonomy_source(self.path), compiled_dir)
+
+        return _MappedBackend(compiled_dir)
+
+    @property
+    def categories(self) -> List[str]:
+        return self.backend.categories
+
+    def canonical(self, term: str) -> Optional[str]:
+        """Canonical skill for a name or alias, None if unknown."""
+        return self.backend.canonical(normalize_term(term))
+
+    def normalize(self, term: str) -> str:
+        term = normalize_term(term)
+        return self.backend.canonical(term) or term
+
+    def category(self, skill: str) -> Optional[str]:
+        return self.backend.category(normalize_term(skill))
+
+    def parent(self, skill: str) -> Optional[str]:
+        return self.backend.parent(normalize_term(skill))
+
+    def __contains__(self, term: str) -> bool:
+        return self.canonical(term) is not None
+
+    def surface_forms(self) -> Iterator[Tuple[str, str]]:
+        """All (surface form, canonical skill) pairs, canonical names included."""
+        return self.backend.surface_forms()
+
+    def skills(self) -> List[str]:
+        """Canonical skill names, in taxonomy order."""
+        return self.backend.skills()
+
+    @property
+    def version(self) -> str:
+        """Checksum of the loaded taxonomy, for keying data derived from it."""
+        return self.backend.version
+
+
+# ==========================================================
+# Sources + compiled format
+# ==========================================================
+def builtin_entries() -> List[Dict]:
+    category_of = {}
+    for category, skills in SKILL_CATEGORIES.items():
+        for skill in skills:
+            category_of.setdefault(skill, category)
+
+    aliases = {}
+    for alias, canonical in SKILL_ALIASES.items():
+        aliases.setdefault(canonical, []).append(alias)
+
+    return [
+        {"name": skill, "category": category_of.get(skill), "aliases": aliases.get(skill, [])}
+        for skill in dict.fromkeys(SKILL_VOCAB)
+    ]
+
+
+def load_taxonomy_source(path: str) -> List[Dict]:
+    """
+    Reads a taxonomy source file into entries:
+    [{name, category, aliases: [...], parent}]
+
+    JSON: a list of entries (or {"skills": [...]}).
+    CSV:  columns name, category, aliases ("|"-separated), parent.
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data["skills"] if isinstance(data, dict) else data
+
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return [
+                {
+                    "name": row["name"],
+                    "category": row.get("category") or None,
+                    "aliases": [a for a in (row.get("aliases") or "").split("|") if a.strip()],
+                    "parent": row.get("parent") or None,
+                }
+                for row in csv.DictReader(f)
+            ]
+
+    raise ValueError(f"Unsupported taxonomy source: {path} (expected .json or .csv)")
+
+
+def compile_taxonomy(entries: List[Dict], out_dir: str):
+    """
+    Writes the compact format read by _MappedBackend:
+    meta.json + one .npy per array (term strings, 64-bit hashes,
+    canonical / category / parent indexes and the hash slot table).
+    Categories missing on a skill are inherited from its parent.
+    """
+    terms: List[str] = []
+    index: Dict[str, int] = {}
+
+    def intern(term: str) -> int:
+        term = normalize_term(term)
+        if term not in index:
+            index[term] = len(terms)
+            terms.append(term)
+        return index[term]
+
+    categories: List[str] = []
+    category: Dict[int, int] = {}
+    parent: Dict[int, int] = {}
+
+    # Canonical names first so an alias never shadows a real skill
+    names = set()
+    for entry in entries:
+        idx = intern(entry["name"])
+        names.add(idx)
+        if entry.get("category"):
+            if entry["category"] not in categories:
+                categories.append(entry["category"])
+            category[idx] = categories.index(entry["category"])
+
+    for entry in entries:
+        idx = index[normalize_term(entry["name"])]
+        if entry.get("parent"):
+            parent[idx] = intern(entry["parent"])
+        for alias in entry.get("aliases") or []:
+            intern(alias)
+
+    canonical = list(range(len(terms)))
+    for entry in entries:
+        idx = index[normalize_term(entry["name"])]
+        for alias in entry.get("aliases") or []:
+            alias_idx = index[normalize_term(alias)]
+            if alias_idx not in names and canonical[alias_idx] == alias_idx:
+                canonical[alias_idx] = idx
+
+    # Inherit categories down the hierarchy
+    def resolve_category(idx: int, seen=()) -> int:
+        if idx in category:
+            return category[idx]
+        if idx in parent and idx not in seen:
+            return resolve_category(parent[idx], seen + (idx,))
+        return -1
+
+    encoded = [t.encode("utf-8") for t in terms]
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+
+    hashes = np.array([term_hash(t) for t in terms], dtype=np.uint64)
+
+    num_slots = 1
+    while num_slots < 2 * max(len(terms), 1):
+        num_slots *= 2
+    slots = np.full(num_slots, -1, dtype=np.int32)
+    mask = num_slots - 1
+    for idx, h in enumerate(hashes):
+        slot = int(h) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = idx
+
+    arrays = {
+        "strings": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "offsets": offsets,
+        "hashes": hashes,
+        "canonical": np.array(canonical, dtype=np.int32),
+        "category": np.array([resolve_category(i) for i in range(len(terms))], dtype=np.int32),
+        "parent": np.array([parent.get(i, -1) for i in range(len(terms))], dtype=np.int32),
+        "slots": slots,
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+
+    # meta.json last: its presence marks a complete compile
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": COMPILED_FORMAT_VERSION,
+            "categories": categories,
+            "num_terms": len(terms),
+            "num_skills": len(names),
+            "num_slots": num_slots,
+            "checksum": taxonomy_checksum(entries),
+        }, f)
+
+
+# ==========================================================
+# Shared taxonomy
+# ==========================================================
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    global _taxonomy
+    with _taxonomy_lock:
+        if _taxonomy is None:
+            _taxonomy = SkillTaxonomy(SKILL_TAXONOMY_PATH)
+        return _taxonomy
+
+
+if __name__ == "__main__":
+    # python -m services.skill_taxonomy <source.json|csv> <out_dir>
+    import sys
+
+    if len(sys.argv) != 3:
+        print("usage: python -m services.skill_taxonomy <source.json|source.csv> <out_dir>")
+        sys.exit(1)
+
+    compile_taxonomy(load_taxonomy_source(sys.argv[1]), sys.argv[2])
+    print(f"Compiled taxonomy written to {sys.argv[2]}")
@@ -0,0 +1,86 @@
+# services/skill_vectors.py
+
+from typing import Dict, List, Tuple
+import numpy as np
+import threading
+import hashlib
+import json
+import os
+
+from services.skill_taxonomy import get_skill_taxonomy
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generated file, regenerated whenever the taxonomy or the embedding model
+# changes (checked via the fingerprint saved in the file).
+SKILL_VECTORS_PATH = os.path.join(BASE_DIR, "data", "skills", "skill_vocab_embeddings.npz")
+
+_loaded: Dict[str, Tuple[List[str], np.ndarray]] = {}
+_lock = threading.Lock()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / (norms + 1e-10)
+
+
+def vocab_fingerprint(skills: List[str], model_name: str, taxonomy_version: str = "") -> str:
+    payload = json.dumps({"model": model_name, "taxonomy": taxonomy_version, "skills": skills})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_skill_vectors(embeddings, model_name: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Returns (skills, matrix) where matrix[i] is the L2-normalized float32
+    embedding of skills[i], for the canonical skills of the active taxonomy.
+    Loaded from SKILL_VECTORS_PATH when the stored fingerprint matches,
+    otherwise embedded once and written back.
+    """
+    taxonomy = get_skill_taxonomy()
+    skills = taxonomy.skills()
+    fingerprint = vocab_fingerprint(skills, model_name, taxonomy.version)
+
+    with _lock:
+        cached = _loaded.get(fingerprint)
+        if cached is not None:
+            return cached
+
+        matrix = _read(fingerprint)
+        if matrix is None:
+            print(f"[SkillVectors] Embedding {len(skills)} vocab skills with {model_name}")
+            vectors = np.asarray(embeddings.embed_documents(skills), dtype=np.float32)
+            matrix = normalize_rows(vectors).astype(np.float32)
+            _write(fingerprint, skills, matrix)
+
+        _loaded[fingerprint] = (skills, matrix)
+        return skills, matrix
+
+
+def _read(fingerprint: str):
+    if not os.path.exists(SKILL_VECTORS_PATH):
+        return None
+
+    try:
+        with np.load(SKILL_VECTORS_PATH, allow_pickle=False) as data:
+            if str(data["fingerprint"]) != fingerprint:
+                return None
+            return data["matrix"].astype(np.float32)
+    except Exception as e:
+        print(f"[SkillVectors] Warning: Ignoring unreadable {SKILL_VECTORS_PATH}: {e}")
+        return None
+
+
+def _write(fingerprint: str, skills: List[str], matrix: np.ndarray):
+    tmp_path = SKILL_VECTORS_PATH + ".tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(SKILL_VECTORS_PATH), exist_ok=True)
+        np.savez(
+            tmp_path,
+            fingerprint=np.array(fingerprint),
+            skills=np.array(skills),
+            matrix=matrix
+        )
+        os.replace(tmp_path, SKILL_VECTORS_PATH)
+    except Exception as e:
+        print(f"[SkillVectors] Warning: Failed to save skill vectors: {e}")
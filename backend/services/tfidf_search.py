@@ -1,41 +1,491 @@
+# services/tfidf_search.py
+
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict
+from sklearn.preprocessing import normalize
+from sqlalchemy.orm import Session
+from typing import List, Dict, Iterable, Optional
 import numpy as np
+import scipy.sparse as sp
+from uuid import uuid4
+import threading
+import tempfile
+import json
+import time
+import os
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_DIR = os.path.join(BASE_DIR, "data", "jobs", "tfidf_index")
+
+# How often (seconds) the shared index re-checks the jobs table for rows
+# written by other workers. Rows added through this process are indexed
+# immediately via add_jobs / remove_jobs.
+SYNC_INTERVAL = float(os.getenv("TFIDF_SYNC_INTERVAL", "60"))
+# Changes are written to disk at most this often (seconds after the first
+# unsaved change) and at shutdown. A crash loses at most this window, which
+# the next sync() restores from the jobs table.
+SAVE_DELAY = float(os.getenv("TFIDF_SAVE_DELAY", "30"))
+
+# Points at the current counts/meta pair; replacing it publishes a save
+MANIFEST = "manifest.json"
+# Index files not referenced by the manifest are removed once older than
+# this (seconds); younger ones may belong to a save still in progress
+STALE_AFTER = 120
+# Unversioned pair written by earlier releases, removed on the next save
+LEGACY_FILES = ("counts.npz", "meta.json")
 
 
 class TFIDFSearch:
-    def __init__(self):
+    """
+    TF-IDF keyword search over job postings.
+
+    Raw term counts are kept per job so postings can be added or removed
+    without re-tokenizing the corpus. IDF weights and the L2-normalized
+    matrix are recomputed lazily from the counts (one vectorized pass),
+    so a query only costs a sparse dot product.
+    """
+
+    def __init__(self, index_dir: str = None):
+        # Only used for its analyzer (tokenizer + stop words), never fitted
         self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.job_texts = []
-        self.job_ids = []
+        self.analyzer = self.vectorizer.build_analyzer()
+
+        self.vocabulary: Dict[str, int] = {}
+        self.job_ids: List[str] = []
+        self.counts = sp.csr_matrix((0, 0), dtype=np.float64)
+
+        self.idf = None
         self.matrix = None
+        self.postings = None
+
+        self.index_dir = index_dir
+        self.last_sync = 0.0
+
+        self._row_of: Dict[str, int] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        self._unsaved = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
 
+    def __len__(self):
+        return len(self.job_ids)
+
+    # ------------------------------------------
+    # Building / updating
+    # ------------------------------------------
     def index_jobs(self, jobs: List[Dict]):
         """
         jobs = [ { "id": ..., "title": ..., "description": ... } ]
         """
-        self.job_ids = [job["id"] for job in jobs]
-        self.job_texts = [
-            job["title"] + " " + job["description"] for job in jobs
-        ]
+        with self._lock:
+            self.vocabulary = {}
+            self.job_ids = []
+            self._row_of = {}
+            self.counts = sp.csr_matrix((0, 0), dtype=np.float64)
+            self.add_jobs(jobs)
+
+    def add_jobs(self, jobs: List[Dict]):
+        """
+        Add (or replace) jobs in the index. New terms extend the vocabulary.
+        """
+        if not jobs:
+            return
+
+        with self._lock:
+            existing = [job["id"] for job in jobs if job["id"] in self._row_of]
+            if existing:
+                self._remove(existing)
+
+            new_rows = self._count_rows(jobs)
+
+            n_terms = len(self.vocabulary)
+            self.counts.resize((self.counts.shape[0], n_terms))
+            new_rows.resize((new_rows.shape[0], n_terms))
+            self.counts = sp.vstack([self.counts, new_rows], format="csr")
+
+            for job in jobs:
+                self._row_of[job["id"]] = len(self.job_ids)
+                self.job_ids.append(job["id"])
+
+            self._dirty = True
+            self._schedule_save()
+
+    def remove_jobs(self, job_ids: Iterable[str]):
+        with self._lock:
+            if self._remove(job_ids):
+                self._schedule_save()
+
+    def _remove(self, job_ids: Iterable[str]) -> bool:
+        drop = {self._row_of[jid] for jid in job_ids if jid in self._row_of}
+        if not drop:
+            return False
+
+        keep = np.array(
+            [i for i in range(len(self.job_ids)) if i not in drop],
+            dtype=np.int64
+        )
+        self.counts = self.counts[keep]
+        self.job_ids = [self.job_ids[i] for i in keep]
+        self._row_of = {jid: i for i, jid in enumerate(self.job_ids)}
+        self._dirty = True
+        return True
+
+    def _count_rows(self, jobs: List[Dict]) -> sp.csr_matrix:
+        indptr = [0]
+        indices = []
+        data = []
+
+        for job in jobs:
+            text = (job.get("title") or "") + " " + (job.get("description") or "")
+            row = {}
+            for term in self.analyzer(text):
+                col = self.vocabulary.setdefault(term, len(self.vocabulary))
+                row[col] = row.get(col, 0) + 1
+
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+
+        return sp.csr_matrix(
+            (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), indptr),
+            shape=(len(jobs), len(self.vocabulary))
+        )
+
+    def _refresh(self):
+        """Recompute smoothed IDF and the normalized TF-IDF matrix from counts."""
+        if not self._dirty and self.matrix is not None:
+            return
+
+        n_docs = self.counts.shape[0]
+        df = np.bincount(self.counts.indices, minlength=len(self.vocabulary))
+
+        # Same weighting as TfidfVectorizer(smooth_idf=True, norm="l2")
+        self.idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+        self.matrix = normalize(self.counts @ sp.diags(self.idf), norm="l2", copy=False).tocsr()
+
+        # Term -> jobs layout: a query only touches the rows of its own terms
+        self.postings = self.matrix.T.tocsr()
+        self._dirty = False
+
+    # ------------------------------------------
+    # Querying
+    # ------------------------------------------
+    def _transform_queries(self, queries: List[str]) -> sp.csr_matrix:
+        indptr = [0]
+        indices = []
+        data = []
+
+        for query in queries:
+            row = {}
+            for term in self.analyzer(query):
+                col = self.vocabulary.get(term)
+                if col is not None:
+                    row[col] = row.get(col, 0) + 1
+
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+
+        cols = np.array(indices, dtype=np.int64)
+        vals = np.array(data, dtype=np.float64) * self.idf[cols]
+
+        vecs = sp.csr_matrix(
+            (vals, cols, indptr),
+            shape=(len(queries), len(self.vocabulary))
+        )
+        return normalize(vecs, norm="l2", copy=False)
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, top_k: int):
+        """Partial selection of the top_k scores, then a sort of just those."""
+        if len(scores) > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[part], scores[part]
+
+        order = np.argsort(-scores, kind="stable")
+        return rows[order], scores[order]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        candidate_ids: Optional[Iterable[str]] = None
+    ) -> List[List[Dict]]:
+        """
+        Score every query in one sparse product against the normalized matrix.
+
+        Only jobs sharing at least one term with a query get a (non-zero)
+        score, so results may hold fewer than top_k entries.
+        If candidate_ids is given, only those jobs are ranked.
+        """
+        with self._lock:
+            if not self.job_ids:
+                raise RuntimeError("No jobs indexed in TF-IDF model")
+
+            self._refresh()
+
+            allowed = None
+            if candidate_ids is not None:
+                allowed = np.zeros(len(self.job_ids), dtype=bool)
+                rows = [self._row_of[jid] for jid in candidate_ids if jid in self._row_of]
+                allowed[rows] = True
+
+            # (n_queries x n_terms) @ (n_terms x n_jobs) -> sparse scores
+            scores = (self._transform_queries(queries) @ self.postings).tocsr()
+            scores.eliminate_zeros()
+
+            results = []
+            for q in range(len(queries)):
+                lo, hi = scores.indptr[q], scores.indptr[q + 1]
+                rows = scores.indices[lo:hi]
+                vals = scores.data[lo:hi]
+
+                if allowed is not None:
+                    keep = allowed[rows]
+                    rows, vals = rows[keep], vals[keep]
+
+                rows, vals = self._top_k(rows, vals, top_k)
+                results.append([
+                    {"job_id": self.job_ids[idx], "score": float(score)}
+                    for idx, score in zip(rows, vals)
+                ])
+
+            return results
+
+    def search(self, query: str, top_k=10, candidate_ids: Optional[Iterable[str]] = None):
+        return self.search_batch([query], top_k=top_k, candidate_ids=candidate_ids)[0]
+
+    # ------------------------------------------
+    # Persistence
+    # ------------------------------------------
+    def save(self, index_dir: str = None):
+        """
+        Write counts (sparse .npz) + vocabulary/job ids (JSON) as a versioned
+        pair, then publish it by replacing manifest.json. Readers only follow
+        the manifest, so they see the old pair or the new one, never a mix.
+        Only the snapshot is taken under the lock; searches aren't blocked
+        while the files are written.
+        """
+        index_dir = index_dir or self.index_dir
+        if not index_dir:
+            raise ValueError("No index_dir configured for TF-IDF index")
+
+        with self._lock:
+            # counts is replaced, never modified in place, so a reference is a snapshot
+            counts = self.counts
+            job_ids = list(self.job_ids)
+            terms = [None] * len(self.vocabulary)
+            for term, col in self.vocabulary.items():
+                terms[col] = term
+            self._unsaved = False
+
+        os.makedirs(index_dir, exist_ok=True)
+
+        version = f"{time.time_ns()}-{os.getpid()}-{uuid4().hex[:8]}"
+        counts_name = f"counts-{version}.npz"
+        meta_name = f"meta-{version}.json"
+
+        _write_file(index_dir, counts_name, lambda f: sp.save_npz(f, counts, compressed=False))
+        _write_file(index_dir, meta_name, lambda f: f.write(
+            json.dumps({"version": version, "vocabulary": terms, "job_ids": job_ids}).encode("utf-8")
+        ))
+
+        manifest = {
+            "version": version,
+            "counts": counts_name,
+            "meta": meta_name,
+            "shape": [len(job_ids), len(terms)],
+            "sizes": {
+                counts_name: os.path.getsize(os.path.join(index_dir, counts_name)),
+                meta_name: os.path.getsize(os.path.join(index_dir, meta_name)),
+            },
+        }
+        _write_file(index_dir, MANIFEST, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+        _remove_stale_versions(index_dir, keep={counts_name, meta_name})
+
+    def _schedule_save(self):
+        """
+        Mark the index unsaved and start the SAVE_DELAY flush timer if none is pending.
+        """
+        self._unsaved = True
+        if not self.index_dir or self._save_timer is not None:
+            return
+
+        self._save_timer = threading.Timer(SAVE_DELAY, self.flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+
+    def flush(self):
+        """
+        Persist pending changes now (timer callback, and at shutdown).
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self._unsaved or not self.index_dir:
+                return
+
+        # One save at a time per process; concurrent processes write their own
+        # versioned files and the last manifest replace wins
+        with self._save_lock:
+            try:
+                self.save()
+            except Exception as e:
+                self._unsaved = True
+                print(f"[TFIDFSearch] Warning: Failed to persist index: {e}")
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["TFIDFSearch"]:
+        manifest_path = os.path.join(index_dir, MANIFEST)
+        if not os.path.exists(manifest_path):
+            return None
+
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            counts_path = os.path.join(index_dir, manifest["counts"])
+            meta_path = os.path.join(index_dir, manifest["meta"])
+
+            # Truncated or swapped files fail here rather than as a bad index
+            for name, size in manifest["sizes"].items():
+                if os.path.getsize(os.path.join(index_dir, name)) != size:
+                    raise ValueError(f"{name} does not match manifest size")
+
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != manifest["version"]:
+                raise ValueError("metadata version does not match manifest")
+
+            index = cls(index_dir=index_dir)
+            index.counts = sp.load_npz(counts_path).tocsr()
+            index.vocabulary = {term: i for i, term in enumerate(meta["vocabulary"])}
+            index.job_ids = meta["job_ids"]
+            index._row_of = {jid: i for i, jid in enumerate(index.job_ids)}
+            index._dirty = True
+
+            shape = (len(index.job_ids), len(index.vocabulary))
+            if index.counts.shape != shape or list(shape) != manifest["shape"]:
+                raise ValueError("counts shape does not match metadata")
+
+            return index
+        except Exception as e:
+            print(f"[TFIDFSearch] Warning: Ignoring unreadable index at {index_dir}: {e}")
+            return None
+
+    # ------------------------------------------
+    # Keeping the index in line with the jobs table
+    # ------------------------------------------
+    def sync(self, db: Session, force: bool = False):
+        """
+        Index jobs that exist in the DB but not here (e.g. written by another
+        worker) and drop ids that no longer exist. Only the missing rows are
+        loaded; throttled by SYNC_INTERVAL unless forced.
+        """
+        from models.job_model import Job
+
+        now = time.monotonic()
+        if not force and self.last_sync and now - self.last_sync < SYNC_INTERVAL:
+            return
+        self.last_sync = now
+
+        db_ids = {row[0] for row in db.query(Job.id).all()}
+
+        with self._lock:
+            missing = list(db_ids - self._row_of.keys())
+            stale = [jid for jid in self.job_ids if jid not in db_ids]
+
+        if stale:
+            self.remove_jobs(stale)
+
+        new_jobs = []
+        for start in range(0, len(missing), 500):
+            batch = missing[start:start + 500]
+            rows = db.query(Job.id, Job.title, Job.description).filter(Job.id.in_(batch)).all()
+            new_jobs.extend(
+                {"id": r.id, "title": r.title, "description": r.description}
+                for r in rows
+            )
+        self.add_jobs(new_jobs)
+
+        if stale or missing:
+            print(f"[TFIDFSearch] Synced index: +{len(missing)} / -{len(stale)} jobs ({len(self)} total)")
+
+
+# ==========================================================
+# Index files
+# ==========================================================
+def _write_file(index_dir: str, name: str, write):
+    """
+    Write through a uniquely named temp file in index_dir, then rename it
+    to name, so concurrent savers never share a temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix=".tmp-", suffix=os.path.splitext(name)[1])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(index_dir, name))
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _remove_stale_versions(index_dir: str, keep: set):
+    """
+    Best-effort cleanup of superseded pairs and abandoned temp files.
+    """
+    cutoff = time.time() - STALE_AFTER
+    for name in os.listdir(index_dir):
+        if name in keep or name == MANIFEST:
+            continue
+        if not (name.startswith(("counts-", "meta-", ".tmp-")) or name in LEGACY_FILES):
+            continue
+
+        path = os.path.join(index_dir, name)
+        try:
+            # Recent files may be another saver's pair that isn't published
+            # yet, or the pair a reader is still opening
+            if name not in LEGACY_FILES and os.path.getmtime(path) > cutoff:
+                continue
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# ==========================================================
+# Process-wide job index
+# ==========================================================
+_job_index: Optional[TFIDFSearch] = None
+_job_index_lock = threading.Lock()
+
 
-        self.matrix = self.vectorizer.fit_transform(self.job_texts)
+def get_job_index(db: Session = None) -> TFIDFSearch:
+    """
+    Shared TF-IDF index over the jobs table, loaded from disk on first use.
+    Pass a DB session to pick up jobs written outside this process.
+    """
+    global _job_index
 
-    def search(self, query: str, top_k=10):
-        if self.matrix is None:
-            raise RuntimeError("No jobs indexed in TF-IDF model")
+    with _job_index_lock:
+        if _job_index is None:
+            _job_index = TFIDFSearch.load(DEFAULT_INDEX_DIR) or TFIDFSearch(index_dir=DEFAULT_INDEX_DIR)
 
-        query_vec = self.vectorizer.transform([query])
-        scores = cosine_similarity(query_vec, self.matrix).flatten()
+    if db is not None:
+        _job_index.sync(db)
 
-        top_indices = np.argsort(scores)[::-1][:top_k]
+    return _job_index
 
-        results = []
-        for idx in top_indices:
-            results.append({
-                "job_id": self.job_ids[idx],
-                "score": float(scores[idx])
-            })
 
-        return results
+def flush_job_index():
+    """
+    Write the shared index's pending changes (called at shutdown).
+    """
+    if _job_index is not None:
+        _job_index.flush()
@@ -0,0 +1,452 @@
+# services/vector_index.py
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import shutil
+import json
+import time
+import os
+
+import numpy as np
+
+from services.metrics import track
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# chroma (default, queries the collection directly), exact or ivf
+JOB_VECTOR_INDEX = os.getenv("JOB_VECTOR_INDEX", "chroma").lower()
+JOB_VECTOR_INDEX_DIR = os.getenv(
+    "JOB_VECTOR_INDEX_DIR",
+    os.path.join(BASE_DIR, "data", "vector_index", "job_chunks")
+)
+# IVF: number of clusters (0 = ~sqrt(chunks)) and clusters scanned per query.
+# Higher nprobe -> better recall, slower queries.
+JOB_VECTOR_INDEX_NLIST = int(os.getenv("JOB_VECTOR_INDEX_NLIST", "0"))
+JOB_VECTOR_INDEX_NPROBE = int(os.getenv("JOB_VECTOR_INDEX_NPROBE", "8"))
+# How a job's chunk similarities become one job score: max or mean
+JOB_VECTOR_AGGREGATION = os.getenv("JOB_VECTOR_AGGREGATION", "max").lower()
+# Chroma backend: chunks fetched per requested job before aggregating
+JOB_VECTOR_OVERFETCH = int(os.getenv("JOB_VECTOR_OVERFETCH", "5"))
+
+# Rows scored per matrix product (bounds temporary memory for large indexes)
+SEARCH_BLOCK_ROWS = 65536
+
+JobScores = List[Tuple[str, float]]
+
+
+def distance_to_similarity(dist):
+    # Same scale as the Chroma "l2" scores used elsewhere
+    return 1.0 / (1.0 + dist)
+
+
+def aggregate_by_job(job_idx: np.ndarray, sims: np.ndarray, how: str = "max") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Collapses chunk similarities to one score per job.
+    Returns (unique job indexes, scores).
+    """
+    if len(job_idx) == 0:
+        return job_idx, sims
+
+    order = np.argsort(job_idx, kind="stable")
+    jobs = job_idx[order]
+    values = sims[order]
+    starts = np.flatnonzero(np.r_[True, jobs[1:] != jobs[:-1]])
+
+    if how == "mean":
+        scores = np.add.reduceat(values, starts) / np.diff(np.r_[starts, len(values)])
+    else:
+        scores = np.maximum.reduceat(values, starts)
+    return jobs[starts], scores
+
+
+def _top_k(job_idx: np.ndarray, scores: np.ndarray, k: int, allowed: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+    if allowed is not None:
+        keep = allowed[job_idx]
+        job_idx, scores = job_idx[keep], scores[keep]
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+        job_idx, scores = job_idx[part], scores[part]
+    order = np.argsort(-scores, kind="stable")
+    return [(int(job_idx[i]), float(scores[i])) for i in order]
+
+
+def _squared_distances(queries: np.ndarray, q_sq: np.ndarray, rows: np.ndarray, row_sq: np.ndarray) -> np.ndarray:
+    dist = q_sq[:, None] + row_sq[None, :] - 2.0 * (queries @ rows.T)
+    np.maximum(dist, 0.0, out=dist)
+    return dist
+
+
+# ==========================================================
+# Chroma backend (current behaviour + job-level aggregation)
+# ==========================================================
+class ChromaJobIndex:
+    """
+    Queries the job_chunks collection through EmbeddingService and
+    aggregates chunk hits per job, so one long job can't take every slot.
+    """
+
+    name = "chroma"
+
+    def __init__(self, aggregation: str = JOB_VECTOR_AGGREGATION, overfetch: int = JOB_VECTOR_OVERFETCH):
+        self.aggregation = aggregation
+        self.overfetch = overfetch
+
+    def search(self, embedder, queries: List[str], k: int = 10, candidate_ids: Optional[Iterable[str]] = None) -> List[JobScores]:
+        allowed = set(candidate_ids) if candidate_ids is not None else None
+        batch = embedder.similarity_search_batch(queries, k=k * self.overfetch)
+
+        results = []
+        for hits in batch:
+            per_job: Dict[str, List[float]] = {}
+            for doc, dist in hits:
+                job_id = doc.metadata.get("job_id")
+                if not job_id or (allowed is not None and job_id not in allowed):
+                    continue
+                per_job.setdefault(job_id, []).append(distance_to_similarity(dist))
+
+            if self.aggregation == "mean":
+                scored = {job_id: sum(s) / len(s) for job_id, s in per_job.items()}
+            else:
+                scored = {job_id: max(s) for job_id, s in per_job.items()}
+            results.append(sorted(scored.items(), key=lambda item: item[1], reverse=True)[:k])
+        return results
+
+
+# ==========================================================
+# Local backends (memory-mapped float32)
+# ==========================================================
+class LocalJobIndex:
+    """
+    On-disk index of job chunk vectors, memory-mapped at load.
+    kind="exact": every chunk is scored (rows grouped by job).
+    kind="ivf":   rows are clustered by k-means; a query scores only the
+                  rows of its nprobe nearest clusters.
+    Files in path: meta.json, jobs.json, vectors.f32, norms.f32,
+    row_jobs.i32 and, for ivf, centroids.f32 + list_offsets.i64.
+    The index is a snapshot: jobs ingested after a build get semantic
+    scores once it is rebuilt (see rebuild_job_vector_index).
+    """
+
+    def __init__(self, path: str, nprobe: int = JOB_VECTOR_INDEX_NPROBE, aggregation: str = JOB_VECTOR_AGGREGATION):
+        self.path = path
+        self.nprobe = nprobe
+        self.aggregation = aggregation
+
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "jobs.json")) as f:
+            self.job_ids: List[str] = json.load(f)
+
+        self.kind = self.meta["kind"]
+        self.name = self.kind
+        n, dim = self.meta["rows"], self.meta["dim"]
+        self.job_index = {job_id: i for i, job_id in enumerate(self.job_ids)}
+
+        self.vectors = self._memmap("vectors.f32", np.float32, (n, dim))
+        self.norms = self._memmap("norms.f32", np.float32, (n,))
+        self.row_jobs = self._memmap("row_jobs.i32", np.int32, (n,))
+
+        if self.kind == "ivf":
+            nlist = self.meta["nlist"]
+            self.centroids = np.array(self._memmap("centroids.f32", np.float32, (nlist, dim)))
+            self.centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+            self.list_offsets = np.array(self._memmap("list_offsets.i64", np.int64, (nlist + 1,)))
+        else:
+            # Rows are grouped by job: start offset of each job's run
+            self.job_starts = np.flatnonzero(np.r_[True, np.diff(self.row_jobs) != 0]) if n else np.zeros(0, np.int64)
+            self.job_of_run = np.array(self.row_jobs[self.job_starts]) if n else np.zeros(0, np.int32)
+
+    def _memmap(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    # ----------------------------------------
+    # Search
+    # ----------------------------------------
+    def search(self, embedder, queries: List[str], k: int = 10, candidate_ids: Optional[Iterable[str]] = None) -> List[JobScores]:
+        if not queries:
+            return []
+        with track("embedding", "embed_queries"):
+            query_vecs = embedder.model.embed_documents(queries, task_type="retrieval_query")
+        return self.search_vectors(np.asarray(query_vecs, dtype=np.float32), k, candidate_ids)
+
+    def search_vectors(self, queries: np.ndarray, k: int = 10, candidate_ids: Optional[Iterable[str]] = None) -> List[JobScores]:
+        if len(self) == 0:
+            return [[] for _ in range(len(queries))]
+        queries = np.ascontiguousarray(queries, dtype=np.float32).reshape(-1, self.meta["dim"])
+
+        allowed = None
+        if candidate_ids is not None:
+            allowed = np.zeros(len(self.job_ids), dtype=bool)
+            idx = [self.job_index[j] for j in candidate_ids if j in self.job_index]
+            allowed[idx] = True
+
+        with track("vector_index", f"{self.kind}_search"):
+            if self.kind == "ivf":
+                ranked = self._search_ivf(queries, k, allowed)
+            else:
+                ranked = self._search_exact(queries, k, allowed)
+
+        return [[(self.job_ids[j], round(score, 6)) for j, score in hits] for hits in ranked]
+
+    def _search_exact(self, queries, k, allowed):
+        q_sq = np.einsum("ij,ij->i", queries, queries)
+        n = len(self)
+        sims = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK_ROWS):
+            stop = min(n, start + SEARCH_BLOCK_ROWS)
+            dist = _squared_distances(queries, q_sq, self.vectors[start:stop], self.norms[start:stop])
+            sims[:, start:stop] = distance_to_similarity(dist)
+
+        if self.aggregation == "mean":
+            counts = np.diff(np.r_[self.job_starts, n])
+            job_scores = np.add.reduceat(sims, self.job_starts, axis=1) / counts
+        else:
+            job_scores = np.maximum.reduceat(sims, self.job_starts, axis=1)
+
+        return [_top_k(self.job_of_run, row, k, allowed) for row in job_scores]
+
+    def _search_ivf(self, queries, k, allowed):
+        q_sq = np.einsum("ij,ij->i", queries, queries)
+        centroid_dist = _squared_distances(queries, q_sq, self.centroids, self.centroid_norms)
+        nprobe = min(self.nprobe, len(self.centroids))
+
+        results = []
+        for qi, query in enumerate(queries):
+            lists = np.argpartition(centroid_dist[qi], nprobe - 1)[:nprobe]
+            ranges = [(self.list_offsets[c], self.list_offsets[c + 1]) for c in np.sort(lists)]
+            ranges = [(a, b) for a, b in ranges if b > a]
+            if not ranges:
+                results.append([])
+                continue
+
+            # Score each probed list in place (no copy of the memmapped rows)
+            dist = np.concatenate([
+                _squared_distances(query[None, :], q_sq[qi:qi + 1], self.vectors[a:b], self.norms[a:b])[0]
+                for a, b in ranges
+            ])
+            row_jobs = np.concatenate([self.row_jobs[a:b] for a, b in ranges])
+
+            jobs, scores = aggregate_by_job(row_jobs, distance_to_similarity(dist), self.aggregation)
+            results.append(_top_k(jobs, scores, k, allowed))
+        return results
+
+    # ----------------------------------------
+    # Build
+    # ----------------------------------------
+    @staticmethod
+    def build(
+        path: str,
+        vectors: np.ndarray,
+        chunk_job_ids: Sequence[str],
+        kind: str = "ivf",
+        nlist: int = JOB_VECTOR_INDEX_NLIST,
+        seed: int = 0
+    ) -> Dict:
+        """
+        Writes an index for (vectors[i], chunk_job_ids[i]) rows to path,
+        replacing any index already there. Returns its meta.
+        """
+        if kind not in ("exact", "ivf"):
+            raise ValueError(f"Unknown vector index kind: {kind}")
+
+        start = time.perf_counter()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = len(vectors)
+        dim = vectors.shape[1] if n else 0
+
+        job_ids = list(dict.fromkeys(chunk_job_ids))
+        lookup = {job_id: i for i, job_id in enumerate(job_ids)}
+        row_jobs = np.fromiter((lookup[j] for j in chunk_job_ids), dtype=np.int32, count=n)
+
+        meta = {"kind": kind, "rows": n, "dim": dim, "jobs": len(job_ids), "built_at": time.time()}
+        extra = {}
+
+        if kind == "ivf" and n:
+            nlist = nlist or max(1, int(np.sqrt(n)))
+            nlist = min(nlist, n)
+            centroids = _kmeans(vectors, nlist, seed=seed)
+            assignment = _assign(vectors, centroids)
+            order = np.lexsort((row_jobs, assignment))
+            counts = np.bincount(assignment, minlength=nlist)
+            extra["centroids.f32"] = centroids
+            extra["list_offsets.i64"] = np.r_[0, np.cumsum(counts)].astype(np.int64)
+            meta["nlist"] = nlist
+        else:
+            if kind == "ivf":
+                meta["nlist"] = 0
+                extra["centroids.f32"] = np.zeros((0, dim), dtype=np.float32)
+                extra["list_offsets.i64"] = np.zeros(1, dtype=np.int64)
+            order = np.argsort(row_jobs, kind="stable")
+
+        vectors = vectors[order]
+        row_jobs = row_jobs[order]
+
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        vectors.tofile(os.path.join(tmp, "vectors.f32"))
+        np.einsum("ij,ij->i", vectors, vectors).astype(np.float32).tofile(os.path.join(tmp, "norms.f32"))
+        row_jobs.tofile(os.path.join(tmp, "row_jobs.i32"))
+        for name, array in extra.items():
+            array.tofile(os.path.join(tmp, name))
+        with open(os.path.join(tmp, "jobs.json"), "w") as f:
+            json.dump(job_ids, f)
+
+        meta["build_seconds"] = round(time.perf_counter() - start, 3)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        # Swap directories; readers holding memmaps of the old files keep working
+        old = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+        return meta
+
+    @staticmethod
+    def build_from_chroma(embedder, path: str, kind: str = "ivf", nlist: int = JOB_VECTOR_INDEX_NLIST, page_size: int = 5000) -> Dict:
+        """
+        Exports every chunk vector of the embedder's collection and builds an index.
+        """
+        vectors, job_ids = [], []
+        offset = 0
+        while True:
+            with track("chroma", "get"):
+                raw = embedder.vectorstore.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            ids = raw["ids"]
+            if not ids:
+                break
+            for vec, meta in zip(raw["embeddings"], raw["metadatas"]):
+                job_id = (meta or {}).get("job_id")
+                if job_id:
+                    vectors.append(np.asarray(vec, dtype=np.float32))
+                    job_ids.append(job_id)
+            offset += len(ids)
+
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        return LocalJobIndex.build(path, matrix, job_ids, kind=kind, nlist=nlist)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+        block = vectors[start:start + SEARCH_BLOCK_ROWS]
+        # argmin ||x - c||^2 == argmin (||c||^2 - 2 x.c)
+        out[start:start + len(block)] = np.argmin(c_sq[None, :] - 2.0 * (block @ centroids.T), axis=1)
+    return out
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 12, sample_per_list: int = 64, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample = vectors[rng.choice(n, size=min(n, nlist * sample_per_list), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = _assign(sample, centroids)
+        counts = np.bincount(assignment, minlength=nlist)
+        filled = counts > 0
+
+        # Per-cluster sums over the sample sorted by cluster
+        order = np.argsort(assignment, kind="stable")
+        starts = np.r_[0, np.cumsum(counts)[:-1]][filled]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        centroids[filled] = sums / counts[filled, None].astype(np.float32)
+        # Re-seed empty clusters from random sample points
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+    return centroids
+
+
+# ==========================================================
+# Process-wide index
+# ==========================================================
+_index = None
+_index_lock = threading.Lock()
+_building = threading.Event()
+
+
+def get_job_vector_index():
+    """
+    Backend selected by JOB_VECTOR_INDEX. A local backend whose files
+    don't exist yet is built from Chroma in the background; until then
+    searches go through the Chroma backend.
+    """
+    global _index
+    if JOB_VECTOR_INDEX not in ("exact", "ivf"):
+        return ChromaJobIndex()
+
+    with _index_lock:
+        if _index is not None:
+            return _index
+        if os.path.exists(os.path.join(JOB_VECTOR_INDEX_DIR, "meta.json")):
+            _index = LocalJobIndex(JOB_VECTOR_INDEX_DIR)
+            print(f"[VectorIndex] Loaded {_index.kind} index: {len(_index)} chunks, {len(_index.job_ids)} jobs")
+            return _index
+
+    rebuild_job_vector_index(background=True)
+    return ChromaJobIndex()
+
+
+def rebuild_job_vector_index(background: bool = False) -> Optional[Dict]:
+    """
+    Re-exports job_chunks from Chroma into the local index and swaps it in.
+    No-op for the chroma backend or while a build is running.
+    """
+    if JOB_VECTOR_INDEX not in ("exact", "ivf"):
+        return None
+
+    with _index_lock:
+        if _building.is_set():
+            return None
+        _building.set()
+
+    def build():
+        global _index
+        from services.embedding import get_embedding_service
+
+        try:
+            meta = LocalJobIndex.build_from_chroma(
+                get_embedding_service(collection_name="job_chunks"),
+                JOB_VECTOR_INDEX_DIR,
+                kind=JOB_VECTOR_INDEX
+            )
+            with _index_lock:
+                _index = LocalJobIndex(JOB_VECTOR_INDEX_DIR)
+            print(f"[VectorIndex] Built {meta['kind']} index: {meta['rows']} chunks, {meta['jobs']} jobs in {meta['build_seconds']}s")
+            return meta
+        except Exception as e:
+            print(f"[VectorIndex] Warning: Index build failed: {e}")
+            return None
+        finally:
+            _building.clear()
+
+    if background:
+        threading.Thread(target=build, name="job-vector-index", daemon=True).start()
+        return None
+    return build()
+
+
+def describe_job_vector_index() -> Dict:
+    with _index_lock:
+        index = _index
+    info = {"backend": JOB_VECTOR_INDEX, "building": _building.is_set(), "loaded": index is not None}
+    if index is not None:
+        info.update({
+            "chunks": len(index),
+            "jobs": len(index.job_ids),
+            "built_at": index.meta.get("built_at"),
+            "nlist": index.meta.get("nlist"),
+            "nprobe": index.nprobe if index.kind == "ivf" else None,
+            "aggregation": index.aggregation
+        })
+    return info
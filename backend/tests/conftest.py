@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Modules import as `services.x` / `agents.x`, relative to backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
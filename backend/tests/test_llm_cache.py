@@ -0,0 +1,87 @@
+# tests/test_llm_cache.py
+
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+import services.llm_factory as llm_factory
+from services.llm_cache import LLMResponseCache, LLMResponseStore
+from services.client_pool import KeyedLRUPool
+from services.ats_service import ATSService
+from agents.fit_score_agent import fit_score_agent
+
+
+RESPONSE = '{"ats_score": 72, "ats_report": "ok", "fit_score": 64, "explanation": "ok"}'
+
+# Prompts that reached the model (i.e. were not served from the cache)
+MODEL_CALLS: List[Any] = []
+
+
+class CountingChatModel(FakeListChatModel):
+    """
+    Stands in for ChatGoogleGenerativeAI: accepts its constructor options
+    and records every call that actually reaches the model.
+    """
+    model: str = "fake"
+    temperature: float = 0.0
+    google_api_key: Optional[str] = None
+    response_mime_type: Optional[str] = None
+    max_output_tokens: Optional[int] = None
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs):
+        MODEL_CALLS.append(messages)
+        return super()._call(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fake_llm(tmp_path, monkeypatch):
+    store = LLMResponseStore(path=str(tmp_path / "llm_cache.sqlite3"))
+
+    def build(**kwargs):
+        kwargs.pop("callbacks", None)
+        return CountingChatModel(responses=[RESPONSE], **kwargs)
+
+    monkeypatch.setattr(llm_factory, "ChatGoogleGenerativeAI", build)
+    monkeypatch.setattr(llm_factory, "get_llm_cache", lambda namespace, version: LLMResponseCache(store, namespace, version))
+    monkeypatch.setattr(llm_factory, "_clients", KeyedLRUPool(8, 60))
+    monkeypatch.setattr(llm_factory, "_chains", KeyedLRUPool(8, 60))
+    MODEL_CALLS.clear()
+
+
+def test_repeated_ats_score_is_served_from_cache():
+    first = ATSService.calculate_score("Python developer, 5 years", "test-key")
+    second = ATSService.calculate_score("Python developer, 5 years", "test-key")
+
+    assert first == second == {"ats_score": 72.0, "ats_report": "ok"}
+    assert len(MODEL_CALLS) == 1
+
+
+def test_repeated_fit_score_is_served_from_cache():
+    state = {
+        "google_api_key": "test-key",
+        "resume_text": "Python developer",
+        "job_description": "Backend engineer, Python and SQL",
+        "extracted_skills": ["python"],
+        "job_skills": ["python", "sql"],
+        "job_metadata": {},
+    }
+
+    first = fit_score_agent(dict(state))
+    second = fit_score_agent(dict(state))
+
+    assert first == second
+    assert first["overall_fit_score"] == 0.64
+    assert len(MODEL_CALLS) == 1
+
+
+def test_sampled_chains_stay_uncached():
+    prompt = PromptTemplate(input_variables=["text"], template="Draft: {text}")
+    chain = llm_factory.get_llm_chain("cover_letter", prompt, StrOutputParser(), "test-key", temperature=0.25)
+
+    chain.invoke({"text": "x"})
+    chain.invoke({"text": "x"})
+
+    assert len(MODEL_CALLS) == 2
@@ -17,7 +17,7 @@ const Applications = () => {
         try {
             const [appsData, jobsData] = await Promise.all([
                 getAllApplications(),
-                getAllJobs()
+                getAllJobs('id,title,company,url')
             ]);
 
             // Create a map of job_id -> job details for easy lookup
@@ -1,12 +1,18 @@
 import { useState, useEffect } from 'react';
-import { getAllJobs, deleteJob, runCareerPilot } from '../services/api';
+import { getJobsPage, getJob, deleteJob, runCareerPilot } from '../services/api';
 import { Button } from '../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle, CardDescription, CardFooter } from '../components/ui/card';
 import { Input } from '../components/ui/input';
 import { Trash2, Search, Briefcase } from 'lucide-react';
 
+// Listing columns; descriptions are fetched per job when opened
+const LIST_FIELDS = 'id,title,company,location,source,url';
+const PAGE_SIZE = 30;
+
 const SearchJobs = () => {
     const [jobs, setJobs] = useState([]);
+    const [nextAfter, setNextAfter] = useState(null);
+    const [descriptions, setDescriptions] = useState({});
     const [searchQuery, setSearchQuery] = useState('');
     const [loading, setLoading] = useState(false);
 
@@ -14,12 +20,29 @@ const SearchJobs = () => {
         fetchJobs();
     }, []);
 
-    const fetchJobs = async () => {
+    const fetchJobs = async (after) => {
+        setLoading(true);
         try {
-            const data = await getAllJobs();
-            setJobs(data);
+            const page = await getJobsPage(after, PAGE_SIZE, LIST_FIELDS);
+            setJobs(prev => (after ? [...prev, ...page.jobs] : page.jobs));
+            setNextAfter(page.nextAfter);
         } catch (err) {
             console.error("Failed to fetch jobs", err);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    const toggleDescription = async (id) => {
+        if (id in descriptions) {
+            setDescriptions(({ [id]: _, ...rest }) => rest);
+            return;
+        }
+        try {
+            const job = await getJob(id);
+            setDescriptions(prev => ({ ...prev, [id]: job.description || 'No description.' }));
+        } catch (err) {
+            console.error("Failed to fetch job", err);
         }
     };
 
@@ -27,7 +50,7 @@ const SearchJobs = () => {
         if (!window.confirm("Are you sure you want to delete this job?")) return;
         try {
             await deleteJob(id);
-            fetchJobs();
+            setJobs(prev => prev.filter(job => job.id !== id));
         } catch (err) {
             console.error("Failed to delete job", err);
         }
@@ -75,9 +98,14 @@ const SearchJobs = () => {
                                 <div className="text-sm text-muted-foreground mb-2">
                                     <span className="font-medium text-foreground">Location:</span> {job.location || 'Remote'}
                                 </div>
-                                <div className="text-sm text-muted-foreground line-clamp-3">
-                                    {job.description}
-                                </div>
+                                {descriptions[job.id] && (
+                                    <div className="text-sm text-muted-foreground line-clamp-6">
+                                        {descriptions[job.id]}
+                                    </div>
+                                )}
+                                <Button variant="link" size="sm" className="px-0" onClick={() => toggleDescription(job.id)}>
+                                    {job.id in descriptions ? 'Hide description' : 'Show description'}
+                                </Button>
                             </CardContent>
                             <CardFooter className="flex justify-between border-t pt-4">
                                 <Button variant="outline" size="sm" asChild>
@@ -93,6 +121,14 @@ const SearchJobs = () => {
                     ))
                 )}
             </div>
+
+            {nextAfter && (
+                <div className="flex justify-center">
+                    <Button variant="outline" onClick={() => fetchJobs(nextAfter)} disabled={loading}>
+                        {loading ? 'Loading...' : 'Load more'}
+                    </Button>
+                </div>
+            )}
         </div>
     );
 };
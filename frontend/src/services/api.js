@@ -50,8 +50,26 @@ export const addJob = async (jobData) => {
     return response.data;
 };
 
-export const getAllJobs = async () => {
-    const response = await api.get('/jobs/all');
+export const getJobsPage = async (after, limit = 30, fields) => {
+    // /jobs/all is keyset-paginated: nextAfter is null on the last page
+    const response = await api.get('/jobs/all', { params: { after, limit, fields } });
+    return { jobs: response.data, nextAfter: response.headers['x-next-after'] || null };
+};
+
+export const getAllJobs = async (fields) => {
+    // Every page; pass a narrow `fields` list so the rows stay small
+    const jobs = [];
+    let after;
+    do {
+        const page = await getJobsPage(after, 500, fields);
+        jobs.push(...page.jobs);
+        after = page.nextAfter;
+    } while (after);
+    return jobs;
+};
+
+export const getJob = async (jobId) => {
+    const response = await api.get(`/jobs/${jobId}`);
     return response.data;
 };
 